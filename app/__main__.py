@@ -5,15 +5,18 @@ from aiogram.fsm.storage.redis import RedisStorage
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from app.core.handlers import handlers_router
+from app.core.middlewares.bonus_outbox import BonusOutboxMiddleware
 from app.core.middlewares.camera_streams import CamerasStreamsMiddleware
 from app.core.middlewares.config import ConfigMiddleware
 from app.core.middlewares.db import AddUserDbMiddleware, DbSessionMiddleware
 from app.core.middlewares.metrics import MessageModelMiddleware
 from app.core.middlewares.scheduler import SchedulerMiddleware
-from app.core.middlewares.terminal_session import TerminalSesssionMiddleware
-from app.services.cameras.camera_stream import CameraStream
+from app.services.cameras.camera_process import stop_camera_workers
+from app.services.cameras.occupancy import QueueMonitor
+from app.services.cameras.registry import CameraRegistry
 from app.services.client_database.connector import setup_get_pool
 from app.services.scheduler.scheduler import setup_scheduler
+from app.services.terminal.bonus_outbox import BonusOutbox
 from app.services.terminal.session import TerminalSession
 
 from app.settings.config import Config, load_config
@@ -35,14 +38,15 @@ def setup_middlewares(
     dp: Dispatcher,
     sessionmaker: async_sessionmaker,
     config: Config,
-    cameras: list[CameraStream],
-    terminal_session: TerminalSession,
+    cameras: CameraRegistry,
+    queue_monitor: QueueMonitor,
+    bonus_outbox: BonusOutbox,
     scheduler: AsyncIOScheduler,
 ):
     dp.update.middleware(DbSessionMiddleware(sessionmaker))
     dp.update.middleware(ConfigMiddleware(config))
-    dp.update.middleware(CamerasStreamsMiddleware(cameras))
-    dp.update.middleware(TerminalSesssionMiddleware(terminal_session))
+    dp.update.middleware(CamerasStreamsMiddleware(cameras, queue_monitor))
+    dp.update.middleware(BonusOutboxMiddleware(bonus_outbox))
     dp.update.middleware(SchedulerMiddleware(scheduler))
 
     dp.message.middleware(AddUserDbMiddleware(sessionmaker))
@@ -56,23 +60,12 @@ def setup_terminal_sessions(config: Config) -> list[TerminalSession]:
             url=terminal.url,
             login=terminal.login,
             password=terminal.password,
+            sales_date_param=terminal.sales_date_param,
         )
         for terminal in config.terminals
     ]
 
 
-def get_cameras(config: Config) -> list[CameraStream]:
-    return [
-        CameraStream(
-            camera_uri=camera_config.camera_uri,
-            name=camera_config.name,
-            description=camera_config.description,
-            tags=camera_config.tags,
-        )
-        for camera_config in config.cameras
-    ]
-
-
 async def main():
     config: Config = load_config()
     bot = Bot(config.bot.token, parse_mode=config.bot.parse_mode)
@@ -82,7 +75,9 @@ async def main():
 
     sessionmaker = await setup_get_pool(config.db.uri)
     terminal_sessions = setup_terminal_sessions(config)
-    cameras = get_cameras(config)
+    bonus_outbox = BonusOutbox(storage.redis)
+    cameras = CameraRegistry(config.cameras)
+    queue_monitor = QueueMonitor(cameras)
     setup_routers(dp)
 
     setup_scheduler(
@@ -91,10 +86,20 @@ async def main():
         terminal_sessions,
         sessionmaker,
         storage,
+        config,
+        cameras,
+        queue_monitor,
+        bonus_outbox,
     )
 
     setup_middlewares(
-        dp, sessionmaker, config, cameras, terminal_sessions[0], scheduler
+        dp,
+        sessionmaker,
+        config,
+        cameras,
+        queue_monitor,
+        bonus_outbox,
+        scheduler,
     )
 
     try:
@@ -102,6 +107,10 @@ async def main():
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         await dp.storage.close()
+        for terminal_session in terminal_sessions:
+            await terminal_session.close()
+        cameras.stop()
+        stop_camera_workers()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,13 @@
+import asyncio
 import json
+import logging
 import random
 from typing import Optional
 from aiogram import F, Bot, Router, html
 from aiogram.enums import ParseMode
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.keyboards.editor.create_post import send_create_post_menu
 from app.core.keyboards.menu import (
@@ -15,12 +17,21 @@ from app.core.keyboards.menu import (
     SEE_QUEUE_BUTTON_TEXT,
     get_user_menu_reply_keyboard,
 )
+from app.core.keyboards.queue import QueuePhotosCB, get_queue_photos_keyboard
 from app.core.middlewares.create_post import CreatePostMiddleware, CreatePostStateData
 from app.core.states.states import GetPhone
 from app.services.cameras.camera_stream import (
     CameraStream,
-    get_input_media_photo_to_send,
+    CameraWarmingUpError,
+    create_input_media_photo,
+    get_caption,
+    get_photo_to_send,
+    get_snapshot_async,
+    save_file_ids,
 )
+from app.services.cameras.mosaic import Mosaic
+from app.services.cameras.occupancy import QueueMonitor
+from app.services.cameras.registry import CameraRegistry
 from app.services.client_database.dao.client_bonus import ClientBonusDAO
 from app.services.client_database.dao.promocode import PromocodeDAO
 
@@ -69,15 +80,90 @@ async def queue(
     state: FSMContext,
     bot: Bot,
     config: Config,
-    streams: list[CameraStream],
+    cameras: CameraRegistry,
+    queue_monitor: QueueMonitor,
 ):
     await state.set_state()
-    cameras = list(filter(lambda x: "queue" in x.tags, streams))
+    if config.constants.queue_text_summary:
+        summary = queue_monitor.get_summary()
+        if summary is not None:
+            await message.answer(summary, reply_markup=get_queue_photos_keyboard())
+            return
+
+    await send_queue(message, bot, config, cameras)
+
+
+@router.callback_query(QueuePhotosCB.filter())
+async def cb_queue_photos(
+    callback: CallbackQuery, bot: Bot, config: Config, cameras: CameraRegistry
+):
+    await callback.answer()
+    if not isinstance(callback.message, Message):
+        return
+    await send_queue(callback.message, bot, config, cameras)
+
+
+async def send_queue(
+    message: Message, bot: Bot, config: Config, cameras: CameraRegistry
+):
+    if config.constants.queue_mosaic:
+        await send_queue_mosaic(message, bot, config, cameras.mosaic("queue"))
+        return
+
+    await send_queue_photos(message, bot, config, cameras.by_tag("queue"))
+
+
+async def send_queue_photos(
+    message: Message, bot: Bot, config: Config, cameras: list[CameraStream]
+):
+    results = await asyncio.gather(
+        *(get_snapshot_async(camera, config) for camera in cameras),
+        return_exceptions=True,
+    )
+    snapshots = []
     photos = []
-    for camera in cameras:
-        photos.append(get_input_media_photo_to_send(camera, config))
+    warming_up = []
+    for camera, result in zip(cameras, results):
+        if isinstance(result, CameraWarmingUpError):
+            warming_up.append(camera.description)
+            continue
+        if isinstance(result, BaseException):
+            logging.error("Can't get snapshot from camera %s: %r", camera.name, result)
+            continue
+        snapshots.append(result)
+        photos.append(create_input_media_photo(result, get_caption(camera, result)))
+
+    if warming_up:
+        await message.answer(
+            "Камеры запускаются, попробуйте через минуту:\n" + "\n".join(warming_up)
+        )
+    elif not photos:
+        await message.answer(
+            "Не удалось получить изображение с камер, попробуйте позже"
+        )
+
+    if photos:
+        messages = await bot.send_media_group(message.chat.id, photos)
+        save_file_ids(snapshots, messages)
+
+
+async def send_queue_mosaic(message: Message, bot: Bot, config: Config, mosaic: Mosaic):
+    try:
+        snapshot = await mosaic.get_snapshot_async(config)
+    except CameraWarmingUpError:
+        await message.answer("Камеры запускаются, попробуйте через минуту")
+        return
+    except Exception as e:
+        logging.error("Can't get queue mosaic: %r", e)
+        await message.answer(
+            "Не удалось получить изображение с камер, попробуйте позже"
+        )
+        return
 
-    await bot.send_media_group(message.chat.id, photos)
+    sent_message = await bot.send_photo(
+        message.chat.id, get_photo_to_send(snapshot), caption=mosaic.get_caption()
+    )
+    save_file_ids([snapshot], [sent_message])
 
 
 @router.message(F.text == GET_BONUSES_BUTTON_TEXT)
@@ -17,11 +17,14 @@ from app.services.client_database.dao.feedback import FeedbackDAO
 from app.services.client_database.dao.message import MessageDAO
 from app.services.client_database.dao.question import QuestionDAO
 from app.services.client_database.dao.user import UserDAO
+from app.services.client_database.dao.washing import WashingDAO
 from app.services.client_database.models.feedback import Feedback
 from app.services.client_database.models.question import CategoryEnum, Question
 from app.services.client_database.models.role import PermissionEnum
 from app.services.client_database.models.user import User
-from app.services.terminal.session import TerminalSession
+from app.services.client_database.models.washing import Washing
+from app.services.terminal.bonus_outbox import BonusOperation, BonusOutbox
+from app.settings.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +40,8 @@ async def msg_measurable_feedback(
     state: FSMContext,
     session: AsyncSession,
     bot: Bot,
-    terminal_session: TerminalSession,
+    bonus_outbox: BonusOutbox,
+    config: Config,
 ):
     """This handler will receive a complete album of any type."""
     assert message.text is not None
@@ -73,7 +77,7 @@ async def msg_measurable_feedback(
         and int(mark) <= 3
     ):
         await send_bonuses_for_bad_serivce(
-            message, feedback_id, terminal_session, session
+            message, feedback_id, bonus_outbox, config, session
         )
 
 
@@ -101,7 +105,8 @@ async def send_measurable_feedback(
 async def send_bonuses_for_bad_serivce(
     message: Message,
     feedback_id: int,
-    terminal_session: TerminalSession,
+    bonus_outbox: BonusOutbox,
+    config: Config,
     session: AsyncSession,
 ):
     client_id = message.chat.id
@@ -117,8 +122,31 @@ async def send_bonuses_for_bad_serivce(
         "Очень жаль, что вы так оценили наши услуги(\nВ качестве извенения мы начислим вам 100 бонусов"
     )
 
-    async with terminal_session as term_session:
-        await term_session.add_bonuses_by_phone(user.phone, 100, "За плохой отзыв")
+    # Bonuses are added by outbox worker on terminal where client washed
+    feedback: Feedback = await FeedbackDAO(session).get_by_id(feedback_id)
+    washing: Washing | None = await WashingDAO(session).get_by_id(feedback.washing_id)
+    terminal_id = get_bonus_terminal_id(washing, config)
+    await bonus_outbox.enqueue(
+        BonusOperation(
+            terminal_id=terminal_id,
+            phone=user.phone,
+            bonus_count=100,
+            description="За плохой отзыв",
+            key=f"bad_feedback:{feedback_id}",
+        )
+    )
+
+
+def get_bonus_terminal_id(washing: Washing | None, config: Config) -> int:
+    """Terminal of washing if bot works with it, otherwise the first terminal"""
+    terminal_ids = [terminal.id for terminal in config.terminals]
+    if washing is not None and washing.terminal in terminal_ids:
+        return washing.terminal
+    if washing is not None:
+        logger.warning(
+            "Terminal %s of washing %s is not configured", washing.terminal, washing.id
+        )
+    return terminal_ids[0]
 
 
 async def is_client_already_sent_before_bad_feedback(
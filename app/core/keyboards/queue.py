@@ -0,0 +1,15 @@
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class QueuePhotosCB(CallbackData, prefix="queue_photos"):
+    ...
+
+
+def get_queue_photos_keyboard() -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+
+    builder.button(text="Показать фото 📷", callback_data=QueuePhotosCB().pack())
+
+    return builder.as_markup()
@@ -3,12 +3,12 @@ from typing import Any, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 
-from app.services.terminal.session import TerminalSession
+from app.services.terminal.bonus_outbox import BonusOutbox
 
 
-class TerminalSesssionMiddleware(BaseMiddleware):
-    def __init__(self, session: TerminalSession):
-        self.session = session
+class BonusOutboxMiddleware(BaseMiddleware):
+    def __init__(self, outbox: BonusOutbox):
+        self.outbox = outbox
 
     async def __call__(
         self,
@@ -16,5 +16,5 @@ class TerminalSesssionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        data["terminal_session"] = self.session
+        data["bonus_outbox"] = self.outbox
         return await handler(event, data)
@@ -2,13 +2,15 @@ from typing import Callable, Awaitable, Dict, Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from app.services.cameras.camera_stream import CameraStream
+from app.services.cameras.occupancy import QueueMonitor
+from app.services.cameras.registry import CameraRegistry
 
 
 class CamerasStreamsMiddleware(BaseMiddleware):
-    def __init__(self, streams: list[CameraStream]):
+    def __init__(self, cameras: CameraRegistry, queue_monitor: QueueMonitor):
         super().__init__()
-        self.streams = streams
+        self.cameras = cameras
+        self.queue_monitor = queue_monitor
 
     async def __call__(
         self,
@@ -16,5 +18,6 @@ class CamerasStreamsMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        data["streams"] = self.streams
+        data["cameras"] = self.cameras
+        data["queue_monitor"] = self.queue_monitor
         return await handler(event, data)
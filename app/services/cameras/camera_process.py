@@ -0,0 +1,340 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.services.cameras.shared_frames import (
+    DEFAULT_MAX_FRAME_SIZE,
+    DEFAULT_SLOTS,
+    SharedFrameRing,
+)
+from app.services.cameras.video_capture import (
+    INITIAL_BACKOFF,
+    MAX_BACKOFF,
+    RETRIEVE_TIMEOUT,
+    STALE_TIMEOUT,
+    CameraState,
+    Frame,
+    VideoCaptureThreaded,
+)
+from app.settings.camera import DEFAULT_REFRESH_INTERVAL, CaptureMode
+
+# How often worker process publishes new frames to shared memory
+PUBLISH_INTERVAL = 0.2
+REQUEST_POLL_INTERVAL = 0.01
+# How often worker process is checked to be alive
+WORKER_CHECK_INTERVAL = 1
+# Backoff of respawning is reset if worker lived this time
+WORKER_STABLE_TIME = 60
+
+_STATES = list(CameraState)
+
+# Worker processes are spawned, forking bot process with running threads is unsafe
+_context = multiprocessing.get_context("spawn")
+
+
+@dataclass
+class AddCamera:
+    name: str
+    src: str
+    ring_name: str
+    slots: int
+    max_frame_size: int
+    capture_mode: CaptureMode
+    refresh_interval: float
+
+
+@dataclass
+class RemoveCamera:
+    ring_name: str
+
+
+@dataclass
+class _PublishedCamera:
+    name: str
+    cam: VideoCaptureThreaded
+    ring: SharedFrameRing
+    published_frame_time: float = 0
+    published_time: float = 0
+    handled_requests: int = 0
+
+
+def run_camera_worker(commands: multiprocessing.Queue) -> None:
+    """Entry point of camera worker process"""
+    # Cameras by ring name, new capture of camera is added before old is removed
+    cameras: dict[str, _PublishedCamera] = {}
+    running = True
+    while running:
+        try:
+            while True:
+                command = commands.get_nowait()
+                if command is None:
+                    running = False
+                    break
+                _handle_command(cameras, command)
+        except queue.Empty:
+            pass
+
+        for camera in cameras.values():
+            try:
+                _publish_frame(camera)
+            except Exception as e:
+                logging.error("Can't publish frame of camera %s: %r", camera.name, e)
+        time.sleep(REQUEST_POLL_INTERVAL)
+
+    for camera in cameras.values():
+        _stop_camera(camera)
+
+
+def _handle_command(
+    cameras: dict[str, _PublishedCamera], command: AddCamera | RemoveCamera
+) -> None:
+    match command:
+        case AddCamera():
+            cam = VideoCaptureThreaded(
+                command.src,
+                capture_mode=command.capture_mode,
+                refresh_interval=command.refresh_interval,
+            )
+            cam.start()
+            ring = SharedFrameRing(
+                command.ring_name,
+                slots=command.slots,
+                max_frame_size=command.max_frame_size,
+                create=False,
+            )
+            cameras[command.ring_name] = _PublishedCamera(command.name, cam, ring)
+        case RemoveCamera():
+            camera = cameras.pop(command.ring_name, None)
+            if camera is not None:
+                _stop_camera(camera)
+
+
+def _publish_frame(camera: _PublishedCamera) -> None:
+    cam = camera.cam
+    camera.ring.state = _STATES.index(cam.state)
+    requests = camera.ring.requests
+    if requests != camera.handled_requests:
+        camera.handled_requests = requests
+        cam.retrieve_requested.set()
+        camera.published_time = 0
+
+    if time.time() - camera.published_time < PUBLISH_INTERVAL:
+        return
+
+    # Capture thread replaces frame instead of writing into it,
+    # so reference can be used outside of the lock
+    with cam.read_lock:
+        frame, frame_time = cam.frame, cam.frame_time
+    if frame is None or frame_time == camera.published_frame_time:
+        return
+
+    camera.ring.write(frame, frame_time)
+    camera.published_frame_time = frame_time
+    camera.published_time = time.time()
+
+
+def _stop_camera(camera: _PublishedCamera) -> None:
+    camera.cam.stop()
+    camera.ring.close()
+
+
+class CameraWorker:
+    """
+    Process which captures frames of a group of cameras.
+    Dead process is respawned with backoff and gets all its cameras again
+    """
+
+    def __init__(self, group: str) -> None:
+        self.group = group
+        self.cameras: dict[str, AddCamera] = {}
+        self.backoff = INITIAL_BACKOFF
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._spawn()
+        self.supervisor = threading.Thread(
+            target=self._supervise,
+            name=f"camera-worker-{group}-supervisor",
+            daemon=True,
+        )
+        self.supervisor.start()
+
+    def _spawn(self) -> None:
+        self.commands: multiprocessing.Queue = _context.Queue()
+        self.process = _context.Process(
+            target=run_camera_worker,
+            args=(self.commands,),
+            name=f"camera-worker-{self.group}",
+            daemon=True,
+        )
+        self.process.start()
+        self.spawn_time = time.time()
+        for command in self.cameras.values():
+            self.commands.put(command)
+
+    def _supervise(self) -> None:
+        while not self._stopped.wait(WORKER_CHECK_INTERVAL):
+            if self.is_alive():
+                continue
+            if time.time() - self.spawn_time > WORKER_STABLE_TIME:
+                self.backoff = INITIAL_BACKOFF
+            logging.error(
+                "Camera worker %s died with code %s, respawning in %ss",
+                self.group,
+                self.process.exitcode,
+                self.backoff,
+            )
+            if self._stopped.wait(self.backoff):
+                return
+            with self._lock:
+                if not self._stopped.is_set():
+                    self._spawn()
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def add_camera(self, command: AddCamera) -> None:
+        with self._lock:
+            self.cameras[command.ring_name] = command
+            self.commands.put(command)
+
+    def remove_camera(self, ring_name: str) -> None:
+        with self._lock:
+            self.cameras.pop(ring_name, None)
+            self.commands.put(RemoveCamera(ring_name))
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped.set()
+            self.commands.put(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+_workers: dict[str, CameraWorker] = {}
+
+
+def get_camera_worker(group: str) -> CameraWorker:
+    if group not in _workers:
+        _workers[group] = CameraWorker(group)
+    return _workers[group]
+
+
+def stop_camera_workers() -> None:
+    for worker in _workers.values():
+        worker.stop()
+    _workers.clear()
+
+
+class ProcessVideoCapture:
+    """
+    Same interface as VideoCaptureThreaded, but frames are captured
+    in worker process of the group and copied from shared memory
+    """
+
+    def __init__(
+        self,
+        src: str,
+        name: str,
+        group: str,
+        capture_mode: CaptureMode = CaptureMode.READ,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        slots: int = DEFAULT_SLOTS,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    ):
+        self.src = src
+        self.name = name
+        self.group = group
+        self.capture_mode = capture_mode
+        self.refresh_interval = refresh_interval
+        self.ring = SharedFrameRing(slots=slots, max_frame_size=max_frame_size)
+        self.started = False
+
+    @property
+    def state(self) -> CameraState:
+        """
+        State published by worker, DOWN if worker is dead and STALE if
+        worker doesn't publish frames, as it's stale in capture thread
+        """
+        if self.started:
+            worker = _workers.get(self.group)
+            if worker is None or not worker.is_alive():
+                return CameraState.DOWN
+        state = _STATES[self.ring.state]
+        if (
+            state == CameraState.LIVE
+            and time.time() - self.ring.timestamp > self._stale_timeout
+        ):
+            return CameraState.STALE
+        return state
+
+    @property
+    def _stale_timeout(self) -> float:
+        # Grabbed frames are published only when they are decoded
+        if self.capture_mode == CaptureMode.GRAB:
+            return STALE_TIMEOUT + self.refresh_interval
+        return STALE_TIMEOUT
+
+    @property
+    def is_warming_up(self) -> bool:
+        return self.ring.generation == 0 and self.state == CameraState.CONNECTING
+
+    def start(self):
+        if self.started:
+            return None
+        self.started = True
+        get_camera_worker(self.group).add_camera(
+            AddCamera(
+                name=self.name,
+                src=self.src,
+                ring_name=self.ring.name,
+                slots=self.ring.slots,
+                max_frame_size=self.ring.max_frame_size,
+                capture_mode=self.capture_mode,
+                refresh_interval=self.refresh_interval,
+            )
+        )
+        return self
+
+    def _wait_requested_frame(self):
+        generation = self.ring.generation
+        self.ring.request_frame()
+        deadline = time.time() + RETRIEVE_TIMEOUT
+        while self.ring.generation == generation and time.time() < deadline:
+            time.sleep(REQUEST_POLL_INTERVAL)
+
+    def read_frame(self) -> Optional[Frame]:
+        if (
+            self.capture_mode == CaptureMode.GRAB
+            and self.started
+            and self.state == CameraState.LIVE
+        ):
+            self._wait_requested_frame()
+
+        # Frames are kept by camera streams longer than shared slot is valid
+        generation, timestamp, image = self.ring.read_copy()
+        if image is None:
+            return None
+        return Frame(image, timestamp, generation)
+
+    def read(self) -> tuple[bool, Optional[np.ndarray]]:
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image
+
+    def stop(self):
+        if not self.started:
+            return
+        self.started = False
+        if self.group in _workers:
+            _workers[self.group].remove_camera(self.ring.name)
+        self.ring.close()
+        self.ring.unlink()
@@ -1,68 +1,277 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+import threading
+from typing import Any, Callable, Optional, TypeVar
 from aiogram import types
-import cv2
 import numpy as np
 import time
-from io import BytesIO
-from app.services.cameras.video_capture import VideoCaptureThreaded
+from app.services.cameras.camera_process import ProcessVideoCapture
+from app.services.cameras.encoding import encode_frame
+from app.services.cameras.frame_source import FrameSource
+from app.services.cameras.motion import frame_difference, make_thumbnail
+from app.services.cameras.single_flight import SingleFlight
+from app.services.cameras.video_capture import (
+    CameraState,
+    Frame,
+    VideoCaptureThreaded,
+)
 
-from app.settings.camera import CameraURI
+from app.settings.camera import (
+    DEFAULT_MAX_IMAGE_AGE,
+    DEFAULT_MOTION_THRESHOLD,
+    DEFAULT_REFRESH_INTERVAL,
+    CameraURI,
+    CaptureMode,
+    EncodingProfile,
+)
 from app.settings.config import Config
 
+T = TypeVar("T")
+
+SNAPSHOT_WORKERS = 4
+
+# Grabbing, encoding and camera reconnects are blocking,
+# so they are done here instead of the event loop
+_snapshot_executor = ThreadPoolExecutor(
+    max_workers=SNAPSHOT_WORKERS, thread_name_prefix="snapshot"
+)
+
+
+class CameraWarmingUpError(Exception):
+    """Camera is connecting and has no frames yet"""
+
+
+@dataclass
+class Snapshot:
+    """
+    Encoded camera frame.
+    After first upload keeps telegram file_id, so the same snapshot
+    can be sent again without uploading bytes
+    """
+
+    generation: int
+    data: bytes
+    timestamp: float = 0
+    file_id: Optional[str] = None
+
 
 class CameraStream:
     def __init__(
-        self, camera_uri: CameraURI, name: str, description: str, tags: list[str]
+        self,
+        camera_uri: CameraURI,
+        name: str,
+        description: str,
+        tags: list[str],
+        capture_mode: CaptureMode = CaptureMode.READ,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        process_group: Optional[str] = None,
+        lazy: bool = False,
+        encoding: EncodingProfile = EncodingProfile(),
+        motion_threshold: float = DEFAULT_MOTION_THRESHOLD,
+        max_image_age: float = DEFAULT_MAX_IMAGE_AGE,
+        queue_regions: Optional[list[list[tuple[float, float]]]] = None,
+        queue_background: Optional[str] = None,
+        frame_source: Optional[FrameSource] = None,
     ) -> None:
         self.name = name
         self.description = description
         self.tags = tags
         self.camera_uri = camera_uri
-        self.cam = self._activate_camera()
+        self.capture_mode = capture_mode
+        self.refresh_interval = refresh_interval
+        self.process_group = process_group
+        self.encoding = encoding
+        self.motion_threshold = motion_threshold
+        self.max_image_age = max_image_age
+        self.queue_regions = queue_regions or []
+        self.queue_background = queue_background
+        # Replaces camera url, frames are captured in this process
+        self.frame_source = frame_source
+        # Lazy camera is connected on first use
+        self.cam: VideoCaptureThreaded | ProcessVideoCapture | None = None
+        if not lazy:
+            self.cam = self._activate_camera()
         self.last_photo_time = 0
         self.image = None
+        self.image_time = 0.0
+        self.image_generation = 0
+        self.image_thumbnail: Optional[np.ndarray] = None
+        self.snapshot: Snapshot | None = None
+        self.lock = threading.RLock()
+        # Concurrent async requests share one snapshot refresh
+        self.snapshot_flight: SingleFlight[Snapshot] = SingleFlight()
 
     def _activate_camera(self):
-        cam = VideoCaptureThreaded(self.camera_uri.url)
+        cam: VideoCaptureThreaded | ProcessVideoCapture
+        if self.process_group is not None and self.frame_source is None:
+            cam = ProcessVideoCapture(
+                self.camera_uri.url,
+                name=self.name,
+                group=self.process_group,
+                capture_mode=self.capture_mode,
+                refresh_interval=self.refresh_interval,
+            )
+            cam.start()
+            return cam
+
+        cam = VideoCaptureThreaded(
+            self.frame_source or self.camera_uri.url,
+            capture_mode=self.capture_mode,
+            refresh_interval=self.refresh_interval,
+        )
         cam.start()
         return cam
 
-    def get_last_frame(self) -> tuple[bool, np.ndarray | None]:
-        ret, frame = self.cam.read()
+    def stop(self):
+        if self.cam is not None and self.cam.started:
+            self.cam.stop()
+
+    @property
+    def state(self) -> CameraState:
+        if self.cam is None:
+            return CameraState.CONNECTING
+        return self.cam.state
+
+    @property
+    def is_warming_up(self) -> bool:
+        return self.cam is None or self.cam.is_warming_up
+
+    def get_last_frame(self) -> Optional[Frame]:
+        if self.cam is None:
+            self.cam = self._activate_camera()
+        frame = self.cam.read_frame()
         self.last_photo_time = time.time()
-        return ret, frame
+        return frame
 
     def update_image(self):
-        grabbed, image = self.get_last_frame()
-        if grabbed:
-            self.image = image
+        """
+        Replaces image only if scene has changed or image is too old,
+        so snapshot and its file_id are reused while nothing happens
+        """
+        frame = self.get_last_frame()
+        if frame is None or frame.timestamp == self.image_time:
+            return
+        thumbnail = make_thumbnail(frame.image)
+        if self.image is not None and not self._is_scene_changed(
+            thumbnail, frame.timestamp
+        ):
+            return
+        self.image = frame.image
+        self.image_time = frame.timestamp
+        self.image_thumbnail = thumbnail
+        self.image_generation += 1
 
+    def _is_scene_changed(self, thumbnail: np.ndarray, timestamp: float) -> bool:
+        if (
+            self.image_thumbnail is None
+            or timestamp - self.image_time > self.max_image_age
+        ):
+            return True
+        return frame_difference(thumbnail, self.image_thumbnail) > self.motion_threshold
 
-def __convert_frame_to_str_image(frame: np.ndarray) -> np.ndarray:
-    ret, image = cv2.imencode(".jpg", frame)
-    if not ret:
-        raise Exception("Can't convert image")
-    return image
 
+def refresh_image(
+    camera: CameraStream, config: Config, force: bool = False
+) -> np.ndarray:
+    """Updates camera image if it's outdated or force is set and returns it"""
+    with camera.lock:
+        if force or camera.image is None or __is_need_to_update_photo(camera, config):
+            camera.update_image()
+        if camera.image is None and camera.is_warming_up:
+            raise CameraWarmingUpError(f"Camera {camera.name} is warming up")
+        if camera.image is None:
+            raise ValueError("Image from camera is None")
+        return camera.image
 
-def get_image(camera: CameraStream, config: Config):
-    if camera.image is None or __is_need_to_update_photo(camera, config):
-        camera.update_image()
-    if camera.image is None:
-        raise ValueError("Image from camera is None")
-    image = BytesIO(__convert_frame_to_str_image(camera.image).tobytes())
-    image.seek(0)
-    return image.read()
+
+def get_snapshot(camera: CameraStream, config: Config, force: bool = False) -> Snapshot:
+    """
+    Returns snapshot of the last camera frame.
+    Frame is encoded once per image generation, all callers share the same snapshot
+    """
+    with camera.lock:
+        image = refresh_image(camera, config, force)
+        if (
+            camera.snapshot is None
+            or camera.snapshot.generation != camera.image_generation
+        ):
+            camera.snapshot = Snapshot(
+                generation=camera.image_generation,
+                data=encode_frame(image, camera.encoding),
+                timestamp=camera.image_time,
+            )
+        return camera.snapshot
+
+
+async def run_in_snapshot_executor(
+    func: Callable[..., T], *args: Any, timeout: float
+) -> T:
+    """Runs blocking camera work in snapshot thread pool"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(_snapshot_executor, func, *args), timeout
+    )
+
+
+async def get_snapshot_async(
+    camera: CameraStream,
+    config: Config,
+    timeout: Optional[float] = None,
+    force: bool = False,
+) -> Snapshot:
+    """
+    Same as get_snapshot, but doesn't block event loop.
+    Callers which come while snapshot is being taken get the same snapshot.
+    Raises asyncio.TimeoutError if camera didn't answer in time
+    """
+    if timeout is None:
+        timeout = config.constants.snapshot_timeout
+    return await camera.snapshot_flight.run(
+        lambda: run_in_snapshot_executor(
+            get_snapshot, camera, config, force, timeout=timeout
+        )
+    )
+
+
+def get_image(camera: CameraStream, config: Config) -> bytes:
+    return get_snapshot(camera, config).data
+
+
+def get_photo_to_send(snapshot: Snapshot) -> str | types.BufferedInputFile:
+    """Returns file_id of already uploaded snapshot or its bytes to upload"""
+    if snapshot.file_id is not None:
+        return snapshot.file_id
+    return types.BufferedInputFile(file=snapshot.data, filename="file.txt")
+
+
+def create_input_media_photo(
+    snapshot: Snapshot, caption: Optional[str] = None
+) -> types.InputMediaPhoto:
+    return types.InputMediaPhoto(media=get_photo_to_send(snapshot), caption=caption)
+
+
+def get_caption(camera: CameraStream, snapshot: Snapshot) -> str:
+    """Returns camera description with warning if camera doesn't give fresh frames"""
+    if camera.state == CameraState.LIVE:
+        return camera.description
+    taken = datetime.fromtimestamp(snapshot.timestamp).strftime("%H:%M")
+    return f"{camera.description}\n⚠️ Камера недоступна, снимок сделан в {taken}"
 
 
 def get_input_media_photo_to_send(
     camera: CameraStream, config: Config
 ) -> types.InputMediaPhoto:
-    return types.InputMediaPhoto(
-        media=types.BufferedInputFile(
-            file=get_image(camera, config), filename="file.txt"
-        ),
-        caption=camera.description,
-    )
+    snapshot = get_snapshot(camera, config)
+    return create_input_media_photo(snapshot, get_caption(camera, snapshot))
+
+
+def save_file_ids(snapshots: list[Snapshot], messages: list[types.Message]) -> None:
+    """Remembers file_id of uploaded snapshots from messages returned by telegram"""
+    for snapshot, message in zip(snapshots, messages):
+        if snapshot.file_id is None and message.photo:
+            snapshot.file_id = message.photo[-1].file_id
 
 
 def __is_need_to_update_photo(camera: CameraStream, config: Config) -> bool:
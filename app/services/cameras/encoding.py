@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+
+from app.settings.camera import EncodingProfile
+
+# Quality is never lowered below this value to fit max_bytes
+MIN_JPEG_QUALITY = 30
+
+
+def resize_frame(frame: np.ndarray, profile: EncodingProfile) -> np.ndarray:
+    """Downscales frame to fit profile size, frames are never upscaled"""
+    height, width = frame.shape[:2]
+    scale = min(
+        profile.width / width if profile.width else 1,
+        profile.height / height if profile.height else 1,
+    )
+    if scale >= 1:
+        return frame
+    size = (max(round(width * scale), 1), max(round(height * scale), 1))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_jpeg(frame: np.ndarray, quality: int, progressive: bool = False) -> bytes:
+    params = [
+        cv2.IMWRITE_JPEG_QUALITY,
+        quality,
+        cv2.IMWRITE_JPEG_PROGRESSIVE,
+        int(progressive),
+    ]
+    ret, image = cv2.imencode(".jpg", frame, params)
+    if not ret:
+        raise Exception("Can't convert image")
+    return image.tobytes()
+
+
+def encode_frame(frame: np.ndarray, profile: EncodingProfile) -> bytes:
+    frame = resize_frame(frame, profile)
+    data = encode_jpeg(frame, profile.quality, profile.progressive)
+    if profile.max_bytes is None or len(data) <= profile.max_bytes:
+        return data
+
+    # Binary search of the best quality which fits max_bytes
+    low, high = MIN_JPEG_QUALITY, profile.quality - 1
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        encoded = encode_jpeg(frame, quality, profile.progressive)
+        if len(encoded) <= profile.max_bytes:
+            best = encoded
+            low = quality + 1
+        else:
+            high = quality - 1
+
+    if best is None:
+        return encode_jpeg(frame, MIN_JPEG_QUALITY, profile.progressive)
+    return best
@@ -0,0 +1,170 @@
+from abc import ABC, abstractmethod
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class FrameSource(ABC):
+    """
+    Source of frames for capture thread.
+    Follows cv2.VideoCapture interface: frame is grabbed and then decoded by retrieve,
+    source can be opened again after release.
+    Frame is decoded into image if it's given and has suitable shape,
+    otherwise new array is returned
+    """
+
+    @abstractmethod
+    def open(self) -> bool:
+        ...
+
+    @abstractmethod
+    def grab(self) -> bool:
+        ...
+
+    @abstractmethod
+    def retrieve(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        ...
+
+    @abstractmethod
+    def release(self) -> None:
+        ...
+
+    def read(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+
+class RTSPSource(FrameSource):
+    """Network camera or any other source supported by cv2.VideoCapture"""
+
+    def __init__(self, url: str, width: int = 640, height: int = 480) -> None:
+        self.url = url
+        self.width = width
+        self.height = height
+        self.cap: Optional[cv2.VideoCapture] = None
+
+    def __str__(self) -> str:
+        return self.url
+
+    def open(self) -> bool:
+        self.release()
+        self.cap = cv2.VideoCapture(self.url)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        return self.cap.isOpened()
+
+    def grab(self) -> bool:
+        return self.cap is not None and self.cap.grab()
+
+    def retrieve(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        if self.cap is None:
+            return False, None
+        return self.cap.retrieve(image)
+
+    def read(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        if self.cap is None:
+            return False, None
+        return self.cap.read(image)
+
+    def release(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(RTSPSource):
+    """Local video file, restarted from the beginning when it ends if loop is set"""
+
+    def __init__(self, path: str, loop: bool = True) -> None:
+        super().__init__(path)
+        self.loop = loop
+
+    def open(self) -> bool:
+        self.release()
+        self.cap = cv2.VideoCapture(self.url)
+        return self.cap.isOpened()
+
+    def grab(self) -> bool:
+        if super().grab():
+            return True
+        if not self.loop or self.cap is None:
+            return False
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def read(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        return FrameSource.read(self, image)
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generates frames with a square moving over gradient background.
+    With fps set grab waits for the next frame like a live camera,
+    otherwise frames are generated as fast as possible
+    """
+
+    def __init__(
+        self, width: int = 1920, height: int = 1080, fps: Optional[float] = 25
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_index = 0
+        self.opened = False
+        self._next_frame_time = 0.0
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self._background = np.repeat(
+            np.tile(gradient, (height, 1))[:, :, np.newaxis], 3, axis=2
+        )
+
+    def __str__(self) -> str:
+        return f"synthetic://{self.width}x{self.height}"
+
+    def open(self) -> bool:
+        self.opened = True
+        self._next_frame_time = time.monotonic()
+        return True
+
+    def grab(self) -> bool:
+        if not self.opened:
+            return False
+        if self.fps:
+            delay = self._next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_time = max(self._next_frame_time, time.monotonic())
+            self._next_frame_time += 1 / self.fps
+        self.frame_index += 1
+        return True
+
+    def retrieve(
+        self, image: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        if not self.opened:
+            return False, None
+        if image is not None and image.shape == self._background.shape:
+            frame = image
+            np.copyto(frame, self._background)
+        else:
+            frame = self._background.copy()
+        size = max(self.height // 8, 1)
+        x = self.frame_index * 7 % max(self.width - size, 1)
+        y = (self.height - size) // 2
+        frame[y : y + size, x : x + size] = (0, 255, 0)
+        return True, frame
+
+    def release(self) -> None:
+        self.opened = False
@@ -0,0 +1,165 @@
+import math
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.services.cameras.camera_stream import (
+    CameraStream,
+    CameraWarmingUpError,
+    Snapshot,
+    refresh_image,
+    run_in_snapshot_executor,
+)
+from app.services.cameras.encoding import encode_frame
+from app.services.cameras.single_flight import SingleFlight
+from app.services.cameras.video_capture import CameraState
+from app.settings.camera import EncodingProfile
+from app.settings.config import Config
+
+DEFAULT_TILE_WIDTH = 640
+DEFAULT_TILE_HEIGHT = 360
+
+CAPTION_FONT = cv2.FONT_HERSHEY_SIMPLEX
+CAPTION_SCALE = 0.8
+CAPTION_THICKNESS = 2
+CAPTION_PADDING = 8
+
+
+def build_mosaic(
+    images: list[np.ndarray],
+    captions: list[str],
+    tile_width: int = DEFAULT_TILE_WIDTH,
+    tile_height: int = DEFAULT_TILE_HEIGHT,
+) -> np.ndarray:
+    """
+    Combines images into one grid image, every tile is signed with caption.
+    Images keep their aspect ratio and are letterboxed with black bars
+    """
+    if not images:
+        raise ValueError("No images for mosaic")
+
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    tiles = np.zeros((rows * columns, tile_height, tile_width, 3), dtype=np.uint8)
+    for tile, image, caption in zip(tiles, images, captions):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        fit_into_tile(tile, image)
+        draw_caption(tile, caption)
+
+    return (
+        tiles.reshape(rows, columns, tile_height, tile_width, 3)
+        .transpose(0, 2, 1, 3, 4)
+        .reshape(rows * tile_height, columns * tile_width, 3)
+    )
+
+
+def fit_into_tile(tile: np.ndarray, image: np.ndarray) -> None:
+    """Resizes image to fit black tile keeping aspect ratio and centers it"""
+    tile_height, tile_width = tile.shape[:2]
+    height, width = image.shape[:2]
+    scale = min(tile_width / width, tile_height / height)
+    width = min(max(round(width * scale), 1), tile_width)
+    height = min(max(round(height * scale), 1), tile_height)
+    top = (tile_height - height) // 2
+    left = (tile_width - width) // 2
+    tile[top : top + height, left : left + width] = cv2.resize(
+        image, (width, height), interpolation=cv2.INTER_AREA
+    )
+
+
+def draw_caption(tile: np.ndarray, caption: str) -> None:
+    (width, height), baseline = cv2.getTextSize(
+        caption, CAPTION_FONT, CAPTION_SCALE, CAPTION_THICKNESS
+    )
+    bottom = height + baseline + 2 * CAPTION_PADDING
+    tile[:bottom, : width + 2 * CAPTION_PADDING] = 0
+    cv2.putText(
+        tile,
+        caption,
+        (CAPTION_PADDING, CAPTION_PADDING + height),
+        CAPTION_FONT,
+        CAPTION_SCALE,
+        (255, 255, 255),
+        CAPTION_THICKNESS,
+        cv2.LINE_AA,
+    )
+
+
+class Mosaic:
+    """
+    Tiled image of several cameras.
+    Encoded once per change of any camera image and cached like camera snapshot
+    """
+
+    def __init__(
+        self,
+        cameras: list[CameraStream],
+        tile_width: int = DEFAULT_TILE_WIDTH,
+        tile_height: int = DEFAULT_TILE_HEIGHT,
+        encoding: EncodingProfile = EncodingProfile(),
+    ) -> None:
+        self.cameras = cameras
+        self.encoding = encoding
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.snapshot: Optional[Snapshot] = None
+        self.snapshot_cameras: list[CameraStream] = []
+        self._key: Optional[tuple] = None
+        self._generation = 0
+        self.lock = threading.Lock()
+        self.snapshot_flight: SingleFlight[Snapshot] = SingleFlight()
+
+    def get_snapshot(self, config: Config) -> Snapshot:
+        with self.lock:
+            cameras, images, key, timestamp = [], [], [], math.inf
+            for camera in self.cameras:
+                with camera.lock:
+                    try:
+                        image = refresh_image(camera, config)
+                    except (CameraWarmingUpError, ValueError):
+                        continue
+                    cameras.append(camera)
+                    images.append(image)
+                    key.append((camera.name, camera.image_generation))
+                    timestamp = min(timestamp, camera.image_time)
+
+            if not images:
+                raise CameraWarmingUpError("No camera of mosaic has image")
+
+            if self.snapshot is None or self._key != tuple(key):
+                mosaic = build_mosaic(
+                    images,
+                    [f"{i}. {camera.name}" for i, camera in enumerate(cameras, 1)],
+                    self.tile_width,
+                    self.tile_height,
+                )
+                self._generation += 1
+                self._key = tuple(key)
+                self.snapshot_cameras = cameras
+                self.snapshot = Snapshot(
+                    generation=self._generation,
+                    data=encode_frame(mosaic, self.encoding),
+                    timestamp=timestamp,
+                )
+            return self.snapshot
+
+    async def get_snapshot_async(
+        self, config: Config, timeout: Optional[float] = None
+    ) -> Snapshot:
+        if timeout is None:
+            timeout = config.constants.snapshot_timeout
+        return await self.snapshot_flight.run(
+            lambda: run_in_snapshot_executor(self.get_snapshot, config, timeout=timeout)
+        )
+
+    def get_caption(self) -> str:
+        lines = []
+        for i, camera in enumerate(self.snapshot_cameras, 1):
+            line = f"{i}. {camera.description}"
+            if camera.state != CameraState.LIVE:
+                line += " ⚠️ камера недоступна"
+            lines.append(line)
+        return "\n".join(lines)
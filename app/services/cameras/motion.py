@@ -0,0 +1,17 @@
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = (32, 18)
+
+
+def make_thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Returns tiny grayscale copy of frame to compare scenes"""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return thumbnail.astype(np.int16)
+
+
+def frame_difference(first: np.ndarray, second: np.ndarray) -> float:
+    """Mean absolute difference of thumbnails, 0..255"""
+    return float(np.abs(first - second).mean())
@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.services.cameras.camera_stream import CameraStream, run_in_snapshot_executor
+from app.services.cameras.registry import CameraRegistry
+from app.services.cameras.video_capture import STALE_TIMEOUT, CameraState
+from app.settings import paths
+
+# Frames are downsampled to this width before estimation
+ESTIMATE_WIDTH = 160
+# Part of region pixels which should be foreground to count region as occupied
+REGION_OCCUPIED_RATIO = 0.3
+# Background model learns slowly, so cars waiting in queue don't become background
+DEFAULT_LEARNING_RATE = 0.002
+# Model doesn't match the scene (e.g. lighting changed) if more of frame
+# outside queue regions is foreground, estimates are not reported then
+MAX_OUTSIDE_FOREGROUND = 0.2
+
+QUEUE_ESTIMATE_INTERVAL = 5
+# Summary is not shown if it wasn't updated for this time
+SUMMARY_MAX_AGE = 4 * QUEUE_ESTIMATE_INTERVAL
+# Older frames don't show current queue, camera is left out of summary
+MAX_FRAME_AGE = STALE_TIMEOUT
+
+
+@dataclass
+class QueueEstimate:
+    """
+    cars - count of occupied queue regions, None if camera has no regions
+    occupancy - part of foreground pixels in regions or in whole frame
+    """
+
+    cars: Optional[int]
+    occupancy: float
+    timestamp: float
+
+
+class QueueEstimator:
+    """
+    Estimates queue occupancy of one camera by background subtraction.
+    Background model starts from image of empty queue, so cars which are
+    in the queue from start are counted too
+    """
+
+    def __init__(
+        self,
+        regions: list[list[tuple[float, float]]],
+        background: np.ndarray,
+        learning_rate: float = DEFAULT_LEARNING_RATE,
+    ) -> None:
+        self.regions = regions
+        self.background = background
+        self.learning_rate = learning_rate
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        self._seeded_shape: Optional[tuple[int, int]] = None
+        self._masks: Optional[np.ndarray] = None
+
+    def _downsample(self, frame: np.ndarray) -> np.ndarray:
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = frame.shape
+        size = (ESTIMATE_WIDTH, max(round(height * ESTIMATE_WIDTH / width), 1))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def _seed(self, shape: tuple[int, int]) -> None:
+        """Resets background model to empty queue image of frames size"""
+        background = self.background
+        if background.ndim == 3:
+            background = cv2.cvtColor(background, cv2.COLOR_BGR2GRAY)
+        height, width = shape
+        background = cv2.resize(
+            background, (width, height), interpolation=cv2.INTER_AREA
+        )
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        self.subtractor.apply(background, learningRate=1)
+        self._seeded_shape = shape
+
+    def _get_masks(self, shape: tuple[int, int]) -> np.ndarray:
+        if self._masks is None or self._masks.shape[1:] != shape:
+            height, width = shape
+            masks = np.zeros((len(self.regions), height, width), dtype=np.uint8)
+            for mask, region in zip(masks, self.regions):
+                points = np.array(region) * (width - 1, height - 1)
+                cv2.fillPoly(mask, [points.round().astype(np.int32)], 1)
+            self._masks = masks.astype(bool)
+        return self._masks
+
+    def estimate(self, frame: np.ndarray) -> Optional[QueueEstimate]:
+        """Returns None while background model doesn't match the scene"""
+        small = self._downsample(frame)
+        if self._seeded_shape != small.shape:
+            self._seed(small.shape)
+        foreground = self.subtractor.apply(small, learningRate=self.learning_rate) > 0
+
+        if not self.regions:
+            return QueueEstimate(None, float(foreground.mean()), time.time())
+
+        masks = self._get_masks(small.shape)
+        outside = foreground[~masks.any(axis=0)]
+        if outside.size and outside.mean() > MAX_OUTSIDE_FOREGROUND:
+            return None
+        areas = np.maximum(masks.sum(axis=(1, 2)), 1)
+        ratios = (masks & foreground).sum(axis=(1, 2)) / areas
+        cars = int((ratios > REGION_OCCUPIED_RATIO).sum())
+        occupancy = float(foreground[masks.any(axis=0)].mean())
+        return QueueEstimate(cars, occupancy, time.time())
+
+
+def load_queue_background(path: str) -> Optional[np.ndarray]:
+    """Reads empty queue image, relative path is from root of project"""
+    return cv2.imread(str(paths.ROOT_DIR / path))
+
+
+def describe_occupancy(occupancy: float) -> str:
+    if occupancy < 0.05:
+        return "очереди нет"
+    if occupancy < 0.2:
+        return "небольшая очередь"
+    return "большая очередь"
+
+
+class QueueMonitor:
+    """
+    Periodically estimates queue on cameras with queue tag.
+    Text summary is prepared in advance, so getting it is just a lookup
+    """
+
+    def __init__(self, cameras: CameraRegistry) -> None:
+        self.cameras = cameras
+        self.estimators: dict[str, QueueEstimator] = {}
+        self._estimator_keys: dict[str, tuple] = {}
+        self.estimates: dict[str, QueueEstimate] = {}
+        self.summary: Optional[str] = None
+        self.summary_time = 0.0
+
+    def _get_estimator(self, camera: CameraStream) -> Optional[QueueEstimator]:
+        """
+        Estimator of camera, None if camera has no usable empty queue image.
+        Without it model would take cars present at start for background
+        """
+        key = (camera.queue_regions, camera.queue_background)
+        if self._estimator_keys.get(camera.name) == key:
+            return self.estimators.get(camera.name)
+
+        self.estimators.pop(camera.name, None)
+        self._estimator_keys[camera.name] = key
+        if camera.queue_background is None:
+            logging.warning("Camera %s has no queue_background", camera.name)
+            return None
+        background = load_queue_background(camera.queue_background)
+        if background is None:
+            logging.error(
+                "Can't read queue_background %s of camera %s",
+                camera.queue_background,
+                camera.name,
+            )
+            return None
+        estimator = QueueEstimator(camera.queue_regions, background)
+        self.estimators[camera.name] = estimator
+        return estimator
+
+    def update(self) -> None:
+        cameras = self.cameras.by_tag("queue")
+        for camera in cameras:
+            # Lazy cameras which weren't used yet are not started for estimation
+            if camera.cam is None:
+                continue
+            frame = camera.cam.read_frame()
+            if (
+                frame is None
+                or camera.state != CameraState.LIVE
+                or frame.age > MAX_FRAME_AGE
+            ):
+                self.estimates.pop(camera.name, None)
+                continue
+            estimator = self._get_estimator(camera)
+            if estimator is None:
+                self.estimates.pop(camera.name, None)
+                continue
+            try:
+                estimate = estimator.estimate(frame.image)
+            except Exception as e:
+                logging.error("Can't estimate queue on camera %s: %r", camera.name, e)
+                estimate = None
+            if estimate is None:
+                self.estimates.pop(camera.name, None)
+            else:
+                self.estimates[camera.name] = estimate
+
+        lines = [
+            f"{camera.description}: {format_estimate(self.estimates[camera.name])}"
+            for camera in cameras
+            if camera.name in self.estimates
+        ]
+        if lines:
+            updated = datetime.now().strftime("%H:%M:%S")
+            self.summary = "\n".join(
+                ["Очередь сейчас:", *lines, "", f"Обновлено в {updated}"]
+            )
+            self.summary_time = time.time()
+        else:
+            # Without fresh cameras users get photos
+            self.summary = None
+
+    async def update_async(self) -> None:
+        await run_in_snapshot_executor(self.update, timeout=QUEUE_ESTIMATE_INTERVAL * 2)
+
+    def get_summary(self) -> Optional[str]:
+        """Returns prepared summary or None if it's outdated"""
+        if time.time() - self.summary_time > SUMMARY_MAX_AGE:
+            return None
+        return self.summary
+
+
+def format_estimate(estimate: QueueEstimate) -> str:
+    if estimate.cars is None:
+        return describe_occupancy(estimate.occupancy)
+    if estimate.cars == 0:
+        return "очереди нет"
+    return f"машин в очереди: {estimate.cars}"
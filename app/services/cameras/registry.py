@@ -0,0 +1,133 @@
+from dataclasses import replace
+import logging
+import threading
+from typing import Iterator, Optional
+
+from app.services.cameras.camera_stream import CameraStream
+from app.services.cameras.mosaic import Mosaic
+from app.settings.camera import CameraConfig
+
+
+def create_camera_stream(camera_config: CameraConfig) -> CameraStream:
+    return CameraStream(
+        camera_uri=camera_config.camera_uri,
+        name=camera_config.name,
+        description=camera_config.description,
+        tags=camera_config.tags,
+        capture_mode=camera_config.capture_mode,
+        refresh_interval=camera_config.refresh_interval,
+        process_group=camera_config.process_group,
+        lazy=camera_config.lazy,
+        encoding=camera_config.encoding,
+        motion_threshold=camera_config.motion_threshold,
+        max_image_age=camera_config.max_image_age,
+        queue_regions=camera_config.queue_regions,
+        queue_background=camera_config.queue_background,
+    )
+
+
+def is_capture_changed(old_config: CameraConfig, config: CameraConfig) -> bool:
+    """Description and tags are not used by capture, stream is kept when they change"""
+    return replace(old_config, description=config.description, tags=config.tags) != (
+        config
+    )
+
+
+class CameraRegistry:
+    """
+    Keeps camera streams by name with index by tag.
+    Cameras can be changed at runtime, streams of unchanged cameras are kept
+    """
+
+    def __init__(self, cameras_configs: Optional[list[CameraConfig]] = None) -> None:
+        self._cameras: dict[str, CameraStream] = {}
+        self._configs: dict[str, CameraConfig] = {}
+        self._tags: dict[str, list[CameraStream]] = {}
+        self._mosaics: dict[str, Mosaic] = {}
+        self._lock = threading.Lock()
+        if cameras_configs:
+            self.update(cameras_configs)
+
+    def __iter__(self) -> Iterator[CameraStream]:
+        return iter(list(self._cameras.values()))
+
+    def __len__(self) -> int:
+        return len(self._cameras)
+
+    def get(self, name: str) -> Optional[CameraStream]:
+        return self._cameras.get(name)
+
+    def by_tag(self, tag: str) -> list[CameraStream]:
+        return self._tags.get(tag, [])
+
+    def mosaic(self, tag: str) -> Mosaic:
+        """
+        Returns mosaic of cameras with tag, it follows changes of cameras.
+        Doesn't wait for updates, so it can be called from event loop
+        """
+        mosaic = self._mosaics.get(tag)
+        if mosaic is None:
+            mosaic = Mosaic(self.by_tag(tag))
+            self._mosaics = {**self._mosaics, tag: mosaic}
+            # Update could miss the new mosaic, its cameras are taken again
+            mosaic.cameras = self.by_tag(tag)
+        return mosaic
+
+    def update(self, cameras_configs: list[CameraConfig]) -> None:
+        """
+        Applies new cameras configuration.
+        Added cameras are started, removed are stopped, changed are restarted.
+        Description and tags are changed without restart.
+        Cameras are replaced at once, old ones are stopped after that
+        """
+        new_configs = {config.name: config for config in cameras_configs}
+        stopped: list[CameraStream] = []
+        with self._lock:
+            cameras = dict(self._cameras)
+            for name in self._configs.keys() - new_configs.keys():
+                logging.info("Camera %s removed", name)
+                stopped.append(cameras.pop(name))
+                del self._configs[name]
+
+            for name, config in new_configs.items():
+                old_config = self._configs.get(name)
+                if old_config == config:
+                    continue
+                if old_config is not None and not is_capture_changed(
+                    old_config, config
+                ):
+                    logging.info("Camera %s description changed", name)
+                    camera = cameras[name]
+                    camera.description = config.description
+                    camera.tags = config.tags
+                    self._configs[name] = config
+                    continue
+                if old_config is not None:
+                    logging.info("Camera %s changed", name)
+                    stopped.append(cameras.pop(name))
+                else:
+                    logging.info("Camera %s added", name)
+                cameras[name] = create_camera_stream(config)
+                self._configs[name] = config
+
+            self._cameras = cameras
+            self._build_tags_index()
+
+        # Stopping waits for capture threads, hung cameras don't hold the lock
+        for camera in stopped:
+            camera.stop()
+
+    def _build_tags_index(self) -> None:
+        tags: dict[str, list[CameraStream]] = {}
+        for camera in self._cameras.values():
+            for tag in camera.tags:
+                tags.setdefault(tag, []).append(camera)
+        self._tags = tags
+        for tag, mosaic in self._mosaics.items():
+            mosaic.cameras = self.by_tag(tag)
+
+    def stop(self) -> None:
+        with self._lock:
+            cameras = list(self._cameras.values())
+        for camera in cameras:
+            camera.stop()
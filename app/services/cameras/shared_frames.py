@@ -0,0 +1,148 @@
+import logging
+from multiprocessing import shared_memory
+from typing import Optional
+import numpy as np
+
+DEFAULT_SLOTS = 4
+DEFAULT_MAX_FRAME_SIZE = 1920 * 1080 * 3
+READ_RETRIES = 3
+
+# Header layout (int64): [generation, requests, state, *slots], every slot is
+# [generation, timestamp in microseconds, height, width, channels]
+_GENERATION = 0
+_REQUESTS = 1
+_STATE = 2
+_SLOTS_OFFSET = 3
+_SLOT_FIELDS = 5
+
+
+class SharedFrameRing:
+    """
+    Ring buffer of frames in shared memory with generation counter.
+    Single writer (camera process), many readers (bot process).
+
+    Readers get read-only views without copying. A view stays valid until writer
+    wraps around the ring, that is for at least (slots - 1) writes,
+    frames kept longer must be got by read_copy
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        slots: int = DEFAULT_SLOTS,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+        create: bool = True,
+    ) -> None:
+        self.slots = slots
+        self.max_frame_size = max_frame_size
+        header_size = (_SLOTS_OFFSET + slots * _SLOT_FIELDS) * 8
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=header_size + slots * max_frame_size
+        )
+        self.name = self.shm.name
+        self._header = np.ndarray(
+            (_SLOTS_OFFSET + slots * _SLOT_FIELDS,), dtype=np.int64, buffer=self.shm.buf
+        )
+        self._frames_offset = header_size
+        if create:
+            self._header[:] = 0
+
+    @property
+    def generation(self) -> int:
+        return int(self._header[_GENERATION])
+
+    @property
+    def timestamp(self) -> float:
+        """Time of the latest frame, 0 if there are no frames"""
+        generation = self.generation
+        if generation == 0:
+            return 0
+        return int(self._slot_header(generation % self.slots)[1]) / 1e6
+
+    @property
+    def requests(self) -> int:
+        return int(self._header[_REQUESTS])
+
+    @property
+    def state(self) -> int:
+        """Writer defined state code of the frames source"""
+        return int(self._header[_STATE])
+
+    @state.setter
+    def state(self, value: int) -> None:
+        self._header[_STATE] = value
+
+    def request_frame(self) -> None:
+        """Asks writer to publish new frame as soon as possible"""
+        self._header[_REQUESTS] += 1
+
+    def _slot_header(self, slot: int) -> np.ndarray:
+        start = _SLOTS_OFFSET + slot * _SLOT_FIELDS
+        return self._header[start : start + _SLOT_FIELDS]
+
+    def _slot_view(self, slot: int, shape: tuple[int, ...]) -> np.ndarray:
+        return np.ndarray(
+            shape,
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=self._frames_offset + slot * self.max_frame_size,
+        )
+
+    def write(self, frame: np.ndarray, timestamp: float) -> int:
+        if frame.dtype != np.uint8 or frame.nbytes > self.max_frame_size:
+            raise ValueError(
+                f"Frame {frame.shape} {frame.dtype} doesn't fit into shared memory slot"
+            )
+        generation = self.generation + 1
+        slot = generation % self.slots
+        shape = frame.shape if frame.ndim == 3 else (*frame.shape, 1)
+
+        np.copyto(self._slot_view(slot, frame.shape), frame)
+        self._slot_header(slot)[:] = (generation, int(timestamp * 1e6), *shape)
+        self._header[_GENERATION] = generation
+        return generation
+
+    def read(self) -> tuple[int, float, Optional[np.ndarray]]:
+        """Returns generation, timestamp and read-only view of the latest frame"""
+        generation = self.generation
+        if generation == 0:
+            return 0, 0, None
+
+        slot = generation % self.slots
+        slot_generation, timestamp, height, width, channels = self._slot_header(slot)
+        if slot_generation != generation:
+            return 0, 0, None
+
+        frame = self._slot_view(slot, (int(height), int(width), int(channels)))
+        frame.flags.writeable = False
+        return generation, timestamp / 1e6, frame
+
+    def is_valid(self, generation: int) -> bool:
+        """Checks that view of frame with such generation wasn't overwritten yet"""
+        return self.generation - generation < self.slots - 1
+
+    def read_copy(
+        self, retries: int = READ_RETRIES
+    ) -> tuple[int, float, Optional[np.ndarray]]:
+        """
+        Returns generation, timestamp and copy of the latest frame.
+        Copy is retried if writer overwrote slot while it was copied
+        """
+        for _ in range(retries):
+            generation, timestamp, frame = self.read()
+            if frame is None:
+                return 0, 0, None
+            copy = frame.copy()
+            if self.is_valid(generation):
+                return generation, timestamp, copy
+        return 0, 0, None
+
+    def close(self) -> None:
+        self._header = None  # pyright: ignore
+        try:
+            self.shm.close()
+        except BufferError:
+            logging.warning("Shared frames %s are still used by readers", self.name)
+
+    def unlink(self) -> None:
+        self.shm.unlink()
@@ -0,0 +1,26 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs only one call at a time, concurrent callers await the same future.
+    Cancellation of one caller doesn't cancel the call for others
+    """
+
+    def __init__(self) -> None:
+        self._future: Optional[asyncio.Future[T]] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> T:
+        if (
+            not self.in_flight
+            or self._future.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._future = asyncio.ensure_future(func())
+        return await asyncio.shield(self._future)
@@ -1,51 +1,287 @@
+from dataclasses import dataclass
+from enum import StrEnum
 import threading
-import cv2
+import time
+from typing import Optional
 import logging
+import weakref
+
+import numpy as np
+
+from app.services.cameras.frame_source import FrameSource, RTSPSource
+from app.settings.camera import DEFAULT_REFRESH_INTERVAL, CaptureMode
+
+# How long reader waits for requested frame to be decoded in GRAB mode
+RETRIEVE_TIMEOUT = 1
+
+# Camera is stale if nothing was grabbed for this time
+STALE_TIMEOUT = 10
+# Camera is reconnected after so many failed grabs in a row
+MAX_FAILED_GRABS = 25
+# Camera is reconnected if frames don't change for this time
+FROZEN_TIMEOUT = 30
+# Frames with lower mean brightness are considered black
+BLACK_FRAME_THRESHOLD = 8
+# Step of pixels used to calculate frame statistics
+FRAME_STATS_STEP = 16
+
+INITIAL_BACKOFF = 1
+MAX_BACKOFF = 60
+
+# Frames are decoded into ring of preallocated buffers
+FRAME_BUFFERS = 3
+
+
+class CameraState(StrEnum):
+    CONNECTING = "connecting"
+    LIVE = "live"
+    STALE = "stale"
+    DOWN = "down"
+
+
+@dataclass
+class Frame:
+    """Decoded frame with time of capturing"""
+
+    image: np.ndarray
+    timestamp: float
+    generation: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
 
 
 class VideoCaptureThreaded:
-    def __init__(self, src: str, width=640, height=480):
-        self.src = src
-        self.cap = cv2.VideoCapture(self.src)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.grabbed, self.frame = self.cap.read()
+    """
+    Captures camera in background thread and supervises connection.
+    Lost connection is restored by capture thread with exponential backoff,
+    readers always immediately get last good frame.
+    src is camera url or any FrameSource
+    """
+
+    def __init__(
+        self,
+        src: str | FrameSource,
+        width=640,
+        height=480,
+        capture_mode: CaptureMode = CaptureMode.READ,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        if isinstance(src, FrameSource):
+            self.source = src
+        else:
+            self.source = RTSPSource(src, width, height)
+        self.src = str(self.source)
+        self.width = width
+        self.height = height
+        self.capture_mode = capture_mode
+        self.refresh_interval = refresh_interval
+        self._state = CameraState.CONNECTING
+        # Camera is opened by capture thread, so creating it never blocks
+        self.grabbed = False
+        self.frame: Optional[np.ndarray] = None
+        self.frame_time = 0.0
+        self.frame_generation = 0
+        self._buffers: list[Optional[np.ndarray]] = [None] * FRAME_BUFFERS
+        # Leases of buffers given to readers, buffer is free when its lease is dead
+        self._leases: list[Optional[weakref.ref]] = [None] * FRAME_BUFFERS
+        self._buffer_index = 0
+        self.grab_time = time.time()
+        self.failed_grabs = 0
+        self.backoff = INITIAL_BACKOFF
+        self._thumbnail: Optional[np.ndarray] = None
+        self._thumbnail_time = self.grab_time
+        self._frozen = False
+        self._black = False
+        self.frames_count = 0
+        self.retrieves_count = 0
         self.started = False
+        self._stopped = threading.Event()
         self.read_lock = threading.Lock()
-
-    def set(self, var1, var2):
-        self.cap.set(var1, var2)
+        self.frame_retrieved = threading.Condition(self.read_lock)
+        self.retrieve_requested = threading.Event()
 
     def start(self):
         if self.started:
             print("[!] Threaded video capturing has already been started.")
             return None
         self.started = True
+        self._stopped.clear()
         self.thread = threading.Thread(target=self.update, args=())
         self.thread.start()
         return self
 
+    @property
+    def is_warming_up(self) -> bool:
+        """Camera is connecting for the first time and has no frames yet"""
+        return self.frame is None and self._state == CameraState.CONNECTING
+
+    @property
+    def state(self) -> CameraState:
+        if self._state == CameraState.LIVE and (
+            time.time() - self.grab_time > STALE_TIMEOUT
+            or self._is_frozen_too_long()
+            or self._black
+        ):
+            return CameraState.STALE
+        return self._state
+
     def update(self):
+        self._connect()
         while self.started:
-            grabbed, frame = self.cap.read()
-            with self.read_lock:
-                self.grabbed = grabbed
+            if self._state == CameraState.DOWN:
+                self._reconnect()
+                continue
+
+            if self.capture_mode == CaptureMode.GRAB:
+                grabbed = self._grab()
+            else:
+                grabbed = self._read()
+
+            if grabbed:
+                self.failed_grabs = 0
+                self.grab_time = time.time()
+                self._state = CameraState.LIVE
+                self.backoff = INITIAL_BACKOFF
+            else:
+                self.failed_grabs += 1
+
+            if self.failed_grabs >= MAX_FAILED_GRABS or self._is_frozen_too_long():
+                logging.error("Camera %s is lost, reconnecting", self.src)
+                self._state = CameraState.DOWN
+
+    def _read(self) -> bool:
+        grabbed, frame = self.source.read(self._get_free_buffer())
+        self.frames_count += 1
+        if grabbed:
+            self._set_frame(self._store_buffer(frame))
+        return grabbed
+
+    def _grab(self) -> bool:
+        grabbed = self.source.grab()
+        self.frames_count += 1
+        if not grabbed or not self._is_need_to_retrieve():
+            return grabbed
+
+        retrieved, frame = self.source.retrieve(self._get_free_buffer())
+        self.retrieve_requested.clear()
+        if retrieved:
+            self._set_frame(self._store_buffer(frame))
+        return retrieved
+
+    def _get_free_buffer(self) -> Optional[np.ndarray]:
+        """
+        Returns buffer to decode next frame into.
+        Buffer is reused only if readers don't hold frames of it anymore,
+        None means source allocates new array
+        """
+        for _ in range(FRAME_BUFFERS):
+            self._buffer_index = (self._buffer_index + 1) % FRAME_BUFFERS
+            lease = self._leases[self._buffer_index]
+            if lease is None or lease() is None:
+                return self._buffers[self._buffer_index]
+        return None
+
+    def _store_buffer(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Keeps decoded array in ring and returns read-only lease of it.
+        Lease is array over memoryview of buffer, so views derived from lease
+        keep lease itself alive, not buffer, and buffer isn't reused while any exists
+        """
+        frame = np.ascontiguousarray(frame)
+        self._buffers[self._buffer_index] = frame
+        lease = np.asarray(memoryview(frame))
+        lease.flags.writeable = False
+        self._leases[self._buffer_index] = weakref.ref(lease)
+        return lease
+
+    def _set_frame(self, frame: np.ndarray):
+        self._update_frame_stats(frame)
+        with self.frame_retrieved:
+            if not self._black:
+                self.grabbed = True
                 self.frame = frame
+                self.frame_time = time.time()
+                self.frame_generation += 1
+            self.retrieves_count += 1
+            self.frame_retrieved.notify_all()
+
+    def _update_frame_stats(self, frame: np.ndarray):
+        thumbnail = frame[::FRAME_STATS_STEP, ::FRAME_STATS_STEP]
+        self._black = float(thumbnail.mean()) < BLACK_FRAME_THRESHOLD
+        self._frozen = self._thumbnail is not None and np.array_equal(
+            thumbnail, self._thumbnail
+        )
+        if not self._frozen:
+            self._thumbnail = thumbnail.copy()
+            self._thumbnail_time = time.time()
+
+    def _is_frozen_too_long(self) -> bool:
+        return self._frozen and time.time() - self._thumbnail_time > FROZEN_TIMEOUT
+
+    def _connect(self):
+        self._state = CameraState.CONNECTING
+        opened = self.source.open()
+        self.failed_grabs = 0
+        self._frozen = False
+        self._thumbnail = None
+        if not opened:
+            logging.error("Can't connect to camera %s", self.src)
+            self._state = CameraState.DOWN
+            return
+        logging.info("Camera %s connected", self.src)
+
+    def _reconnect(self):
+        if self._stopped.wait(self.backoff):
+            return
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+        self._connect()
+
+    def _is_need_to_retrieve(self) -> bool:
+        return (
+            self.retrieve_requested.is_set()
+            or time.time() - self.frame_time > self.refresh_interval
+        )
+
+    def _wait_retrieved_frame(self):
+        with self.frame_retrieved:
+            retrieves_count = self.retrieves_count
+            self.retrieve_requested.set()
+            self.frame_retrieved.wait_for(
+                lambda: self.retrieves_count > retrieves_count, RETRIEVE_TIMEOUT
+            )
+
+    def read_frame(self) -> Optional[Frame]:
+        """
+        Returns last good frame, never waits for reconnection.
+        Frame is read-only view of ring buffer, capture thread doesn't reuse buffer
+        while any view of it exists, so it's returned without copying
+        """
+        if (
+            self.capture_mode == CaptureMode.GRAB
+            and self.started
+            and self.state == CameraState.LIVE
+        ):
+            self._wait_retrieved_frame()
 
-    def read(self):
         with self.read_lock:
             if self.frame is None:
-                self.cap.release()
-                self.cap = cv2.VideoCapture(self.src)
-                logging.error("Camera reloaded")
-                return False, None
-            frame = self.frame.copy()
-            grabbed = self.grabbed
-        return grabbed, frame
+                return None
+            return Frame(self.frame, self.frame_time, self.frame_generation)
+
+    def read(self):
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image.copy()
 
     def stop(self):
         self.started = False
+        self._stopped.set()
         self.thread.join()
+        self.source.release()
 
     def __exit__(self, exec_type, exc_value, traceback):
-        self.cap.release()
+        self.source.release()
+
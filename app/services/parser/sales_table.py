@@ -0,0 +1,118 @@
+import hashlib
+import io
+import re
+from typing import Iterable, Iterator, Optional
+
+from lxml import etree
+import pandas as pd
+
+ID = "Id"
+DATE = "Дата"
+LAUNCH_TYPE = "Тип запуска  БУМ"
+STATE = "Состояние  БУМ"
+START_DATE = "Дата запуска  БУМ"
+END_DATE = "Дата завершения  БУМ"
+MODE = "Режим  БУМ"
+CLIENT = "Клиент"
+BONUSES = "Бонусы  Бонусы"
+PROMOCODE = "Промокод  Промокоды"
+PRICE = "Сумма"
+
+# Columns used to create washings
+WASHING_COLUMNS = (
+    ID,
+    DATE,
+    LAUNCH_TYPE,
+    STATE,
+    START_DATE,
+    END_DATE,
+    MODE,
+    CLIENT,
+    BONUSES,
+    PROMOCODE,
+    PRICE,
+)
+
+# Same whitespace normalization as pandas.read_html, so column names are the same
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+# Thousands separator of numbers, the default of pandas.read_html
+THOUSANDS = ","
+
+
+def _get_text(element: etree._Element) -> str:
+    if len(element) == 0:
+        text = element.text or ""
+    else:
+        text = "".join(element.itertext())
+    return _RE_WHITESPACE.sub(" ", text).strip()
+
+
+def _get_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value.replace(THOUSANDS, "")) if value is not None else None
+    except ValueError:
+        return None
+
+
+def to_numbers(column: pd.Series, errors: str = "raise") -> pd.Series:
+    """Numbers of column of cells text, thousands separators are removed"""
+    text = column.astype("string").str.replace(THOUSANDS, "", regex=False)
+    return pd.to_numeric(text, errors=errors)  # pyright: ignore
+
+
+def iter_sales_rows(
+    page: str | bytes,
+    columns: Iterable[str] = WASHING_COLUMNS,
+    stop_at: Optional[int] = None,
+) -> Iterator[dict[str, Optional[str]]]:
+    """
+    Streams rows of the first table of table sales page as dicts of given columns.
+    Empty cells are None, parsed rows are freed, so memory doesn't grow with table.
+    If stop_at is given and sales go in descending Id order, parsing stops
+    at the first row with Id not greater than stop_at
+    """
+    if isinstance(page, str):
+        page = page.encode()
+
+    indexes: Optional[dict[str, int]] = None
+    previous_id: Optional[int] = None
+    for _, element in etree.iterparse(
+        io.BytesIO(page), events=("end",), tag=("tr", "table"), html=True
+    ):
+        if element.tag == "table":
+            return
+
+        cells = [cell for cell in element if cell.tag in ("td", "th")]
+        if indexes is None:
+            header = [_get_text(cell) for cell in cells]
+            indexes = {
+                column: header.index(column) for column in columns if column in header
+            }
+        elif cells:
+            row = {
+                column: (_get_text(cells[index]) or None)
+                if index < len(cells)
+                else None
+                for column, index in indexes.items()
+            }
+            if stop_at is not None:
+                id = _get_id(row.get(ID))
+                if (
+                    id is not None
+                    and id <= stop_at
+                    and previous_id is not None
+                    and previous_id > id
+                ):
+                    return
+                previous_id = id
+            yield row
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def get_rows_digest(df: pd.DataFrame) -> bytes:
+    """Digest of table rows values, doesn't depend on index"""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).digest()
@@ -0,0 +1,64 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.services.parser.sales_table import (
+    BONUSES,
+    CLIENT,
+    DATE,
+    END_DATE,
+    ID,
+    MODE,
+    PRICE,
+    PROMOCODE,
+    START_DATE,
+    STATE,
+    to_numbers,
+)
+
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def _to_list(column: pd.Series) -> list[Any]:
+    """Python values of column, missing values are None"""
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+def _to_dates(column: pd.Series) -> list[Any]:
+    """Dates of column, "Не определено" and empty cells are None"""
+    dates = pd.to_datetime(column, format=DATE_FORMAT, errors="coerce")
+    values = dates.array.to_pydatetime()
+    values[dates.isna().to_numpy()] = None
+    return values.tolist()
+
+
+def _to_integers(column: pd.Series) -> list[Any]:
+    return _to_list(to_numbers(column).astype("Int64"))
+
+
+def _to_phones(column: pd.Series) -> list[Any]:
+    """Same as phone_to_text for every phone of column"""
+    phones = column.astype("string").str.replace(r"[() \-]", "", regex=True)
+    return _to_list(phones.str.replace(r"^[78]", "+7", regex=True))
+
+
+def convert_washings_columns(df: pd.DataFrame) -> dict[str, list[Any]]:
+    """
+    Converts table sales columns to fields of Washing at once for all rows.
+    Returns lists of field values in the order of rows
+    """
+    modes = df[MODE].astype("string").str.split().str[1]
+    promocodes = df[PROMOCODE].astype("string").str.extract(r"([0-9]+)", expand=False)
+    return {
+        "id": to_numbers(df[ID]).astype(str).tolist(),
+        "date": _to_dates(df[DATE]),
+        "state": _to_list(df[STATE]),
+        "start_date": _to_dates(df[START_DATE]),
+        "end_date": _to_dates(df[END_DATE]),
+        "mode": pd.to_numeric(modes).astype(int).tolist(),
+        "phone": _to_phones(df[CLIENT]),
+        "bonuses": _to_integers(df[BONUSES]),
+        "promocode": _to_integers(promocodes),
+        "price": (to_numbers(df[PRICE]).astype(np.int64) // 100).tolist(),
+    }
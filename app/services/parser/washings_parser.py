@@ -1,22 +1,64 @@
 import asyncio
-from datetime import datetime
-import io
-import re
+from dataclasses import dataclass
+import logging
 import pandas as pd
 from typing import Optional
 
 
 from app.services.client_database.models.washing import Washing
+from app.services.parser.sales_table import (
+    LAUNCH_TYPE,
+    WASHING_COLUMNS,
+    get_rows_digest,
+    iter_sales_rows,
+)
+from app.services.parser.washings_columns import convert_washings_columns
+from app.services.parser.watermark import (
+    Watermark,
+    WatermarkStorage,
+    filter_after_watermark,
+)
 
 from app.services.terminal.session import TerminalSession
-from app.utils.phone import phone_to_text
+
+
+@dataclass
+class PollStats:
+    """Counters of terminal polls, unchanged polls are skipped"""
+
+    polls: int = 0
+    unchanged: int = 0
 
 
 class WashingsParser:
-    def __init__(self, sessions: list[TerminalSession]) -> None:
+    """
+    Gets washings from terminals, parser lives between polls.
+    If watermark storage is given, only washings after watermark of terminal are
+    returned. Terminal gives no washings if its relevant rows didn't change since
+    the last handled poll. New watermarks and digests are saved by commit
+    after washings are handled
+    """
+
+    def __init__(
+        self,
+        sessions: list[TerminalSession],
+        watermark_storage: Optional[WatermarkStorage] = None,
+    ) -> None:
         self.sessions: list[TerminalSession] = sessions
+        self.watermark_storage = watermark_storage
+        self.watermarks: dict[int, Watermark] = {}
+        self.new_watermarks: dict[int, Watermark] = {}
+        self.watermarks_loaded = False
+        self.digests: dict[int, bytes] = {}
+        self.new_digests: dict[int, bytes] = {}
+        self.stats: dict[int, PollStats] = {}
 
     async def get_washings(self) -> list[Washing]:
+        if self.watermark_storage is not None and not self.watermarks_loaded:
+            self.watermarks = await self.watermark_storage.get_all()
+            self.watermarks_loaded = True
+        self.new_watermarks = {}
+        self.new_digests = {}
         tasks = self.create_getting_tasks()
         return [wash for washings in await asyncio.gather(*tasks) for wash in washings]
 
@@ -37,72 +79,62 @@ class WashingsParser:
     async def get_washings_page(
         self, terminal_session: TerminalSession
     ) -> Optional[str]:
+        watermark = self.watermarks.get(terminal_session.terminal_id)
+        since = watermark.date if watermark is not None else None
         async with terminal_session as session:
-            return await session.get_table_sales_page()
+            return await session.get_table_sales_page(since)
 
     def parse_washings_page(self, terminal_id: int, page: str) -> list[Washing]:
-        df = self.get_washings_dataframe(page)
+        stats = self.stats.setdefault(terminal_id, PollStats())
+        stats.polls += 1
+        watermark = self.watermarks.get(terminal_id)
+        df = self.get_washings_dataframe(page, watermark.id if watermark else None)
+        df = df[df[LAUNCH_TYPE] == "Автоматический"]
+        if self.watermark_storage is not None:
+            df, new_watermark = filter_after_watermark(df, watermark)
+            if new_watermark is not None and new_watermark != watermark:
+                self.new_watermarks[terminal_id] = new_watermark
+
+        digest = get_rows_digest(df)
+        if digest == self.digests.get(terminal_id):
+            stats.unchanged += 1
+            logging.debug(
+                "Table sales are unchanged id=%s unchanged=%s/%s",
+                terminal_id,
+                stats.unchanged,
+                stats.polls,
+            )
+            return []
+        self.new_digests[terminal_id] = digest
         return self.parse_washings_dataframe(terminal_id, df)
 
-    def get_washings_dataframe(self, page: str) -> pd.DataFrame:
-        df = pd.read_html(io.StringIO(page))[0]
-        return df
+    async def commit(self):
+        """Remembers watermarks and digests of polls which washings are handled"""
+        if self.watermark_storage is not None:
+            await self.watermark_storage.save(self.new_watermarks)
+        self.watermarks.update(self.new_watermarks)
+        self.digests.update(self.new_digests)
+        self.new_watermarks = {}
+        self.new_digests = {}
+
+    def get_washings_dataframe(
+        self, page: str, stop_at: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Table of columns needed for washings, values are strings or None.
+        Page is streamed and parsing stops at stop_at sale Id
+        """
+        rows = list(iter_sales_rows(page, WASHING_COLUMNS, stop_at))
+        return pd.DataFrame(rows, columns=list(WASHING_COLUMNS))
 
     def parse_washings_dataframe(
         self, terminal_id: int, df: pd.DataFrame
     ) -> list[Washing]:
+        df = df[df[LAUNCH_TYPE] == "Автоматический"]
+        if df.empty:
+            return []
+        columns = convert_washings_columns(df)
         return [
-            self.create_washing(terminal_id, washing)
-            for washing in df[df["Тип запуска  БУМ"] == "Автоматический"].iloc
+            Washing(terminal=terminal_id, **dict(zip(columns, values)))
+            for values in zip(*columns.values())
         ]
-
-    def create_washing(self, terminal_id: int, washing_row: pd.Series) -> Washing:
-        id = str(washing_row["Id"])
-        terminal = terminal_id
-        date = self.get_date(washing_row["Дата"])
-        state = washing_row["Состояние  БУМ"]
-        start_date = self.get_date(washing_row["Дата запуска  БУМ"])
-        end_date = self.get_date(washing_row["Дата завершения  БУМ"])
-        mode = self.get_mode(washing_row["Режим  БУМ"])
-        phone = self.get_phone(washing_row["Клиент"])
-        bonuses = self.get_bonuses(washing_row["Бонусы  Бонусы"])
-        promocode = self.get_promocode(washing_row["Промокод  Промокоды"])
-        price = int(washing_row["Сумма"]) // 100
-
-        return Washing(
-            id=id,
-            terminal=terminal,
-            date=date,
-            state=state,
-            start_date=start_date,
-            end_date=end_date,
-            mode=mode,
-            phone=phone,
-            bonuses=bonuses,
-            promocode=promocode,
-            price=price,
-        )
-
-    def get_date(self, date) -> Optional[datetime]:
-        if pd.isna(date) or date == "Не определено":
-            return None
-        return datetime.strptime(str(date), "%d.%m.%Y %H:%M:%S")
-
-    def get_mode(self, mode) -> int:
-        return int(mode.split()[1])
-
-    def get_phone(self, phone) -> Optional[str]:
-        if pd.isna(phone):
-            return None
-        return phone_to_text(phone)
-
-    def get_bonuses(self, bonuses) -> Optional[int]:
-        if pd.isna(bonuses):
-            return None
-        return int(bonuses)
-
-    def get_promocode(self, promocode) -> Optional[int]:
-        if pd.isna(promocode):
-            return None
-        promocode = re.findall(r"[0-9]+", promocode)
-        return int(promocode[0])
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import json
+from typing import Optional
+
+import pandas as pd
+from redis.asyncio import Redis
+
+from app.services.parser.sales_table import DATE, END_DATE, ID, to_numbers
+
+WATERMARKS_KEY = "washings_parser:watermarks"
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+NOT_DEFINED = "Не определено"
+# Washing which is not finished for this time is not waited anymore
+MAX_PENDING_TIME = timedelta(hours=3)
+
+
+@dataclass
+class Watermark:
+    """
+    Highest sale Id of terminal up to which all washings are finished and processed,
+    date is time of this sale
+    """
+
+    id: int
+    date: Optional[datetime] = None
+
+    def dumps(self) -> str:
+        date = self.date.strftime(DATE_FORMAT) if self.date is not None else None
+        return json.dumps({"id": self.id, "date": date})
+
+    @classmethod
+    def loads(cls, data: str | bytes) -> "Watermark":
+        value = json.loads(data)
+        date = value.get("date")
+        return cls(
+            id=int(value["id"]),
+            date=datetime.strptime(date, DATE_FORMAT) if date else None,
+        )
+
+
+class WatermarkStorage:
+    """Keeps watermarks of terminals in redis hash"""
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def get_all(self) -> dict[int, Watermark]:
+        data = await self.redis.hgetall(WATERMARKS_KEY)
+        return {
+            int(terminal_id): Watermark.loads(value)
+            for terminal_id, value in data.items()
+        }
+
+    async def save(self, watermarks: dict[int, Watermark]) -> None:
+        if not watermarks:
+            return
+        await self.redis.hset(
+            WATERMARKS_KEY,
+            mapping={
+                str(terminal_id): watermark.dumps()
+                for terminal_id, watermark in watermarks.items()
+            },
+        )
+
+
+def filter_after_watermark(
+    df: pd.DataFrame, watermark: Optional[Watermark], now: Optional[datetime] = None
+) -> tuple[pd.DataFrame, Optional[Watermark]]:
+    """
+    Returns rows after watermark and new watermark.
+    Watermark doesn't pass unfinished washings, so they are processed again
+    when their state changes
+    """
+    ids = to_numbers(df[ID], errors="coerce")
+    if ids.isna().any():
+        return df, watermark
+    if watermark is not None:
+        df, ids = df[ids > watermark.id], ids[ids > watermark.id]
+    if df.empty:
+        return df, watermark
+
+    now = now or datetime.now()
+    dates = pd.to_datetime(df[DATE], format=DATE_FORMAT, errors="coerce")
+    end_dates = df[END_DATE]
+    pending = (end_dates.isna() | (end_dates == NOT_DEFINED)) & (
+        dates > now - MAX_PENDING_TIME
+    )
+
+    new_id = int(ids[pending].min()) - 1 if pending.any() else int(ids.max())
+    finished = ids <= new_id
+    if not finished.any():
+        return df, watermark
+
+    last = ids[finished].idxmax()
+    date = dates[last]
+    return df, Watermark(new_id, None if pd.isna(date) else date.to_pydatetime())
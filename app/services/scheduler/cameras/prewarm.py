@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from app.services.cameras.camera_stream import (
+    Snapshot,
+    get_photo_to_send,
+    get_snapshot_async,
+    save_file_ids,
+)
+from app.services.cameras.registry import CameraRegistry
+from app.settings.config import Config, is_open
+
+# Part of photo_update_delay between prewarms, so cached snapshot never expires
+PREWARM_INTERVAL_RATIO = 0.5
+MIN_PREWARM_INTERVAL = 1
+
+
+def get_prewarm_interval(config: Config) -> float:
+    return max(
+        config.constants.photo_update_delay * PREWARM_INTERVAL_RATIO,
+        MIN_PREWARM_INTERVAL,
+    )
+
+
+class SnapshotsPrewarmer:
+    """
+    Refreshes and encodes queue snapshots before they expire,
+    so users get ready snapshot without waiting for camera and encoder
+    """
+
+    def __init__(self, bot: Bot, config: Config, cameras: CameraRegistry) -> None:
+        self.bot = bot
+        self.config = config
+        self.cameras = cameras
+
+    async def prewarm(self) -> None:
+        if not is_open(self.config.constants, datetime.datetime.now().time()):
+            return
+
+        # Only what queue handler sends is prewarmed
+        if self.config.constants.queue_mosaic:
+            snapshots, captions = await self._prewarm_mosaic()
+        else:
+            snapshots, captions = await self._prewarm_cameras()
+
+        if self.config.constants.snapshot_upload_chat_id is not None:
+            await self._upload(snapshots, captions)
+
+    async def _prewarm_cameras(self) -> tuple[list[Snapshot], list[str]]:
+        # Lazy cameras are left disconnected until somebody needs them
+        cameras = [camera for camera in self.cameras.by_tag("queue") if camera.cam]
+        results = await asyncio.gather(
+            *(
+                get_snapshot_async(camera, self.config, force=True)
+                for camera in cameras
+            ),
+            return_exceptions=True,
+        )
+        snapshots: list[Snapshot] = []
+        captions: list[str] = []
+        for camera, result in zip(cameras, results):
+            if isinstance(result, BaseException):
+                logging.warning("Can't prewarm camera %s: %r", camera.name, result)
+                continue
+            snapshots.append(result)
+            captions.append(camera.description)
+        return snapshots, captions
+
+    async def _prewarm_mosaic(self) -> tuple[list[Snapshot], list[str]]:
+        try:
+            mosaic = self.cameras.mosaic("queue")
+            snapshot = await mosaic.get_snapshot_async(self.config)
+        except Exception as e:
+            logging.warning("Can't prewarm queue mosaic: %r", e)
+            return [], []
+        return [snapshot], [mosaic.get_caption()]
+
+    async def _upload(self, snapshots: list[Snapshot], captions: list[str]) -> None:
+        """Uploads new snapshots to service chat and remembers their file_id"""
+        chat_id = self.config.constants.snapshot_upload_chat_id
+        for snapshot, caption in zip(snapshots, captions):
+            if snapshot.file_id is not None:
+                continue
+            try:
+                message = await self.bot.send_photo(
+                    chat_id,
+                    get_photo_to_send(snapshot),
+                    caption=caption,
+                    disable_notification=True,
+                )
+                save_file_ids([snapshot], [message])
+                # file_id stays valid after message is deleted
+                await self.bot.delete_message(chat_id, message.message_id)
+            except TelegramAPIError as e:
+                logging.warning("Can't upload prewarmed snapshot: %r", e)
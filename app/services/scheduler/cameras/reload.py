@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import os
+
+from app.services.cameras.registry import CameraRegistry
+from app.settings.config import CONFIG_FILE_PATH, Config, load_config
+
+
+class CamerasConfigWatcher:
+    """Reloads cameras when config.yml is changed. Other settings need restart"""
+
+    def __init__(self, config: Config, cameras: CameraRegistry) -> None:
+        self.config = config
+        self.cameras = cameras
+        self.mtime = self._get_mtime()
+
+    def _get_mtime(self) -> float:
+        try:
+            return os.path.getmtime(CONFIG_FILE_PATH)
+        except OSError:
+            return 0
+
+    async def check(self) -> None:
+        mtime = self._get_mtime()
+        if mtime == self.mtime:
+            return
+        self.mtime = mtime
+
+        try:
+            new_config = load_config()
+        except Exception as e:
+            logging.error("Can't reload config.yml: %r", e)
+            return
+
+        # Stopping cameras joins their threads, so it's done outside of event loop
+        await asyncio.to_thread(self.cameras.update, new_config.cameras)
+        self.config.cameras = new_config.cameras
+        logging.info("Cameras are reloaded from config.yml")
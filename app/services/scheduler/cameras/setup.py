@@ -0,0 +1,53 @@
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.services.cameras.occupancy import QUEUE_ESTIMATE_INTERVAL, QueueMonitor
+from app.services.cameras.registry import CameraRegistry
+from app.services.scheduler.cameras.prewarm import (
+    SnapshotsPrewarmer,
+    get_prewarm_interval,
+)
+from app.services.scheduler.cameras.reload import CamerasConfigWatcher
+from app.settings.config import Config
+
+CONFIG_CHECK_INTERVAL = 30
+
+
+def setup_cameras_jobs(
+    scheduler: AsyncIOScheduler,
+    config: Config,
+    cameras: CameraRegistry,
+    queue_monitor: QueueMonitor,
+):
+    watcher = CamerasConfigWatcher(config, cameras)
+    scheduler.add_job(
+        func=watcher.check,
+        trigger="interval",
+        seconds=CONFIG_CHECK_INTERVAL,
+        name="Reload cameras job",
+    )
+    if config.constants.queue_text_summary:
+        scheduler.add_job(
+            func=queue_monitor.update_async,
+            trigger="interval",
+            seconds=QUEUE_ESTIMATE_INTERVAL,
+            max_instances=1,
+            coalesce=True,
+            name="Estimate queue job",
+        )
+
+
+def setup_snapshots_prewarm_job(
+    scheduler: AsyncIOScheduler, bot: Bot, config: Config, cameras: CameraRegistry
+):
+    if not config.constants.snapshot_prewarm:
+        return
+    prewarmer = SnapshotsPrewarmer(bot, config, cameras)
+    scheduler.add_job(
+        func=prewarmer.prewarm,
+        trigger="interval",
+        seconds=get_prewarm_interval(config),
+        max_instances=1,
+        coalesce=True,
+        name="Prewarm snapshots job",
+    )
@@ -2,8 +2,17 @@ from aiogram import Bot
 from aiogram.fsm.storage.base import BaseStorage
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.services.cameras.occupancy import QueueMonitor
+from app.services.cameras.registry import CameraRegistry
+from app.services.scheduler.cameras.setup import (
+    setup_cameras_jobs,
+    setup_snapshots_prewarm_job,
+)
+from app.services.scheduler.terminal_bonuses.setup import setup_bonus_outbox_job
 from app.services.scheduler.washings_handling.setup import setup_handle_washings_job
+from app.services.terminal.bonus_outbox import BonusOutbox
 from app.services.terminal.session import TerminalSession
+from app.settings.config import Config
 
 
 def setup_scheduler(
@@ -12,8 +21,15 @@ def setup_scheduler(
     terminal_sessions: list[TerminalSession],
     sessionmaker: async_sessionmaker,
     state_storage: BaseStorage,
+    config: Config,
+    cameras: CameraRegistry,
+    queue_monitor: QueueMonitor,
+    bonus_outbox: BonusOutbox,
 ) -> AsyncIOScheduler:
     setup_handle_washings_job(
-        scheduler, bot, terminal_sessions, sessionmaker, state_storage
+        scheduler, bot, terminal_sessions, sessionmaker, state_storage, config
     )
+    setup_bonus_outbox_job(scheduler, bonus_outbox, terminal_sessions)
+    setup_cameras_jobs(scheduler, config, cameras, queue_monitor)
+    setup_snapshots_prewarm_job(scheduler, bot, config, cameras)
     return scheduler
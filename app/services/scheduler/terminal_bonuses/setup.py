@@ -0,0 +1,24 @@
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.services.terminal.bonus_outbox import (
+    BONUS_OUTBOX_INTERVAL,
+    BonusOutbox,
+    BonusOutboxWorker,
+)
+from app.services.terminal.session import TerminalSession
+
+
+def setup_bonus_outbox_job(
+    scheduler: AsyncIOScheduler,
+    outbox: BonusOutbox,
+    terminal_sessions: list[TerminalSession],
+):
+    worker = BonusOutboxWorker(outbox, terminal_sessions)
+    scheduler.add_job(
+        func=worker.drain,
+        trigger="interval",
+        seconds=BONUS_OUTBOX_INTERVAL,
+        max_instances=1,
+        coalesce=True,
+        name="Send terminal bonuses job",
+    )
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import random
+from typing import Awaitable, Callable
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.settings.config import Constants, is_open
+from app.settings.terminal import Terminal
+
+# Interval grows this times after every poll without new sales
+POLL_BACKOFF = 2
+
+
+class AdaptiveInterval:
+    """
+    Poll interval of terminal: floor right after new sales,
+    grows while terminal is idle and is ceiling when car wash is closed
+    """
+
+    def __init__(self, floor: float, ceiling: float) -> None:
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.interval = floor
+
+    def update(self, changed: bool, opened: bool = True) -> float:
+        if not opened:
+            self.interval = self.ceiling
+        elif changed:
+            self.interval = self.floor
+        else:
+            self.interval = min(self.interval * POLL_BACKOFF, self.ceiling)
+        return self.interval
+
+
+class TerminalPoller:
+    """
+    Polling loop of one terminal, poll returns True if new washings were found.
+    Job of terminal is rescheduled when its interval changes
+    """
+
+    def __init__(
+        self,
+        scheduler: AsyncIOScheduler,
+        terminal: Terminal,
+        constants: Constants,
+        poll: Callable[[], Awaitable[bool]],
+    ) -> None:
+        self.scheduler = scheduler
+        self.terminal = terminal
+        self.constants = constants
+        self._poll = poll
+        self.interval = AdaptiveInterval(
+            terminal.poll_interval_min, terminal.poll_interval_max
+        )
+        self.job_id = f"poll_terminal_{terminal.id}"
+
+    def start(self):
+        # First polls of terminals are spread, so they don't go in lockstep
+        delay = random.uniform(0, self.interval.floor)
+        self.scheduler.add_job(
+            func=self.poll,
+            trigger="interval",
+            seconds=self.interval.interval,
+            next_run_time=datetime.now() + timedelta(seconds=delay),
+            id=self.job_id,
+            max_instances=1,
+            coalesce=True,
+            name=f"Update database job terminal={self.terminal.id}",
+        )
+
+    async def poll(self):
+        changed = False
+        try:
+            changed = await self._poll()
+        finally:
+            previous = self.interval.interval
+            opened = is_open(self.constants, datetime.now().time())
+            if self.interval.update(changed, opened) != previous:
+                self.scheduler.reschedule_job(
+                    self.job_id, trigger="interval", seconds=self.interval.interval
+                )
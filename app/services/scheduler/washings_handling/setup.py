@@ -1,8 +1,11 @@
+from functools import partial
 from aiogram import Bot
 from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.redis import RedisStorage
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.services.parser.watermark import WatermarkStorage
 from app.services.parser.washings_parser import WashingsParser
 from app.services.scheduler.washings_handling.bonus_notifiactions import (
     send_bonus_notifications,
@@ -10,6 +13,7 @@ from app.services.scheduler.washings_handling.bonus_notifiactions import (
 from app.services.scheduler.washings_handling.client_feedback import (
     create_send_feedback_request_jobs,
 )
+from app.services.scheduler.washings_handling.polling import TerminalPoller
 from app.services.scheduler.washings_handling.update_bonuses import update_bonuses
 from app.services.scheduler.washings_handling.update_washings import update_washings
 from app.services.scheduler.washings_handling.utils import (
@@ -17,6 +21,7 @@ from app.services.scheduler.washings_handling.utils import (
 )
 
 from app.services.terminal.session import TerminalSession
+from app.settings.config import Config
 
 
 def setup_handle_washings_job(
@@ -25,25 +30,39 @@ def setup_handle_washings_job(
     terminal_sessions: list[TerminalSession],
     session: async_sessionmaker,
     state_storage: BaseStorage,
+    config: Config,
 ):
-    scheduler.add_job(
-        func=do_parser_work,
-        trigger="cron",
-        minute="*/1",
-        args=(bot, terminal_sessions, session, scheduler, state_storage),
-        name="Update database job",
-    )
+    # Watermarks are kept in the same redis as bot states
+    watermark_storage = None
+    if isinstance(state_storage, RedisStorage):
+        watermark_storage = WatermarkStorage(state_storage.redis)
+
+    # Every terminal is polled by its own job with its own interval
+    terminals = {terminal.id: terminal for terminal in config.terminals}
+    for terminal_session in terminal_sessions:
+        parser = WashingsParser([terminal_session], watermark_storage)
+        poller = TerminalPoller(
+            scheduler,
+            terminals[terminal_session.terminal_id],
+            config.constants,
+            partial(do_parser_work, bot, parser, session, scheduler, state_storage),
+        )
+        poller.start()
 
 
 async def do_parser_work(
     bot: Bot,
-    terminal_sessions: list[TerminalSession],
+    parser: WashingsParser,
     sessionmaker: async_sessionmaker,
     scheduler: AsyncIOScheduler,
     state_storage: BaseStorage,
-):
-    parser = WashingsParser(terminal_sessions)
+) -> bool:
+    """Handles new washings of parser terminals, returns False if there are none"""
     washings = await parser.get_washings()
+    if not washings:
+        await parser.commit()
+        return False
+
     async with sessionmaker() as session:
         new_washings = await filter_new_washings_with_bonuses(washings, session)
         await update_bonuses(new_washings, session)
@@ -53,3 +72,6 @@ async def do_parser_work(
         )
 
         await update_washings(washings, session)
+
+    await parser.commit()
+    return True
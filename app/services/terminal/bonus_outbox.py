@@ -0,0 +1,229 @@
+import asyncio
+from dataclasses import asdict, dataclass
+import json
+import logging
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.services.terminal.session import TerminalSession
+
+OUTBOX_STREAM = "terminal_bonuses:{terminal_id}"
+OUTBOX_GROUP = "bonus_workers"
+DEAD_LETTER_STREAM = "terminal_bonuses:dead"
+IDEMPOTENCY_KEY = "terminal_bonuses:key:{key}"
+IDEMPOTENCY_TTL = 30 * 24 * 60 * 60
+QUEUED = "queued"
+DONE = "done"
+
+BONUS_OUTBOX_INTERVAL = 10
+BATCH_SIZE = 20
+# Bonus requests sent to one terminal at the same time
+TERMINAL_CONCURRENCY = 2
+MAX_ATTEMPTS = 8
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 60 * 60
+
+
+@dataclass
+class BonusOperation:
+    """Bonuses to add to client on terminal, key makes operation added only once"""
+
+    terminal_id: int
+    phone: str
+    bonus_count: int
+    description: str
+    key: str
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, data: str | bytes) -> "BonusOperation":
+        return cls(**json.loads(data))
+
+
+class BonusOperationExpired(Exception):
+    ...
+
+
+def get_retry_delay(attempts: int) -> float:
+    """Seconds to wait before next try after given count of failed attempts"""
+    return min(RETRY_DELAY * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+
+
+def _to_str(value: str | bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _get_field(fields: dict, name: str) -> Any:
+    return fields.get(name.encode(), fields.get(name))
+
+
+class BonusOutbox:
+    """
+    Bonus operations waiting to be sent to terminals.
+    Operations are kept in redis stream of terminal until worker sends them
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def enqueue(self, operation: BonusOperation) -> bool:
+        """Adds operation, returns False if operation with its key was added before"""
+        key = IDEMPOTENCY_KEY.format(key=operation.key)
+        if not await self.redis.set(key, QUEUED, nx=True, ex=IDEMPOTENCY_TTL):
+            return False
+        try:
+            await self.redis.xadd(
+                OUTBOX_STREAM.format(terminal_id=operation.terminal_id),
+                {"operation": operation.dumps()},
+            )
+        except Exception:
+            # Operation isn't queued, so it can be added again
+            await self.redis.delete(key)
+            raise
+        return True
+
+    async def is_done(self, operation: BonusOperation) -> bool:
+        state = await self.redis.get(IDEMPOTENCY_KEY.format(key=operation.key))
+        return state in (DONE, DONE.encode())
+
+    async def mark_done(self, operation: BonusOperation):
+        await self.redis.set(
+            IDEMPOTENCY_KEY.format(key=operation.key), DONE, ex=IDEMPOTENCY_TTL
+        )
+
+
+class BonusOutboxWorker:
+    """
+    Sends operations of outbox to their terminals.
+    Failed operations stay pending in stream and are retried with backoff,
+    operations which can't be done are moved to dead letter stream
+    """
+
+    def __init__(
+        self,
+        outbox: BonusOutbox,
+        sessions: list[TerminalSession],
+        consumer: str = "worker",
+    ) -> None:
+        self.outbox = outbox
+        self.redis = outbox.redis
+        self.sessions = sessions
+        self.consumer = consumer
+        self.groups: set[str] = set()
+
+    async def drain(self):
+        await asyncio.gather(*(self.drain_terminal(s) for s in self.sessions))
+
+    async def drain_terminal(self, terminal_session: TerminalSession):
+        stream = OUTBOX_STREAM.format(terminal_id=terminal_session.terminal_id)
+        await self.create_group(stream)
+        entries = await self.claim_retries(stream) + await self.read_new(stream)
+        if not entries:
+            return
+
+        semaphore = asyncio.Semaphore(TERMINAL_CONCURRENCY)
+
+        async def process(entry_id, fields, attempts):
+            async with semaphore:
+                await self.process(terminal_session, stream, entry_id, fields, attempts)
+
+        await asyncio.gather(*(process(*entry) for entry in entries))
+
+    async def create_group(self, stream: str):
+        if stream in self.groups:
+            return
+        try:
+            await self.redis.xgroup_create(stream, OUTBOX_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self.groups.add(stream)
+
+    async def claim_retries(self, stream: str) -> list[tuple[Any, dict, int]]:
+        """
+        Failed entries which waited their retry delay.
+        All pending entries are checked, so waiting entries don't hide due ones
+        """
+        attempts: dict[Any, int] = {}
+        start = "-"
+        while len(attempts) < BATCH_SIZE:
+            pending = await self.redis.xpending_range(
+                stream, OUTBOX_GROUP, min=start, max="+", count=BATCH_SIZE
+            )
+            for entry in pending:
+                delay = get_retry_delay(entry["times_delivered"]) * 1000
+                if entry["time_since_delivered"] >= delay:
+                    attempts[entry["message_id"]] = entry["times_delivered"]
+            if len(pending) < BATCH_SIZE:
+                break
+            start = "(" + _to_str(pending[-1]["message_id"])
+
+        attempts = dict(list(attempts.items())[:BATCH_SIZE])
+        if not attempts:
+            return []
+
+        claimed = await self.redis.xclaim(
+            stream, OUTBOX_GROUP, self.consumer, 0, list(attempts)
+        )
+        return [
+            (entry_id, fields, attempts[entry_id])
+            for entry_id, fields in claimed
+            if fields
+        ]
+
+    async def read_new(self, stream: str) -> list[tuple[Any, dict, int]]:
+        response = await self.redis.xreadgroup(
+            OUTBOX_GROUP, self.consumer, {stream: ">"}, count=BATCH_SIZE
+        )
+        return [
+            (entry_id, fields, 0)
+            for _, entries in response
+            for entry_id, fields in entries
+        ]
+
+    async def process(
+        self,
+        terminal_session: TerminalSession,
+        stream: str,
+        entry_id: Any,
+        fields: dict,
+        attempts: int,
+    ):
+        try:
+            operation = BonusOperation.loads(_get_field(fields, "operation"))
+            if await self.outbox.is_done(operation):
+                await self.redis.xack(stream, OUTBOX_GROUP, entry_id)
+                return
+            if attempts >= MAX_ATTEMPTS:
+                raise BonusOperationExpired(f"Operation failed {attempts} times")
+
+            async with terminal_session as session:
+                if attempts > 0:
+                    # Client could register since the last try
+                    session.invalidate_partner_id(operation.phone)
+                await session.add_bonuses_by_phone(
+                    operation.phone, operation.bonus_count, operation.description
+                )
+        except (ValueError, TypeError, BonusOperationExpired) as e:
+            logging.error("Bonus operation is dropped %s %r", stream, e)
+            await self.redis.xadd(DEAD_LETTER_STREAM, fields)
+            await self.redis.xack(stream, OUTBOX_GROUP, entry_id)
+            return
+        except Exception as e:
+            # Client may register on terminal later, so NoClientError is retried too
+            logging.warning(
+                "Bonus operation failed %s attempts=%s %r", stream, attempts + 1, e
+            )
+            return
+
+        await self.outbox.mark_done(operation)
+        await self.redis.xack(stream, OUTBOX_GROUP, entry_id)
+        logging.info(
+            "Bonuses are added id=%s key=%s",
+            terminal_session.terminal_id,
+            operation.key,
+        )
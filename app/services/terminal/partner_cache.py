@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Optional
+
+# Partner id of phone doesn't change, clients without account may register soon
+PARTNER_ID_TTL = 24 * 60 * 60
+NO_PARTNER_TTL = 10 * 60
+MAX_PARTNERS = 10000
+
+
+@dataclass
+class PartnerIdEntry:
+    """Cached partner id of phone, None if terminal has no client with this phone"""
+
+    partner_id: Optional[int]
+    expires: float
+
+
+class PartnerIdCache:
+    """
+    Phone to partner id cache of one terminal.
+    Clients that are not found are cached for shorter time.
+    The least recently used phones are evicted when cache is full
+    """
+
+    def __init__(
+        self,
+        ttl: float = PARTNER_ID_TTL,
+        no_partner_ttl: float = NO_PARTNER_TTL,
+        max_size: int = MAX_PARTNERS,
+    ) -> None:
+        self.ttl = ttl
+        self.no_partner_ttl = no_partner_ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, PartnerIdEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, phone: str, now: Optional[float] = None) -> Optional[PartnerIdEntry]:
+        """Returns entry of phone or None if phone is not cached or expired"""
+        entry = self._entries.get(phone)
+        if entry is None:
+            return None
+
+        now = time.monotonic() if now is None else now
+        if entry.expires <= now:
+            del self._entries[phone]
+            return None
+
+        self._entries.move_to_end(phone)
+        return entry
+
+    def set(
+        self, phone: str, partner_id: Optional[int], now: Optional[float] = None
+    ) -> None:
+        now = time.monotonic() if now is None else now
+        ttl = self.ttl if partner_id is not None else self.no_partner_ttl
+        self._entries[phone] = PartnerIdEntry(partner_id, now + ttl)
+        self._entries.move_to_end(phone)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, phone: str) -> None:
+        self._entries.pop(phone, None)
@@ -1,18 +1,37 @@
+import asyncio
+from datetime import datetime
 import json
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
 import aiohttp
 import logging
 
-from app.services.client_database.utils.phone import (
+from app.utils.phone import (
     format_phone,
     is_phone_correct,
     phone_to_text,
 )
+from app.services.cameras.single_flight import SingleFlight
+from app.services.terminal.partner_cache import PartnerIdCache
+
+T = TypeVar("T")
+
+
+# Connections to terminal are kept open between polls, which are once a minute
+CONNECTIONS_LIMIT = 10
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 30
+# Partner ids are got in parallel on warm up, but not to load terminal much
+WARM_UP_CONCURRENCY = 4
 
 
 class TerminalSession:
     """
     Class that implements connection to terminal site
-    In cookies saves session information which helps not to login every time when used
+    In cookies saves session information which helps not to login every time when used.
+    Session is long-lived and shared: connections are kept alive between uses,
+    login is done only when terminal redirects request to login page.
+    Connection pool is closed by close only when nobody uses the session
 
     Usage:
         terminal_session = TerminalSession(...)
@@ -20,9 +39,18 @@ class TerminalSession:
             ...
     """
 
-    def __init__(self, terminal_id: int, url: str, login: str, password: str) -> None:
+    def __init__(
+        self,
+        terminal_id: int,
+        url: str,
+        login: str,
+        password: str,
+        sales_date_param: Optional[str] = None,
+    ) -> None:
         self.terminal_id = terminal_id
         self.url = url
+        # Query parameter of table sales page which filters sales by date
+        self.sales_date_param = sales_date_param
         self.__login = login
         self.__password = password
         self.__login_url = url + "/Account/Login"
@@ -31,35 +59,89 @@ class TerminalSession:
             url
             + "/Modules/ModulePartial_Post?ModuleUrl=http://localhost:8083&ActionUrl=BonusChanges/Create"
         )
-        self.__cookie_jar = aiohttp.CookieJar()
-        self._session = aiohttp.ClientSession(cookie_jar=self.__cookie_jar)
+        self.__cookie_jar: Optional[aiohttp.CookieJar] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._users = 0
+        self._closing = False
+        self._login_lock: Optional[asyncio.Lock] = None
+        self._logins_count = 0
+        self.partner_ids = PartnerIdCache()
+        # Concurrent lookups of the same phone share one request
+        self._partner_lookups: dict[str, SingleFlight[Optional[int]]] = {}
 
     async def __aenter__(self) -> "TerminalSession":
-        if self._session.closed:
-            self._session = aiohttp.ClientSession(cookie_jar=self.__cookie_jar)
-
-        try:
-            if not await self.check_login():
-                await self._login()
-        except Exception as e:
-            logging.error(e)
-
+        self._users += 1
         return self
 
     async def __aexit__(self, *args, **kwargs):
-        await self.close()
+        self._users -= 1
+        if self._closing and self._users == 0:
+            await self._close_session()
 
     async def close(self):
-        if not self._session.closed:
+        """Closes connection pool now or when the last user exits"""
+        self._closing = True
+        if self._users == 0:
+            await self._close_session()
+
+    async def _close_session(self):
+        self._closing = False
+        if self._session is not None and not self._session.closed:
             await self._session.close()
 
-    async def check_login(self):
-        async with self._session.get(self.url) as resp:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Session is created in running event loop on first use"""
+        if self._session is None or self._session.closed:
+            if self.__cookie_jar is None:
+                self.__cookie_jar = aiohttp.CookieJar()
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTIONS_LIMIT,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=self.__cookie_jar,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+        return self._session
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        read: Callable[[aiohttp.ClientResponse], Awaitable[T]],
+        **kwargs,
+    ) -> T:
+        """
+        Makes request and reads response by read.
+        If terminal redirects to login page, logins and repeats request once
+        """
+        logins_count = self._logins_count
+        async with self._get_session().request(method, url, **kwargs) as resp:
+            resp.raise_for_status()
+            if not self.login_failed(resp):
+                return await read(resp)
+
+        await self._relogin(logins_count)
+        async with self._get_session().request(method, url, **kwargs) as resp:
             resp.raise_for_status()
-            return str(resp.url) == self.url + "/Admin"
+            if self.login_failed(resp):
+                raise Exception("Login failed")
+            return await read(resp)
+
+    async def _relogin(self, logins_count: int):
+        """Concurrent requests which were redirected to login page login once"""
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            if self._logins_count != logins_count:
+                return
+            await self._login()
+            self._logins_count += 1
 
     async def _login(self):
-        async with self._session.post(
+        async with self._get_session().post(
             self.__login_url,
             data={"Login": self.__login, "Password": self.__password},
         ) as resp:
@@ -70,17 +152,23 @@ class TerminalSession:
         logging.debug("Login successfull id=%s url=%s", self.terminal_id, self.url)
 
     def login_failed(self, response: aiohttp.ClientResponse):
-        return str(response.url) == self.__login_url
+        return str(response.url).startswith(self.__login_url)
 
-    async def get_table_sales_page(self) -> str | None:
-        async with self._session.get(self.__table_sales_url) as resp:
-            resp.raise_for_status()
-            logging.debug(
-                "Getting table sales page successfull id=%s url=%s",
-                self.terminal_id,
-                self.url,
-            )
-            return await resp.text()
+    async def get_table_sales_page(
+        self, since: Optional[datetime] = None
+    ) -> str | None:
+        params = {}
+        if since is not None and self.sales_date_param:
+            params[self.sales_date_param] = since.strftime("%d.%m.%Y")
+        text = await self._request(
+            "GET", self.__table_sales_url, _read_text, params=params
+        )
+        logging.debug(
+            "Getting table sales page successfull id=%s url=%s",
+            self.terminal_id,
+            self.url,
+        )
+        return text
 
     async def add_bonuses_by_phone(
         self, phone: str, bonus_count: int, description: str
@@ -92,25 +180,78 @@ class TerminalSession:
             "Comment": description,
         }
 
-        async with self._session.post(self.__bonus_create_url, data=data) as resp:
-            resp.raise_for_status()
+        try:
+            await self._request(
+                "POST", self.__bonus_create_url, _read_nothing, data=data
+            )
+        except Exception:
+            # Partner id may be wrong, it's got again on retry
+            self.invalidate_partner_id(phone)
+            raise
 
     async def get_partner_id(self, phone: str) -> int:
         if not is_phone_correct(phone):
             raise ValueError("Incorrect phone")
 
         phone = format_phone(phone_to_text(phone))
+        entry = self.partner_ids.get(phone)
+        if entry is None:
+            partner_id = await self._lookup_partner_id(phone)
+        else:
+            partner_id = entry.partner_id
+
+        if partner_id is None:
+            raise NoClientError("No partner with such phone")
+
+        return partner_id
+
+    def invalidate_partner_id(self, phone: str):
+        """Forgets cached partner id, so it's got from terminal next time"""
+        if is_phone_correct(phone):
+            self.partner_ids.invalidate(format_phone(phone_to_text(phone)))
+
+    async def _lookup_partner_id(self, phone: str) -> Optional[int]:
+        flight = self._partner_lookups.setdefault(phone, SingleFlight())
+
+        async def lookup() -> Optional[int]:
+            partner_id = await self._get_partner_id(phone)
+            self.partner_ids.set(phone, partner_id)
+            return partner_id
+
+        try:
+            return await flight.run(lookup)
+        finally:
+            if self._partner_lookups.get(phone) is flight and not flight.in_flight:
+                del self._partner_lookups[phone]
+
+    async def _get_partner_id(self, phone: str) -> Optional[int]:
         url = self.get_partner_id_by_phone_url(phone)
+        data: dict = await self._request("GET", url, _read_json)
+        partner_data = json.loads(data["Result"])
 
-        async with self._session.get(url) as resp:
-            resp.raise_for_status()
-            data: dict = await resp.json()
-            partner_data = json.loads(data["Result"])
+        if not partner_data:
+            return None
+
+        return partner_data[0]["Partner"]["Id"]
 
-            if not partner_data:
-                raise NoClientError("No partner with such phone")
+    async def warm_up_partner_ids(
+        self, phones: Iterable[str], concurrency: int = WARM_UP_CONCURRENCY
+    ):
+        """Caches partner ids of phones, so bonuses are added in one request"""
+        semaphore = asyncio.Semaphore(concurrency)
 
-            return partner_data[0]["Partner"]["Id"]
+        async def warm_up(phone: str):
+            async with semaphore:
+                try:
+                    await self.get_partner_id(phone)
+                except (ValueError, NoClientError):
+                    pass
+                except Exception as e:
+                    logging.warning(
+                        "Getting partner id failed id=%s error=%s", self.terminal_id, e
+                    )
+
+        await asyncio.gather(*(warm_up(phone) for phone in set(phones)))
 
     def get_partner_id_by_phone_url(self, phone: str) -> str:
         phone = phone.replace("+", "%2B")
@@ -167,7 +308,7 @@ class TerminalSession:
             "TypeAction": "2",
             "Value": "0",
         }
-        async with self._session.post(
+        async with self._get_session().post(
             self.url
             + "/Modules/ModulePartial_Post?ModuleUrl=http://localhost:8084&ActionUrl=Promocodes/Create",
             data=data,
@@ -175,5 +316,17 @@ class TerminalSession:
             print(resp.raw_headers)
 
 
+async def _read_text(response: aiohttp.ClientResponse) -> str:
+    return await response.text()
+
+
+async def _read_json(response: aiohttp.ClientResponse) -> Any:
+    return await response.json()
+
+
+async def _read_nothing(response: aiohttp.ClientResponse) -> None:
+    return None
+
+
 class NoClientError(Exception):
     ...
@@ -1,4 +1,24 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Optional
+
+DEFAULT_REFRESH_INTERVAL = 5
+DEFAULT_JPEG_QUALITY = 95
+# Mean absolute difference of grayscale thumbnails (0..255) treated as scene change
+DEFAULT_MOTION_THRESHOLD = 3.0
+# Image is replaced after this time even if scene didn't change
+DEFAULT_MAX_IMAGE_AGE = 300
+
+
+class CaptureMode(StrEnum):
+    """
+    READ - every frame is decoded by capture thread
+    GRAB - frames are only grabbed to drain stream buffer, decoding is done
+           when frame is requested or refresh interval has expired
+    """
+
+    READ = "read"
+    GRAB = "grab"
 
 
 @dataclass
@@ -28,6 +48,21 @@ class CameraURI:
         return address + "?tcp"
 
 
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    Snapshot encoding settings.
+    Frame is downscaled to fit width and height keeping aspect ratio,
+    if max_bytes is set quality is lowered until snapshot fits it
+    """
+
+    width: Optional[int] = None
+    height: Optional[int] = None
+    quality: int = DEFAULT_JPEG_QUALITY
+    progressive: bool = False
+    max_bytes: Optional[int] = None
+
+
 @dataclass
 class CameraConfig:
     """Dataclass for camera configuration"""
@@ -36,6 +71,42 @@ class CameraConfig:
     name: str
     description: str
     tags: list[str]
+    capture_mode: CaptureMode = CaptureMode.READ
+    refresh_interval: float = DEFAULT_REFRESH_INTERVAL
+    process_group: Optional[str] = None
+    lazy: bool = False
+    encoding: EncodingProfile = field(default_factory=EncodingProfile)
+    # 0 replaces image on any change of the scene
+    motion_threshold: float = DEFAULT_MOTION_THRESHOLD
+    max_image_age: float = DEFAULT_MAX_IMAGE_AGE
+    # Polygons of queue places in relative coordinates [[x, y], ...], 0 <= x, y <= 1
+    queue_regions: list[list[tuple[float, float]]] = field(default_factory=list)
+    # Image of camera view with empty queue, queue is estimated only with it
+    queue_background: Optional[str] = None
+
+
+def get_motion_threshold(threshold: Optional[float]) -> float:
+    if threshold is None:
+        return DEFAULT_MOTION_THRESHOLD
+    return float(threshold)
+
+
+def get_queue_regions(regions: Optional[list]) -> list[list[tuple[float, float]]]:
+    if not regions:
+        return []
+    return [[(float(x), float(y)) for x, y in region] for region in regions]
+
+
+def get_encoding_profile(encoding: Optional[dict]) -> EncodingProfile:
+    if not encoding:
+        return EncodingProfile()
+    return EncodingProfile(
+        width=encoding.get("width"),
+        height=encoding.get("height"),
+        quality=encoding.get("quality") or DEFAULT_JPEG_QUALITY,
+        progressive=bool(encoding.get("progressive")),
+        max_bytes=encoding.get("max_bytes"),
+    )
 
 
 def get_cameras(config: dict) -> list[CameraConfig]:
@@ -59,6 +130,18 @@ def get_cameras(config: dict) -> list[CameraConfig]:
                 name=camera["name"],
                 description=camera["description"],
                 tags=camera["tags"],
+                capture_mode=CaptureMode(
+                    camera.get("capture_mode") or CaptureMode.READ
+                ),
+                refresh_interval=camera.get("refresh_interval")
+                or DEFAULT_REFRESH_INTERVAL,
+                process_group=camera.get("process_group"),
+                lazy=bool(camera.get("lazy")),
+                encoding=get_encoding_profile(camera.get("encoding")),
+                motion_threshold=get_motion_threshold(camera.get("motion_threshold")),
+                max_image_age=camera.get("max_image_age") or DEFAULT_MAX_IMAGE_AGE,
+                queue_regions=get_queue_regions(camera.get("queue_regions")),
+                queue_background=camera.get("queue_background"),
             )
         )
 
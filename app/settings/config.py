@@ -2,12 +2,17 @@ import yaml
 import os
 from dataclasses import dataclass, field
 import datetime
+from typing import Optional
 from app.settings import paths
 from app.settings.bot import Bot, get_parse_mode
 from app.settings.camera import CameraConfig, get_cameras
 from app.settings.database import DB, Redis
 from app.settings.terminal import Terminal, get_terminals
 
+CONFIG_FILE_PATH = paths.ROOT_DIR / "config.yml"
+
+DEFAULT_SNAPSHOT_TIMEOUT = 5
+
 
 @dataclass
 class Constants:
@@ -15,6 +20,31 @@ class Constants:
     users_use_command_delay: int
     operator_camera_block_start_time: datetime.time
     operator_camera_block_end_time: datetime.time
+    snapshot_timeout: float = DEFAULT_SNAPSHOT_TIMEOUT
+    queue_mosaic: bool = False
+    queue_text_summary: bool = False
+    # Queue snapshots are refreshed in background between opening and closing time
+    snapshot_prewarm: bool = False
+    # Chat where prewarmed snapshots are uploaded to get file_id in advance
+    snapshot_upload_chat_id: Optional[int] = None
+    opening_time: Optional[datetime.time] = None
+    closing_time: Optional[datetime.time] = None
+
+
+def get_time(value: Optional[str]) -> Optional[datetime.time]:
+    if not value:
+        return None
+    return datetime.time.fromisoformat(value)
+
+
+def is_open(constants: Constants, now: datetime.time) -> bool:
+    """Checks opening hours, closing time may be after midnight"""
+    opening, closing = constants.opening_time, constants.closing_time
+    if opening is None or closing is None:
+        return True
+    if opening <= closing:
+        return opening <= now < closing
+    return now >= opening or now < closing
 
 
 def get_constants(constants_config: dict) -> Constants:
@@ -27,6 +57,14 @@ def get_constants(constants_config: dict) -> Constants:
         operator_camera_block_end_time=datetime.time.fromisoformat(
             constants_config["operator_camera_block_end_time"]
         ),
+        snapshot_timeout=constants_config.get("snapshot_timeout")
+        or DEFAULT_SNAPSHOT_TIMEOUT,
+        queue_mosaic=bool(constants_config.get("queue_mosaic")),
+        queue_text_summary=bool(constants_config.get("queue_text_summary")),
+        snapshot_prewarm=bool(constants_config.get("snapshot_prewarm")),
+        snapshot_upload_chat_id=constants_config.get("snapshot_upload_chat_id"),
+        opening_time=get_time(constants_config.get("opening_time")),
+        closing_time=get_time(constants_config.get("closing_time")),
     )
 
 
@@ -43,12 +81,10 @@ class Config:
 
 
 def load_config() -> Config:
-    config_file_path = paths.ROOT_DIR / "config.yml"
-
-    if not os.path.exists(config_file_path):
+    if not os.path.exists(CONFIG_FILE_PATH):
         raise ValueError("config.yml does't exists!")
 
-    with open(config_file_path, "r") as file:
+    with open(CONFIG_FILE_PATH, "r") as file:
         config = yaml.safe_load(file)
 
     constants = config["constants"]
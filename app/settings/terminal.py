@@ -1,4 +1,9 @@
 from dataclasses import dataclass
+from typing import Optional
+
+# Seconds between polls of terminal sales right after new sales and when idle
+DEFAULT_POLL_INTERVAL_MIN = 20
+DEFAULT_POLL_INTERVAL_MAX = 300
 
 
 @dataclass
@@ -7,6 +12,9 @@ class Terminal:
     url: str
     login: str
     password: str
+    sales_date_param: Optional[str] = None
+    poll_interval_min: float = DEFAULT_POLL_INTERVAL_MIN
+    poll_interval_max: float = DEFAULT_POLL_INTERVAL_MAX
 
 
 def get_terminals(config: dict) -> list[Terminal]:
@@ -17,12 +25,22 @@ def get_terminals(config: dict) -> list[Terminal]:
 
     for el in terminals_dict:
         terminal = el["terminal"]
+        poll_interval_min = (
+            terminal.get("poll_interval_min") or DEFAULT_POLL_INTERVAL_MIN
+        )
+        poll_interval_max = max(
+            terminal.get("poll_interval_max") or DEFAULT_POLL_INTERVAL_MAX,
+            poll_interval_min,
+        )
         terminals.append(
             Terminal(
                 id=terminal["id"],
                 url=terminal["url"],
                 login=terminal["login"],
                 password=terminal["password"],
+                sales_date_param=terminal.get("sales_date_param"),
+                poll_interval_min=poll_interval_min,
+                poll_interval_max=poll_interval_max,
             )
         )
     return terminals
@@ -0,0 +1,217 @@
+"""
+Benchmark of cameras capture, encode and serve path without live cameras
+
+Usage:
+    python -m bench.bench_cameras [--source synthetic|file|rtsp://...] [--cameras 4]
+        [--callers 8] [--duration 10] [--capture-mode read|grab]
+        [--motion-threshold 0]
+
+Reports capture fps per camera, per-frame decode and encode time,
+get_image latency p50/p99 under concurrent callers, separately for calls that
+refreshed and encoded image, and memory per camera.
+"file" source is a generated MJPG video read in a loop, so decode time is real.
+Motion threshold is 0 by default: moving square of synthetic source is too small
+to be a scene change, with camera default get_image would measure only cache hits.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import numpy as np
+
+from app.services.cameras.camera_stream import CameraStream, get_image
+from app.services.cameras.encoding import encode_frame
+from app.services.cameras.frame_source import (
+    FrameSource,
+    RTSPSource,
+    SyntheticSource,
+    VideoFileSource,
+)
+from app.settings.camera import CameraURI, CaptureMode, EncodingProfile
+from bench.bench_capture import create_synthetic_video
+
+WARM_UP_TIMEOUT = 30
+
+
+def get_source_factory(args: argparse.Namespace) -> Callable[[], FrameSource]:
+    if args.source == "synthetic":
+        return lambda: SyntheticSource(args.width, args.height, fps=args.fps)
+    if args.source == "file":
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.avi")
+        create_synthetic_video(path, args.width, args.height, 100)
+        return lambda: VideoFileSource(path)
+    return lambda: RTSPSource(args.source)
+
+
+def get_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def measure_decode(source: FrameSource, frames: int) -> float:
+    """Milliseconds to grab and decode one frame"""
+    if isinstance(source, SyntheticSource):
+        # Generation time is measured, not camera frame rate
+        source.fps = None
+    source.open()
+    start = time.perf_counter()
+    for _ in range(frames):
+        source.read()
+    elapsed = time.perf_counter() - start
+    source.release()
+    return elapsed / frames * 1000
+
+
+def measure_encode(source: FrameSource, profile: EncodingProfile, repeat: int) -> float:
+    """Milliseconds to encode one frame with profile"""
+    source.open()
+    _, frame = source.read()
+    source.release()
+    assert frame is not None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode_frame(frame, profile)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def create_cameras(
+    factory: Callable[[], FrameSource],
+    count: int,
+    capture_mode: CaptureMode,
+    motion_threshold: float = 0,
+) -> list[CameraStream]:
+    uri = CameraURI(login="", password="", host="", port="", protocol="", path="")
+    return [
+        CameraStream(
+            uri,
+            f"bench{i}",
+            f"Bench camera {i}",
+            ["queue"],
+            capture_mode=capture_mode,
+            motion_threshold=motion_threshold,
+            frame_source=factory(),
+        )
+        for i in range(count)
+    ]
+
+
+def wait_warm_up(cameras: list[CameraStream]):
+    deadline = time.time() + WARM_UP_TIMEOUT
+    while any(camera.is_warming_up for camera in cameras):
+        if time.time() > deadline:
+            raise TimeoutError("Cameras didn't give frames")
+        time.sleep(0.05)
+
+
+def measure_latency(
+    cameras: list[CameraStream], config, callers: int, duration: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Latencies of get_image in milliseconds from concurrent callers,
+    all calls and calls which refreshed image
+    """
+    latencies: list[list[float]] = [[] for _ in range(callers)]
+    refreshes: list[list[float]] = [[] for _ in range(callers)]
+    deadline = time.time() + duration
+
+    def call(results: list[float], refreshed: list[float]):
+        while time.time() < deadline:
+            camera = random.choice(cameras)
+            generation = camera.image_generation
+            start = time.perf_counter()
+            get_image(camera, config)
+            latency = (time.perf_counter() - start) * 1000
+            results.append(latency)
+            if camera.image_generation != generation:
+                refreshed.append(latency)
+
+    threads = [
+        threading.Thread(target=call, args=args) for args in zip(latencies, refreshes)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (
+        np.concatenate([np.array(results) for results in latencies]),
+        np.concatenate([np.array(results) for results in refreshes]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="synthetic")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--callers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--update-delay", type=float, default=1)
+    parser.add_argument("--capture-mode", type=CaptureMode, default=CaptureMode.READ)
+    parser.add_argument("--motion-threshold", type=float, default=0)
+    args = parser.parse_args()
+
+    factory = get_source_factory(args)
+    config = SimpleNamespace(
+        constants=SimpleNamespace(photo_update_delay=args.update_delay)
+    )
+
+    print(f"source={args.source} {args.width}x{args.height} cameras={args.cameras}")
+    print(f"decode: {measure_decode(factory(), 50):.2f}ms/frame")
+    print(f"encode: {measure_encode(factory(), EncodingProfile(), 10):.2f}ms/frame")
+
+    rss_start = get_rss()
+    tracemalloc.start()
+    cameras = create_cameras(
+        factory, args.cameras, args.capture_mode, args.motion_threshold
+    )
+    try:
+        wait_warm_up(cameras)
+        for camera in cameras:
+            get_image(camera, config)
+        traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_end = get_rss()
+        line = f"memory: {traced / args.cameras / 2**20:.1f}MB/camera traced"
+        if rss_start is not None and rss_end is not None:
+            rss = (rss_end - rss_start) / args.cameras / 2**20
+            line += f", {rss:.1f}MB/camera rss"
+        print(line)
+
+        frames_start = [camera.cam.frames_count for camera in cameras]
+        wall_start = time.time()
+        latencies, refreshes = measure_latency(
+            cameras, config, args.callers, args.duration
+        )
+        wall = time.time() - wall_start
+        for camera, start in zip(cameras, frames_start):
+            fps = (camera.cam.frames_count - start) / wall
+            print(f"{camera.name}: {fps:.1f}fps generation={camera.image_generation}")
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(
+            f"get_image: calls={len(latencies)} callers={args.callers} "
+            f"p50={p50:.3f}ms p99={p99:.3f}ms"
+        )
+        if len(refreshes):
+            p50, p99 = np.percentile(refreshes, [50, 99])
+            print(
+                f"get_image with refresh: calls={len(refreshes)} "
+                f"p50={p50:.3f}ms p99={p99:.3f}ms"
+            )
+    finally:
+        for camera in cameras:
+            camera.stop()
+
+
+if __name__ == "__main__":
+    main()
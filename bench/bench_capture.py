@@ -0,0 +1,83 @@
+"""
+Benchmark of CPU used by one camera in READ and GRAB capture modes
+
+Usage:
+    python -m bench.bench_capture [--src rtsp://...] [--duration 10] [--fps 25]
+
+Without --src a synthetic MJPG video is generated and read in a loop.
+Local files are read as fast as possible, so CPU is reported per grabbed frame
+and scaled to --fps. For live sources CPU share is measured directly.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from app.services.cameras.frame_source import FrameSource, RTSPSource, VideoFileSource
+from app.services.cameras.video_capture import VideoCaptureThreaded
+from app.settings.camera import CaptureMode
+
+
+def create_synthetic_video(path: str, width: int, height: int, frames: int) -> str:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (width, height))
+    for i in range(frames):
+        frame = np.full((height, width, 3), 64, dtype=np.uint8)
+        cv2.circle(frame, (i * 7 % width, height // 2), height // 8, (0, 255, 0), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def measure(source: FrameSource, mode: CaptureMode, duration: float) -> dict:
+    cam = VideoCaptureThreaded(source, capture_mode=mode, refresh_interval=duration / 4)
+    cam.start()
+    cpu_start, wall_start = time.process_time(), time.time()
+    time.sleep(duration)
+    cpu, wall = time.process_time() - cpu_start, time.time() - wall_start
+    frames, decoded = cam.frames_count, cam.retrieves_count
+    cam.stop()
+    return {
+        "frames": frames,
+        "decoded": decoded,
+        "cpu_share": cpu / wall,
+        "cpu_ms_per_frame": cpu / max(frames, 1) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", default=None)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    if args.src is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.avi")
+        source: FrameSource = VideoFileSource(
+            create_synthetic_video(path, args.width, args.height, 100)
+        )
+    else:
+        source = RTSPSource(args.src)
+    looped = isinstance(source, VideoFileSource)
+
+    for mode in CaptureMode:
+        result = measure(source, mode, args.duration)
+        line = (
+            f"{mode.value:>4}: frames={result['frames']} decoded={result['decoded']} "
+            f"cpu/frame={result['cpu_ms_per_frame']:.2f}ms"
+        )
+        if looped:
+            estimated = result["cpu_ms_per_frame"] * args.fps / 1000
+            line += f" cpu@{args.fps:g}fps={estimated:.1%} of core"
+        else:
+            line += f" cpu={result['cpu_share']:.1%} of core"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of snapshot encoding profiles: encode time and size of snapshot
+
+Usage:
+    python -m bench.bench_encoding [--image frame.jpg] [--repeat 20]
+
+Without --image a synthetic 1080p frame with gradients and noise is used.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.cameras.encoding import encode_frame
+from app.settings.camera import EncodingProfile
+
+PROFILES = {
+    "default": EncodingProfile(),
+    "q80": EncodingProfile(quality=80),
+    "1280 q80": EncodingProfile(width=1280, height=720, quality=80),
+    "960 q70 progressive": EncodingProfile(
+        width=960, height=540, quality=70, progressive=True
+    ),
+    "1280 max 150KB": EncodingProfile(width=1280, height=720, max_bytes=150_000),
+    "960 max 60KB": EncodingProfile(width=960, height=540, max_bytes=60_000),
+}
+
+
+def create_synthetic_frame(width: int = 1920, height: int = 1080) -> np.ndarray:
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noise = np.random.default_rng(0).normal(0, 12, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    frame = create_synthetic_frame()
+    if args.image is not None:
+        frame = cv2.imread(args.image)
+
+    print(f"frame {frame.shape[1]}x{frame.shape[0]}")
+    for name, profile in PROFILES.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            data = encode_frame(frame, profile)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{name:>20}: {elapsed * 1000:7.2f}ms {len(data) / 1024:8.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of table sales page parsing: pandas.read_html against streaming lxml parser
+
+Usage:
+    python -m bench.bench_parser [--rows 10000] [--new 20] [--repeat 3]
+
+Synthetic page has all columns of terminal table sales, the newest sales go first.
+Streaming parser is measured on full page and with early stop at watermark,
+when only --new rows are after it.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+from typing import Callable
+
+import pandas as pd
+
+from app.services.parser.sales_table import (
+    LAUNCH_TYPE,
+    WASHING_COLUMNS,
+    iter_sales_rows,
+)
+from test.sales_page import create_sales_page
+
+def parse_read_html(page: str, stop_at: int) -> int:
+    df = pd.read_html(io.StringIO(page))[0]
+    return len(df[df[LAUNCH_TYPE] == "Автоматический"])
+
+
+def parse_streaming(page: str, stop_at: int) -> int:
+    df = pd.DataFrame(list(iter_sales_rows(page)), columns=list(WASHING_COLUMNS))
+    return len(df[df[LAUNCH_TYPE] == "Автоматический"])
+
+
+def parse_streaming_watermark(page: str, stop_at: int) -> int:
+    rows = list(iter_sales_rows(page, stop_at=stop_at))
+    df = pd.DataFrame(rows, columns=list(WASHING_COLUMNS))
+    return len(df[df[LAUNCH_TYPE] == "Автоматический"])
+
+
+def measure(func: Callable[[str, int], int], page: str, stop_at: int, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func(page, stop_at)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(page, stop_at)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--new", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    last_id = 100000
+    page = create_sales_page(args.rows, last_id)
+    stop_at = last_id - args.new
+    print(f"page: rows={args.rows} size={len(page.encode()) / 2**20:.1f}MB")
+
+    baseline = None
+    for name, func in (
+        ("read_html", parse_read_html),
+        ("streaming", parse_streaming),
+        ("streaming+watermark", parse_streaming_watermark),
+    ):
+        rows, elapsed, peak = measure(func, page, stop_at, args.repeat)
+        baseline = baseline or elapsed
+        print(
+            f"{name:>20}: rows={rows} time={elapsed * 1000:.1f}ms "
+            f"speedup={baseline / elapsed:.1f}x peak={peak / 2**20:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark of washings polling against local fake terminals
+
+Usage:
+    python -m bench.bench_terminals [--terminals 4] [--rows 2000] [--new 5]
+        [--cycles 10] [--latency 0.05] [--failure-rate 0]
+        [--redis-url redis://...] [--db-uri postgresql+asyncpg://...]
+
+Every cycle adds --new sales to each terminal and polls all of them.
+Without --db-uri cycle is only parser work of do_parser_work: getting washings
+and commit, saving washings and notifying clients are not measured.
+With --db-uri the whole do_parser_work is run against the database, it must be
+a throwaway database with schema of the bot.
+--redis-url enables watermarks, use separate redis database, not one of the bot.
+Reports cycle time, requests per terminal and memory.
+"""
+import argparse
+import asyncio
+from collections import Counter
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.fsm.storage.memory import MemoryStorage
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import numpy as np
+from redis.asyncio import Redis
+
+from app.services.parser.washings_parser import WashingsParser
+from app.services.parser.watermark import WatermarkStorage
+from app.services.terminal.session import TerminalSession
+from bench.bench_cameras import get_rss
+from test.fake_terminal import LOGIN, PASSWORD, FakeTerminal
+
+SALES_DATE_PARAM = "Date"
+BENCH_BOT_TOKEN = "123456:bench"
+
+
+async def create_cycle(
+    parser: WashingsParser, db_uri: Optional[str]
+) -> Callable[[], Awaitable[None]]:
+    if db_uri is None:
+
+        async def poll():
+            await parser.get_washings()
+            await parser.commit()
+
+        return poll
+
+    from app.services.client_database.connector import setup_get_pool
+    from app.services.scheduler.washings_handling.setup import do_parser_work
+
+    sessionmaker = await setup_get_pool(db_uri)
+    bot = Bot(BENCH_BOT_TOKEN)
+    scheduler = AsyncIOScheduler()
+    storage = MemoryStorage()
+    return lambda: do_parser_work(bot, parser, sessionmaker, scheduler, storage)
+
+
+async def run(args: argparse.Namespace):
+    terminals = [
+        FakeTerminal(
+            rows=args.rows,
+            last_id=100000 * (i + 1),
+            latency=args.latency,
+            failure_rate=args.failure_rate,
+            sales_date_param=SALES_DATE_PARAM,
+            seed=i,
+        )
+        for i in range(args.terminals)
+    ]
+    sessions = [
+        TerminalSession(i, await terminal.start(), LOGIN, PASSWORD, SALES_DATE_PARAM)
+        for i, terminal in enumerate(terminals)
+    ]
+    redis = Redis.from_url(args.redis_url) if args.redis_url else None
+    parser = WashingsParser(sessions, WatermarkStorage(redis) if redis else None)
+    cycle = await create_cycle(parser, args.db_uri)
+
+    rss_start = get_rss()
+    tracemalloc.start()
+    times = []
+    errors = 0
+    try:
+        for _ in range(args.cycles):
+            for terminal in terminals:
+                terminal.add_sales(args.new)
+            start = time.perf_counter()
+            try:
+                await cycle()
+            except Exception as e:
+                errors += 1
+                print(f"cycle failed: {e!r}")
+            times.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        for session in sessions:
+            await session.close()
+        for terminal in terminals:
+            await terminal.stop()
+        if redis is not None:
+            await redis.close()
+    rss_end = get_rss()
+
+    requests = sum((terminal.requests for terminal in terminals), Counter())
+    p50, p99 = np.percentile(np.array(times) * 1000, [50, 99])
+    print(
+        f"terminals={args.terminals} rows={args.rows} new={args.new} "
+        f"latency={args.latency * 1000:.0f}ms failure_rate={args.failure_rate}"
+    )
+    if args.db_uri is None:
+        print("cycle is get_washings and commit only, pass --db-uri for do_parser_work")
+    print(
+        f"cycle: first={times[0] * 1000:.1f}ms p50={p50:.1f}ms p99={p99:.1f}ms "
+        f"errors={errors}/{args.cycles}"
+    )
+    for path, count in sorted(requests.items()):
+        print(
+            f"{path}: {count / args.terminals / args.cycles:.2f} requests/terminal/cycle"
+        )
+    print(f"logins: {sum(terminal.logins for terminal in terminals)}")
+    line = f"memory: peak={peak / 2**20:.1f}MB traced"
+    if rss_start is not None and rss_end is not None:
+        line += f", {(rss_end - rss_start) / 2**20:.1f}MB rss growth"
+    print(line)
+    stats = parser.stats.values()
+    print(
+        f"unchanged polls: {sum(s.unchanged for s in stats)}/{sum(s.polls for s in stats)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terminals", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--new", type=int, default=5)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--redis-url")
+    parser.add_argument("--db-uri")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Local stand-in of terminal admin site for tests and benchmarks of terminal sessions
+
+Implements login with session cookie, table sales page generated by
+test.sales_page, partner search by phone and bonus creation.
+Latency and failure rate are applied to every request.
+
+Usage:
+    terminal = FakeTerminal(rows=1000, latency=0.05)
+    url = await terminal.start()
+    ...
+    await terminal.stop()
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import json
+import random
+import secrets
+from typing import Optional
+
+from aiohttp import web
+
+from test.sales_page import create_sales_page
+
+LOGIN = "admin"
+PASSWORD = "admin"
+COOKIE_NAME = ".AspNetCore.Session"
+SALES_DATE_FORMAT = "%d.%m.%Y"
+SALE_INTERVAL = timedelta(minutes=10)
+
+
+class FakeTerminal:
+    """
+    Terminal admin site with sales table of given rows, the newest sales go first.
+    partners maps phones in terminal format +7(900)000-00-00 to partner ids
+    """
+
+    def __init__(
+        self,
+        rows: int = 100,
+        last_id: int = 100000,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        partners: Optional[dict[str, int]] = None,
+        sales_date_param: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.rows = rows
+        self.last_id = last_id
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.partners = partners or {}
+        self.sales_date_param = sales_date_param
+        self.random = random.Random(seed)
+
+        self.first_id = last_id
+        self.start_time = datetime.now().replace(microsecond=0)
+        self.tokens: set[str] = set()
+        self.requests: Counter[str] = Counter()
+        self.logins = 0
+        self.bonuses: list[dict[str, str]] = []
+        self._pages: dict[tuple[int, int], str] = {}
+
+        self.app = web.Application(middlewares=[self._simulate])
+        self.app.add_routes(
+            [
+                web.get("/", self.index),
+                web.get("/Account/Login", self.login_page),
+                web.post("/Account/Login", self.login),
+                web.get("/Admin", self.admin),
+                web.get("/Admin/_TableSales", self.table_sales),
+                web.get("/Modules/GetPartnersByPhoneContains", self.partners_by_phone),
+                web.post("/Modules/ModulePartial_Post", self.module_post),
+            ]
+        )
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://localhost:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def add_sales(self, count: int):
+        self.last_id += count
+
+    def expire_sessions(self):
+        self.tokens.clear()
+
+    def get_last_sale_date(self) -> datetime:
+        return self.start_time + SALE_INTERVAL * (self.last_id - self.first_id)
+
+    @web.middleware
+    async def _simulate(self, request: web.Request, handler):
+        self.requests[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise web.HTTPInternalServerError()
+        return await handler(request)
+
+    def _is_logged_in(self, request: web.Request) -> bool:
+        return request.cookies.get(COOKIE_NAME) in self.tokens
+
+    def _redirect_to_login(self, request: web.Request) -> web.HTTPFound:
+        return web.HTTPFound(
+            request.url.with_path("/Account/Login").with_query(
+                ReturnUrl=request.path_qs
+            )
+        )
+
+    async def index(self, request: web.Request) -> web.Response:
+        if not self._is_logged_in(request):
+            raise self._redirect_to_login(request)
+        raise web.HTTPFound("/Admin")
+
+    async def login_page(self, request: web.Request) -> web.Response:
+        return web.Response(text="<html><form method='post'></form></html>")
+
+    async def login(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        if data.get("Login") != LOGIN or data.get("Password") != PASSWORD:
+            return await self.login_page(request)
+
+        self.logins += 1
+        token = secrets.token_hex(16)
+        self.tokens.add(token)
+        response = web.HTTPFound("/Admin")
+        response.set_cookie(COOKIE_NAME, token)
+        raise response
+
+    async def admin(self, request: web.Request) -> web.Response:
+        if not self._is_logged_in(request):
+            raise self._redirect_to_login(request)
+        return web.Response(text="<html>Admin</html>")
+
+    async def table_sales(self, request: web.Request) -> web.Response:
+        if not self._is_logged_in(request):
+            raise self._redirect_to_login(request)
+
+        rows = self.rows
+        since = request.query.get(self.sales_date_param or "")
+        if since:
+            since_date = datetime.strptime(since, SALES_DATE_FORMAT)
+            age = self.get_last_sale_date() - since_date
+            rows = max(min(rows, age // SALE_INTERVAL + 1), 0)
+
+        key = (self.last_id, rows)
+        if key not in self._pages:
+            self._pages = {
+                key: create_sales_page(rows, self.last_id, self.get_last_sale_date())
+            }
+        return web.Response(text=self._pages[key], content_type="text/html")
+
+    async def partners_by_phone(self, request: web.Request) -> web.Response:
+        if not self._is_logged_in(request):
+            raise self._redirect_to_login(request)
+
+        phone = request.query.get("Phone", "")
+        partners = [
+            {"Partner": {"Id": id, "Phone": partner_phone}}
+            for partner_phone, id in self.partners.items()
+            if phone in partner_phone
+        ]
+        return web.json_response({"Result": json.dumps(partners)})
+
+    async def module_post(self, request: web.Request) -> web.Response:
+        if not self._is_logged_in(request):
+            raise self._redirect_to_login(request)
+
+        data = await request.post()
+        self.bonuses.append({key: str(value) for key, value in data.items()})
+        return web.Response(text="<html>Ok</html>")
@@ -0,0 +1,68 @@
+"""Synthetic terminal table sales page for tests and benchmarks"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.services.parser.sales_table import (
+    BONUSES,
+    CLIENT,
+    DATE,
+    END_DATE,
+    ID,
+    LAUNCH_TYPE,
+    MODE,
+    PRICE,
+    PROMOCODE,
+    START_DATE,
+    STATE,
+    WASHING_COLUMNS,
+)
+
+EXTRA_COLUMNS = ("Терминал", "Оплата", "Сдача", "Чек", "Комментарий")
+HEADERS = {
+    LAUNCH_TYPE: "Тип запуска<br>\n <span>БУМ</span>",
+    STATE: "Состояние<br>\n <span>БУМ</span>",
+    START_DATE: "Дата запуска<br>\n <span>БУМ</span>",
+    END_DATE: "Дата завершения<br>\n <span>БУМ</span>",
+    MODE: "Режим<br>\n <span>БУМ</span>",
+    BONUSES: "Бонусы<br>\n <span>Бонусы</span>",
+    PROMOCODE: "Промокод<br>\n <span>Промокоды</span>",
+}
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def create_sale(id: int, date: datetime) -> dict[str, str]:
+    automatic = id % 5 != 0
+    return {
+        ID: str(id),
+        DATE: date.strftime(DATE_FORMAT),
+        LAUNCH_TYPE: "Автоматический" if automatic else "Ручной",
+        STATE: "Завершено",
+        START_DATE: (date + timedelta(minutes=1)).strftime(DATE_FORMAT),
+        END_DATE: (date + timedelta(minutes=9)).strftime(DATE_FORMAT),
+        MODE: f"Режим {id % 4 + 1}",
+        CLIENT: f"+7(9{id % 100:02d}){id % 1000:03d}-{id % 100:02d}-{id % 97:02d}"
+        if id % 3
+        else "",
+        BONUSES: str(id % 50) if id % 3 else "",
+        PROMOCODE: f"Промокод №{id % 10}" if id % 7 == 0 else "",
+        PRICE: str(25000 + id % 10 * 1000),
+        **{column: f"{column} {id}" for column in EXTRA_COLUMNS},
+    }
+
+
+def create_sales_page(
+    rows: int, last_id: int = 100000, now: Optional[datetime] = None
+) -> str:
+    """Table sales page with rows from last_id in descending order, sale last_id is made now"""
+    columns = [*WASHING_COLUMNS, *EXTRA_COLUMNS]
+    header = "".join(f"<th>{HEADERS.get(column, column)}</th>" for column in columns)
+    now = now or datetime.now().replace(microsecond=0)
+    body = []
+    for i in range(rows):
+        sale = create_sale(last_id - i, now - timedelta(minutes=10 * i))
+        body.append("<tr>" + "".join(f"<td>{sale[c]}</td>" for c in columns) + "</tr>")
+    return (
+        "<html><body><table class='table'>"
+        f"<thead><tr>{header}</tr></thead><tbody>{''.join(body)}</tbody>"
+        "</table></body></html>"
+    )
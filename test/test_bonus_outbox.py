@@ -0,0 +1,231 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from redis.exceptions import ResponseError
+from app.services.terminal.bonus_outbox import (
+    BATCH_SIZE,
+    DEAD_LETTER_STREAM,
+    MAX_ATTEMPTS,
+    MAX_RETRY_DELAY,
+    OUTBOX_STREAM,
+    RETRY_DELAY,
+    BonusOperation,
+    BonusOutbox,
+    BonusOutboxWorker,
+    get_retry_delay,
+)
+from app.services.terminal.session import NoClientError
+
+STREAM = OUTBOX_STREAM.format(terminal_id=1)
+
+
+def _id_key(entry_id: str) -> int:
+    return int(entry_id.split("-")[0])
+
+
+class FakeRedis:
+    """Redis commands used by outbox, time is in milliseconds and moved by tests"""
+
+    def __init__(self) -> None:
+        self.clock = 0
+        self.values: dict[str, str] = {}
+        self.streams: dict[str, list[tuple[str, dict]]] = {}
+        self.groups: set[str] = set()
+        self.delivered: dict[str, int] = {}
+        # stream -> entry id -> [times delivered, delivery time]
+        self.pending: dict[str, dict[str, list[int]]] = {}
+        self.fail_xadd = False
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def xadd(self, name, fields):
+        if self.fail_xadd:
+            raise ConnectionError()
+        entries = self.streams.setdefault(name, [])
+        entry_id = f"{len(entries) + 1}-0"
+        entries.append((entry_id, dict(fields)))
+        return entry_id
+
+    async def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        if name in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups.add(name)
+        self.streams.setdefault(name, [])
+
+    async def xreadgroup(self, groupname, consumername, streams, count=None):
+        response = []
+        for name in streams:
+            start = self.delivered.get(name, 0)
+            entries = self.streams.get(name, [])[start : start + count]
+            self.delivered[name] = start + len(entries)
+            for entry_id, _ in entries:
+                self.pending.setdefault(name, {})[entry_id] = [1, self.clock]
+            if entries:
+                response.append([name, entries])
+        return response
+
+    async def xpending_range(self, name, groupname, min, max, count):
+        ids = sorted(self.pending.get(name, {}), key=_id_key)
+        if min.startswith("("):
+            ids = [i for i in ids if _id_key(i) > _id_key(min[1:])]
+        return [
+            {
+                "message_id": entry_id,
+                "consumer": "worker",
+                "time_since_delivered": self.clock - self.pending[name][entry_id][1],
+                "times_delivered": self.pending[name][entry_id][0],
+            }
+            for entry_id in ids[:count]
+        ]
+
+    async def xclaim(self, name, groupname, consumername, min_idle_time, message_ids):
+        fields = dict(self.streams[name])
+        for entry_id in message_ids:
+            self.pending[name][entry_id][0] += 1
+            self.pending[name][entry_id][1] = self.clock
+        return [(entry_id, fields[entry_id]) for entry_id in message_ids]
+
+    async def xack(self, name, groupname, *ids):
+        for entry_id in ids:
+            self.pending.get(name, {}).pop(entry_id, None)
+
+
+class FakeSession:
+    terminal_id = 1
+
+    def __init__(self) -> None:
+        self.add_bonuses_by_phone = AsyncMock()
+        self.invalidate_partner_id = MagicMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+def create_operation(key: str = "key") -> BonusOperation:
+    return BonusOperation(1, "+79001234567", 100, "За плохой отзыв", key)
+
+
+class TestBonusOutbox(unittest.TestCase):
+    def test_operation_dumps_loads(self):
+        operation = create_operation()
+        self.assertEqual(BonusOperation.loads(operation.dumps().encode()), operation)
+
+    def test_retry_delay_grows_to_max(self):
+        self.assertEqual(get_retry_delay(1), RETRY_DELAY)
+        self.assertEqual(get_retry_delay(3), RETRY_DELAY * 4)
+        self.assertEqual(get_retry_delay(100), MAX_RETRY_DELAY)
+
+    def test_enqueue_once(self):
+        redis = FakeRedis()
+        outbox = BonusOutbox(redis)
+        self.assertTrue(asyncio.run(outbox.enqueue(create_operation())))
+        self.assertFalse(asyncio.run(outbox.enqueue(create_operation())))
+        self.assertEqual(len(redis.streams[STREAM]), 1)
+
+    def test_failed_enqueue_can_be_repeated(self):
+        redis = FakeRedis()
+        outbox = BonusOutbox(redis)
+        redis.fail_xadd = True
+        with self.assertRaises(ConnectionError):
+            asyncio.run(outbox.enqueue(create_operation()))
+        redis.fail_xadd = False
+        self.assertTrue(asyncio.run(outbox.enqueue(create_operation())))
+
+
+class TestBonusOutboxWorker(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.outbox = BonusOutbox(self.redis)
+        self.session = FakeSession()
+        self.worker = BonusOutboxWorker(self.outbox, [self.session])
+
+    def enqueue(self, count: int = 1):
+        for i in range(count):
+            asyncio.run(self.outbox.enqueue(create_operation(f"key{i}")))
+
+    def drain(self, after: float = 0):
+        self.redis.clock += after * 1000
+        asyncio.run(self.worker.drain())
+
+    def test_operation_is_sent_once(self):
+        self.enqueue()
+        self.drain()
+        self.drain(MAX_RETRY_DELAY)
+
+        self.session.add_bonuses_by_phone.assert_awaited_once_with(
+            "+79001234567", 100, "За плохой отзыв"
+        )
+        self.assertEqual(self.redis.pending[STREAM], {})
+        self.assertTrue(asyncio.run(self.outbox.is_done(create_operation("key0"))))
+
+    def test_done_operation_is_not_sent_again(self):
+        self.enqueue()
+        asyncio.run(self.outbox.mark_done(create_operation("key0")))
+        self.drain()
+
+        self.session.add_bonuses_by_phone.assert_not_awaited()
+        self.assertEqual(self.redis.pending[STREAM], {})
+
+    def test_failed_operation_is_retried_after_delay(self):
+        self.session.add_bonuses_by_phone.side_effect = [OSError(), None]
+        self.enqueue()
+        self.drain()
+        self.drain(RETRY_DELAY / 2)
+        self.assertEqual(self.session.add_bonuses_by_phone.await_count, 1)
+
+        self.drain(RETRY_DELAY)
+        self.assertEqual(self.session.add_bonuses_by_phone.await_count, 2)
+        self.assertEqual(self.redis.pending[STREAM], {})
+
+    def test_no_client_is_retried(self):
+        self.session.add_bonuses_by_phone.side_effect = [NoClientError(), None]
+        self.enqueue()
+        self.drain()
+        self.drain(RETRY_DELAY)
+
+        self.assertEqual(self.session.add_bonuses_by_phone.await_count, 2)
+        self.assertNotIn(DEAD_LETTER_STREAM, self.redis.streams)
+        # Cached "no client" of the first try isn't used on retry
+        self.session.invalidate_partner_id.assert_called_once_with("+79001234567")
+
+    def test_operation_is_dropped_after_max_attempts(self):
+        self.session.add_bonuses_by_phone.side_effect = OSError()
+        self.enqueue()
+        for _ in range(MAX_ATTEMPTS + 1):
+            self.drain(MAX_RETRY_DELAY)
+
+        self.assertEqual(self.session.add_bonuses_by_phone.await_count, MAX_ATTEMPTS)
+        self.assertEqual(len(self.redis.streams[DEAD_LETTER_STREAM]), 1)
+        self.assertEqual(self.redis.pending[STREAM], {})
+
+    def test_due_entry_after_waiting_entries_is_claimed(self):
+        self.session.add_bonuses_by_phone.side_effect = OSError()
+        self.enqueue(BATCH_SIZE + 1)
+        self.drain()
+        self.drain()
+        # The oldest entries wait long backoff, the last one is due
+        for entry_id, delivery in self.redis.pending[STREAM].items():
+            delivery[0] = MAX_ATTEMPTS - 1
+        self.redis.pending[STREAM][f"{BATCH_SIZE + 1}-0"][0] = 1
+        self.redis.clock += RETRY_DELAY * 1000
+
+        claimed = asyncio.run(self.worker.claim_retries(STREAM))
+
+        self.assertEqual([entry[0] for entry in claimed], [f"{BATCH_SIZE + 1}-0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+from dataclasses import replace
+from unittest.mock import MagicMock, patch
+from app.services.cameras.registry import CameraRegistry
+from app.settings.camera import CameraConfig, CameraURI
+
+
+def create_config(name: str, tags: list[str]) -> CameraConfig:
+    return CameraConfig(
+        camera_uri=CameraURI(login="", password="", host=name, port="", protocol="rtsp", path=""),
+        name=name,
+        description=name,
+        tags=tags,
+    )
+
+
+class TestCameraRegistry(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('app.services.cameras.camera_stream.VideoCaptureThreaded')
+        self.mock_VideoCaptureThreaded = patcher.start()
+        self.mock_VideoCaptureThreaded.side_effect = lambda *args, **kwargs: MagicMock()
+        self.addCleanup(patcher.stop)
+        self.configs = [create_config("first", ["queue"]), create_config("second", ["operator"])]
+        self.registry = CameraRegistry(self.configs)
+
+    def test_tag_index(self):
+        self.assertEqual([c.name for c in self.registry.by_tag("queue")], ["first"])
+        self.assertEqual([c.name for c in self.registry.by_tag("operator")], ["second"])
+        self.assertEqual(self.registry.by_tag("unknown"), [])
+        self.assertEqual(len(self.registry), 2)
+
+    def test_update_keeps_unchanged_cameras(self):
+        first = self.registry.get("first")
+        second = self.registry.get("second")
+        third = create_config("third", ["queue"])
+        changed_second = replace(self.configs[1], tags=["queue"], refresh_interval=1)
+
+        self.registry.update([self.configs[0], changed_second, third])
+
+        self.assertIs(self.registry.get("first"), first)
+        self.assertIsNot(self.registry.get("second"), second)
+        second.cam.stop.assert_called_once()
+        first.cam.stop.assert_not_called()
+        self.assertEqual(
+            [c.name for c in self.registry.by_tag("queue")], ["first", "second", "third"]
+        )
+
+    def test_update_description_keeps_stream(self):
+        first = self.registry.get("first")
+        changed_first = replace(
+            self.configs[0], description="new", tags=["queue", "operator"]
+        )
+
+        self.registry.update([changed_first, self.configs[1]])
+
+        self.assertIs(self.registry.get("first"), first)
+        first.cam.stop.assert_not_called()
+        self.assertEqual(first.description, "new")
+        self.assertEqual(
+            [c.name for c in self.registry.by_tag("operator")], ["first", "second"]
+        )
+
+    def test_update_removes_cameras(self):
+        second = self.registry.get("second")
+        mosaic = self.registry.mosaic("operator")
+        self.registry.update(self.configs[:1])
+        self.assertIsNone(self.registry.get("second"))
+        second.cam.stop.assert_called_once()
+        self.assertEqual(self.registry.by_tag("operator"), [])
+        self.assertEqual(mosaic.cameras, [])
+
+    def test_mosaic_doesnt_wait_for_stopping_camera(self):
+        second = self.registry.get("second")
+        stopping, released = threading.Event(), threading.Event()
+
+        def stop():
+            stopping.set()
+            released.wait(5)
+
+        second.cam.stop.side_effect = stop
+        update = threading.Thread(target=self.registry.update, args=(self.configs[:1],))
+        update.start()
+        try:
+            self.assertTrue(stopping.wait(5))
+            mosaics = []
+            reader = threading.Thread(
+                target=lambda: mosaics.append(self.registry.mosaic("operator"))
+            )
+            reader.start()
+            reader.join(1)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual(mosaics[0].cameras, [])
+            self.assertIsNone(self.registry.get("second"))
+        finally:
+            released.set()
+            update.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
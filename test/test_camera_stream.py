@@ -1,16 +1,33 @@
+import asyncio
+import time
 import unittest
 from unittest.mock import patch, MagicMock
-from app.services.cameras.camera_stream import CameraStream, get_image, get_input_media_photo_to_send
-from app.settings.camera import CameraURI
-from app.settings.config import Config
+from app.services.cameras.camera_stream import (
+    CameraStream,
+    CameraWarmingUpError,
+    Snapshot,
+    create_input_media_photo,
+    get_caption,
+    get_image,
+    get_snapshot,
+    get_input_media_photo_to_send,
+    get_snapshot_async,
+    save_file_ids,
+)
+from app.services.cameras.video_capture import CameraState, Frame
+from app.settings.camera import DEFAULT_REFRESH_INTERVAL, CameraURI, CaptureMode
 import numpy as np
 
 
 class TestCameraStream(unittest.TestCase):
     def setUp(self):
-        self.camera_uri = CameraURI(url="test_url")
-        self.config = Config()
-        self.config.constants = MagicMock()
+        patcher = patch('app.services.cameras.camera_stream.VideoCaptureThreaded')
+        self.mock_VideoCaptureThreaded = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.camera_uri = CameraURI(
+            login="", password="", host="test_host", port="", protocol="rtsp", path=""
+        )
+        self.config = MagicMock()
         self.config.constants.photo_update_delay = 10
         self.camera_stream = CameraStream(
             camera_uri=self.camera_uri,
@@ -19,33 +36,126 @@ class TestCameraStream(unittest.TestCase):
             tags=["test"]
         )
 
-    @patch('app.services.cameras.camera_stream.VideoCaptureThreaded')
-    def test_activate_camera(self, mock_VideoCaptureThreaded):
+    def test_activate_camera(self):
         self.camera_stream._activate_camera()
-        mock_VideoCaptureThreaded.assert_called_with("test_url")
+        self.mock_VideoCaptureThreaded.assert_called_with(
+            self.camera_uri.url,
+            capture_mode=CaptureMode.READ,
+            refresh_interval=DEFAULT_REFRESH_INTERVAL,
+        )
 
     @patch('app.services.cameras.camera_stream.CameraStream.get_last_frame')
     def test_update_image(self, mock_get_last_frame):
-        mock_get_last_frame.return_value = (True, np.array([1, 2, 3]))
+        image = np.full((36, 64, 3), 128, dtype=np.uint8)
+        mock_get_last_frame.return_value = Frame(image, 1)
+        self.camera_stream.update_image()
+        self.assertIs(self.camera_stream.image, image)
+        self.assertEqual(self.camera_stream.image_generation, 1)
+
+        self.camera_stream.update_image()
+        self.assertEqual(self.camera_stream.image_generation, 1)
+
+    @patch('app.services.cameras.camera_stream.CameraStream.get_last_frame')
+    def test_static_scene_keeps_image(self, mock_get_last_frame):
+        image = np.full((36, 64, 3), 128, dtype=np.uint8)
+        mock_get_last_frame.return_value = Frame(image, 1)
+        self.camera_stream.update_image()
+
+        noisy = image.copy()
+        noisy[0, 0] = 200
+        mock_get_last_frame.return_value = Frame(noisy, 2)
+        self.camera_stream.update_image()
+        self.assertIs(self.camera_stream.image, image)
+        self.assertEqual(self.camera_stream.image_generation, 1)
+
+        changed = image.copy()
+        changed[:, :32] = 250
+        mock_get_last_frame.return_value = Frame(changed, 3)
+        self.camera_stream.update_image()
+        self.assertIs(self.camera_stream.image, changed)
+        self.assertEqual(self.camera_stream.image_generation, 2)
+
+    @patch('app.services.cameras.camera_stream.CameraStream.get_last_frame')
+    def test_static_image_expires(self, mock_get_last_frame):
+        image = np.full((36, 64, 3), 128, dtype=np.uint8)
+        mock_get_last_frame.return_value = Frame(image, 1)
+        self.camera_stream.update_image()
+
+        same = image.copy()
+        mock_get_last_frame.return_value = Frame(same, 1 + self.camera_stream.max_image_age + 1)
         self.camera_stream.update_image()
-        self.assertTrue((self.camera_stream.image == np.array([1, 2, 3])).all())
+        self.assertIs(self.camera_stream.image, same)
+        self.assertEqual(self.camera_stream.image_generation, 2)
+
+    def test_lazy_camera(self):
+        self.mock_VideoCaptureThreaded.reset_mock()
+        camera = CameraStream(self.camera_uri, "Lazy", "Lazy", [], lazy=True)
+        self.mock_VideoCaptureThreaded.assert_not_called()
+        self.assertTrue(camera.is_warming_up)
+
+        self.mock_VideoCaptureThreaded.return_value.read_frame.return_value = None
+        self.mock_VideoCaptureThreaded.return_value.is_warming_up = True
+        with self.assertRaises(CameraWarmingUpError):
+            get_snapshot(camera, self.config)
+        self.mock_VideoCaptureThreaded.assert_called_once()
+
+    def test_caption_of_stale_camera(self):
+        snapshot = Snapshot(generation=1, data=b"", timestamp=0)
+        self.camera_stream.cam.state = CameraState.LIVE
+        self.assertEqual(get_caption(self.camera_stream, snapshot), "Test Description")
+        self.camera_stream.cam.state = CameraState.STALE
+        self.assertIn("Камера недоступна", get_caption(self.camera_stream, snapshot))
 
     @patch('app.services.cameras.camera_stream.CameraStream.update_image')
     def test_get_image(self, mock_update_image):
-        self.camera_stream.image = np.array([1, 2, 3])
+        self.camera_stream.image = np.zeros((4, 4, 3), dtype=np.uint8)
         img = get_image(self.camera_stream, self.config)
-        self.assertIsNotNone(img)
+        self.assertIsInstance(img, bytes)
+        self.assertTrue(img.startswith(b"\xff\xd8"))
+
+    @patch('app.services.cameras.encoding.cv2.imencode')
+    def test_get_image_encodes_once_per_generation(self, mock_imencode):
+        mock_imencode.return_value = (True, np.frombuffer(b"jpeg", dtype=np.uint8))
+        self.camera_stream.image = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.camera_stream.last_photo_time = float("inf")
 
-    @patch('app.services.cameras.camera_stream.get_image')
-    def test_get_input_media_photo_to_send(self, mock_get_image):
-        mock_get_image.return_value = b"image_data"
+        first = get_image(self.camera_stream, self.config)
+        second = get_image(self.camera_stream, self.config)
+        self.assertIs(first, second)
+        self.assertEqual(mock_imencode.call_count, 1)
+
+        self.camera_stream.image_generation += 1
+        get_image(self.camera_stream, self.config)
+        self.assertEqual(mock_imencode.call_count, 2)
+
+    @patch('app.services.cameras.camera_stream.get_snapshot')
+    def test_get_input_media_photo_to_send(self, mock_get_snapshot):
+        mock_get_snapshot.return_value = Snapshot(generation=1, data=b"image_data")
         media_photo = get_input_media_photo_to_send(self.camera_stream, self.config)
         self.assertEqual(media_photo.media.filename, "file.txt")
-        self.assertEqual(media_photo.media.file.read(), b"image_data")
+        self.assertEqual(media_photo.media.data, b"image_data")
+
+    def test_uploaded_snapshot_is_sent_by_file_id(self):
+        snapshot = Snapshot(generation=1, data=b"image_data")
+        message = MagicMock()
+        message.photo[-1].file_id = "file_id"
 
-    def tearDown(self):
-        self.camera_stream.cam.stop()
+        save_file_ids([snapshot], [message])
+        media_photo = create_input_media_photo(snapshot, "caption")
+        self.assertEqual(media_photo.media, "file_id")
+
+    def test_get_snapshot_async(self):
+        self.camera_stream.image = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.camera_stream.last_photo_time = float("inf")
+        snapshot = asyncio.run(get_snapshot_async(self.camera_stream, self.config, 1))
+        self.assertIs(snapshot, self.camera_stream.snapshot)
+
+    @patch('app.services.cameras.camera_stream.CameraStream.update_image')
+    def test_get_snapshot_async_timeout(self, mock_update_image):
+        mock_update_image.side_effect = lambda: time.sleep(0.5)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(get_snapshot_async(self.camera_stream, self.config, 0.05))
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
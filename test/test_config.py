@@ -0,0 +1,30 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock
+from app.settings.config import is_open
+
+
+def time(value):
+    return datetime.time.fromisoformat(value)
+
+
+class TestIsOpen(unittest.TestCase):
+    def test_always_open_without_hours(self):
+        constants = MagicMock(opening_time=None, closing_time=None)
+        self.assertTrue(is_open(constants, time("03:00")))
+
+    def test_hours(self):
+        constants = MagicMock(opening_time=time("08:00"), closing_time=time("22:00"))
+        self.assertTrue(is_open(constants, time("08:00")))
+        self.assertFalse(is_open(constants, time("22:00")))
+        self.assertFalse(is_open(constants, time("03:00")))
+
+    def test_closing_after_midnight(self):
+        constants = MagicMock(opening_time=time("08:00"), closing_time=time("02:00"))
+        self.assertTrue(is_open(constants, time("01:00")))
+        self.assertTrue(is_open(constants, time("23:00")))
+        self.assertFalse(is_open(constants, time("05:00")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from app.services.cameras.encoding import encode_frame, resize_frame
+from app.settings.camera import EncodingProfile
+
+
+def create_frame(width=640, height=480) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_resize_keeps_aspect_ratio(self):
+        frame = resize_frame(create_frame(), EncodingProfile(width=320, height=320))
+        self.assertEqual(frame.shape, (240, 320, 3))
+
+    def test_resize_never_upscales(self):
+        frame = create_frame()
+        self.assertIs(resize_frame(frame, EncodingProfile(width=1280)), frame)
+
+    def test_encode_default(self):
+        data = encode_frame(create_frame(), EncodingProfile())
+        self.assertTrue(data.startswith(b"\xff\xd8"))
+
+    def test_lower_quality_is_smaller(self):
+        frame = create_frame()
+        high = encode_frame(frame, EncodingProfile(quality=95))
+        low = encode_frame(frame, EncodingProfile(quality=50))
+        self.assertLess(len(low), len(high))
+
+    def test_max_bytes(self):
+        frame = create_frame()
+        full = encode_frame(frame, EncodingProfile())
+        max_bytes = len(full) // 2
+        data = encode_frame(frame, EncodingProfile(max_bytes=max_bytes))
+        self.assertLessEqual(len(data), max_bytes)
+
+    def test_progressive(self):
+        data = encode_frame(create_frame(), EncodingProfile(progressive=True))
+        self.assertIn(b"\xff\xc2", data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+import weakref
+from unittest.mock import MagicMock
+import cv2
+import numpy as np
+from app.services.cameras.camera_stream import CameraStream, get_snapshot
+from app.services.cameras.frame_source import SyntheticSource, VideoFileSource
+from app.services.cameras.video_capture import (
+    FRAME_BUFFERS,
+    CameraState,
+    VideoCaptureThreaded,
+)
+from app.settings.camera import CameraURI, CaptureMode
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestSyntheticSource(unittest.TestCase):
+    def test_frames_change(self):
+        source = SyntheticSource(64, 36, fps=None)
+        self.assertTrue(source.open())
+        _, first = source.read()
+        _, second = source.read()
+        self.assertEqual(first.shape, (36, 64, 3))
+        self.assertFalse(np.array_equal(first, second))
+        self.assertGreater(first.mean(), 8)
+
+    def test_fps(self):
+        source = SyntheticSource(64, 36, fps=50)
+        source.open()
+        start = time.monotonic()
+        for _ in range(6):
+            source.grab()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_released(self):
+        source = SyntheticSource(64, 36)
+        self.assertEqual(source.read(), (False, None))
+
+
+class TestVideoFileSource(unittest.TestCase):
+    def test_loop(self):
+        path = os.path.join(tempfile.mkdtemp(), "video.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 36))
+        for _ in range(3):
+            writer.write(np.full((36, 64, 3), 128, dtype=np.uint8))
+        writer.release()
+
+        source = VideoFileSource(path)
+        self.assertTrue(source.open())
+        self.assertTrue(all(source.read()[0] for _ in range(10)))
+        source.release()
+
+        source = VideoFileSource(path, loop=False)
+        source.open()
+        self.assertFalse(all(source.read()[0] for _ in range(10)))
+        source.release()
+
+
+class TestFrameBuffers(unittest.TestCase):
+    def setUp(self):
+        self.cam = VideoCaptureThreaded(SyntheticSource(64, 36, fps=None))
+        self.cam.source.open()
+
+    def test_buffers_reused(self):
+        for _ in range(FRAME_BUFFERS):
+            self.cam._read()
+        buffers = [weakref.ref(buffer) for buffer in self.cam._buffers]
+        for _ in range(10):
+            self.cam._read()
+            image = self.cam.read_frame().image
+            self.assertTrue(any(np.shares_memory(buffer(), image) for buffer in buffers))
+
+    def test_held_frame_not_overwritten(self):
+        self.cam._read()
+        held = self.cam.read_frame()
+        expected = held.image.copy()
+        self.assertFalse(held.image.flags.writeable)
+        for _ in range(10):
+            self.cam._read()
+        self.assertTrue(np.array_equal(held.image, expected))
+        self.assertGreater(self.cam.read_frame().generation, held.generation)
+
+    def test_held_part_of_frame_not_overwritten(self):
+        self.cam._read()
+        part = self.cam.read_frame().image[10:20, 10:20]
+        expected = part.copy()
+        for _ in range(10):
+            self.cam._read()
+        self.assertTrue(np.array_equal(part, expected))
+
+    def test_released_frame_buffer_is_reused(self):
+        self.cam._read()
+        held = self.cam.read_frame().image
+        del held
+        self.cam._read()
+        self.cam._read()
+        self.cam._read()
+        self.assertIsNotNone(self.cam._get_free_buffer())
+
+
+class TestCaptureFromSource(unittest.TestCase):
+    def test_capture_modes(self):
+        for mode in CaptureMode:
+            cam = VideoCaptureThreaded(
+                SyntheticSource(64, 36, fps=100), capture_mode=mode
+            )
+            cam.start()
+            try:
+                self.assertTrue(wait_for(lambda: cam.state == CameraState.LIVE))
+                self.assertEqual(cam.read_frame().image.shape, (36, 64, 3))
+            finally:
+                cam.stop()
+
+    def test_camera_stream_snapshot(self):
+        uri = CameraURI(login="", password="", host="", port="", protocol="rtsp", path="")
+        camera = CameraStream(
+            uri, "synthetic", "Synthetic", [], frame_source=SyntheticSource(64, 36, fps=100)
+        )
+        config = MagicMock()
+        config.constants.photo_update_delay = 10
+        try:
+            self.assertTrue(wait_for(lambda: not camera.is_warming_up))
+            snapshot = get_snapshot(camera, config)
+            self.assertTrue(snapshot.data.startswith(b"\xff\xd8"))
+        finally:
+            camera.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
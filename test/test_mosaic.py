@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from app.services.cameras.camera_stream import CameraStream
+from app.services.cameras.mosaic import Mosaic, build_mosaic
+from app.services.cameras.video_capture import Frame
+from app.settings.camera import CameraURI
+
+
+class TestBuildMosaic(unittest.TestCase):
+    def test_grid(self):
+        images = [np.full((100, 200, 3), value, dtype=np.uint8) for value in (50, 100, 150)]
+        mosaic = build_mosaic(images, ["", "", ""], tile_width=40, tile_height=20)
+        self.assertEqual(mosaic.shape, (40, 80, 3))
+        self.assertEqual(mosaic[18, 30, 0], 50)
+        self.assertEqual(mosaic[18, 70, 0], 100)
+        self.assertEqual(mosaic[38, 30, 0], 150)
+        self.assertEqual(mosaic[38, 70, 0], 0)
+
+    def test_caption(self):
+        image = np.full((100, 200, 3), 128, dtype=np.uint8)
+        mosaic = build_mosaic([image], ["cam"], tile_width=200, tile_height=100)
+        self.assertFalse((mosaic[:20, :40] == 128).all())
+        self.assertTrue((mosaic[-10:] == 128).all())
+
+    def test_letterbox(self):
+        # 4:3 image is centered in 16:9 tile with black bars at the sides
+        image = np.full((300, 400, 3), 128, dtype=np.uint8)
+        mosaic = build_mosaic([image], [""], tile_width=160, tile_height=90)
+        self.assertEqual(mosaic.shape, (90, 160, 3))
+        self.assertTrue((mosaic[:, :20] == 0).all())
+        self.assertTrue((mosaic[:, 140:] == 0).all())
+        self.assertTrue((mosaic[30:, 20:140] == 128).all())
+
+
+class TestMosaic(unittest.TestCase):
+    @patch('app.services.cameras.camera_stream.VideoCaptureThreaded')
+    def setUp(self, mock_VideoCaptureThreaded):
+        uri = CameraURI(login="", password="", host="test", port="", protocol="rtsp", path="")
+        self.cameras = [CameraStream(uri, f"cam{i}", f"Camera {i}", ["queue"]) for i in range(2)]
+        for camera in self.cameras:
+            camera.cam = MagicMock()
+            camera.cam.read_frame.return_value = Frame(np.full((10, 10, 3), 128, dtype=np.uint8), 1)
+        self.config = MagicMock()
+        self.config.constants.photo_update_delay = 10
+        self.mosaic = Mosaic(self.cameras, tile_width=20, tile_height=10)
+
+    @patch('app.services.cameras.mosaic.encode_frame')
+    def test_encoded_once_per_camera_change(self, mock_convert):
+        mock_convert.return_value = b"jpeg"
+        first = self.mosaic.get_snapshot(self.config)
+        self.assertIs(self.mosaic.get_snapshot(self.config), first)
+        self.assertEqual(mock_convert.call_count, 1)
+
+        self.cameras[1].cam.read_frame.return_value = Frame(np.full((10, 10, 3), 64, dtype=np.uint8), 2)
+        self.cameras[1].last_photo_time = 0
+        second = self.mosaic.get_snapshot(self.config)
+        self.assertNotEqual(second.generation, first.generation)
+        self.assertEqual(mock_convert.call_count, 2)
+        self.assertIn("Camera 1", self.mosaic.get_caption())
+
+
+if __name__ == '__main__':
+    unittest.main()
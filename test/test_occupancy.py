@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from app.services.cameras.occupancy import QueueEstimator, QueueMonitor
+from app.services.cameras.video_capture import CameraState, Frame
+
+
+def background():
+    return np.full((90, 160, 3), 100, dtype=np.uint8)
+
+
+def with_car(frame, x1, x2):
+    frame = frame.copy()
+    frame[30:80, x1:x2] = 250
+    return frame
+
+
+class TestQueueEstimator(unittest.TestCase):
+    def setUp(self):
+        regions = [[(0, 0), (0.5, 0), (0.5, 1), (0, 1)], [(0.5, 0), (1, 0), (1, 1), (0.5, 1)]]
+        self.estimator = QueueEstimator(regions, background())
+
+    def test_counts_occupied_regions(self):
+        for _ in range(10):
+            self.estimator.estimate(background())
+        estimate = self.estimator.estimate(with_car(background(), 10, 70))
+        self.assertEqual(estimate.cars, 1)
+        estimate = self.estimator.estimate(with_car(with_car(background(), 10, 70), 90, 150))
+        self.assertEqual(estimate.cars, 2)
+
+    def test_starts_with_occupied_queue(self):
+        occupied = with_car(background(), 10, 70)
+        for _ in range(10):
+            self.assertEqual(self.estimator.estimate(occupied).cars, 1)
+        self.assertEqual(self.estimator.estimate(background()).cars, 0)
+
+    def test_background_of_other_size(self):
+        estimator = QueueEstimator([], np.full((480, 640, 3), 100, dtype=np.uint8))
+        self.assertEqual(estimator.estimate(background()).occupancy, 0)
+
+    def test_scene_not_matching_background(self):
+        estimator = QueueEstimator([[(0, 0), (0.5, 0), (0.5, 1), (0, 1)]], background())
+        self.assertIsNone(estimator.estimate(np.full((90, 160, 3), 200, dtype=np.uint8)))
+
+    def test_occupancy_without_regions(self):
+        estimator = QueueEstimator([], background())
+        estimate = estimator.estimate(with_car(background(), 10, 150))
+        self.assertIsNone(estimate.cars)
+        self.assertGreater(estimate.occupancy, 0.2)
+
+
+class TestQueueMonitor(unittest.TestCase):
+    def setUp(self):
+        self.camera = MagicMock()
+        self.camera.name = "cam"
+        self.camera.description = "Camera"
+        self.camera.queue_regions = []
+        self.camera.queue_background = "empty.png"
+        self.camera.state = CameraState.LIVE
+        self.camera.cam.read_frame.side_effect = lambda: Frame(
+            background(), time.time()
+        )
+        patcher = patch(
+            "app.services.cameras.occupancy.load_queue_background",
+            side_effect=lambda path: background(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = MagicMock()
+        self.registry.by_tag.return_value = [self.camera]
+        self.monitor = QueueMonitor(self.registry)
+
+    def test_summary(self):
+        self.assertIsNone(self.monitor.get_summary())
+        self.monitor.update()
+        summary = self.monitor.get_summary()
+        self.assertIn("Camera: очереди нет", summary)
+
+    def test_camera_without_background_is_left_out(self):
+        self.camera.queue_background = None
+        self.monitor.update()
+        self.assertIsNone(self.monitor.get_summary())
+
+    def test_lazy_camera_is_not_started(self):
+        self.camera.cam = None
+        self.monitor.update()
+        self.assertIsNone(self.monitor.get_summary())
+
+    def test_down_camera_is_left_out(self):
+        self.monitor.update()
+        self.camera.state = CameraState.DOWN
+        self.monitor.update()
+        self.assertIsNone(self.monitor.get_summary())
+        self.assertEqual(self.monitor.estimates, {})
+
+    def test_old_frame_is_left_out(self):
+        self.monitor.update()
+        self.camera.cam.read_frame.side_effect = lambda: Frame(background(), 1)
+        self.monitor.update()
+        self.assertIsNone(self.monitor.get_summary())
+
+    def test_summary_expires(self):
+        self.monitor.update()
+        self.monitor.summary_time = 0
+        self.assertIsNone(self.monitor.get_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from app.services.terminal.partner_cache import PartnerIdCache
+
+
+class TestPartnerIdCache(unittest.TestCase):
+    def test_partner_id_expires(self):
+        cache = PartnerIdCache(ttl=10, no_partner_ttl=1)
+        cache.set("+7(900)000-00-00", 42, now=0)
+
+        self.assertEqual(cache.get("+7(900)000-00-00", now=9).partner_id, 42)
+        self.assertIsNone(cache.get("+7(900)000-00-00", now=10))
+        self.assertEqual(len(cache), 0)
+
+    def test_no_partner_is_cached_for_shorter_time(self):
+        cache = PartnerIdCache(ttl=10, no_partner_ttl=1)
+        cache.set("+7(900)000-00-00", None, now=0)
+
+        entry = cache.get("+7(900)000-00-00", now=0.5)
+        self.assertIsNotNone(entry)
+        self.assertIsNone(entry.partner_id)
+        self.assertIsNone(cache.get("+7(900)000-00-00", now=1))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = PartnerIdCache(max_size=2)
+        cache.set("1", 1, now=0)
+        cache.set("2", 2, now=0)
+        cache.get("1", now=0)
+        cache.set("3", 3, now=0)
+
+        self.assertIsNotNone(cache.get("1", now=0))
+        self.assertIsNone(cache.get("2", now=0))
+        self.assertIsNotNone(cache.get("3", now=0))
+
+    def test_invalidate(self):
+        cache = PartnerIdCache()
+        cache.set("1", 1)
+        cache.invalidate("1")
+        cache.invalidate("2")
+
+        self.assertIsNone(cache.get("1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.scheduler.washings_handling.polling import (
+    AdaptiveInterval,
+    TerminalPoller,
+)
+from app.settings.terminal import Terminal
+
+
+class TestAdaptiveInterval(unittest.TestCase):
+    def test_backoff_to_ceiling(self):
+        interval = AdaptiveInterval(10, 50)
+        self.assertEqual(
+            [interval.update(changed=False) for _ in range(4)], [20, 40, 50, 50]
+        )
+
+    def test_new_sales_reset_to_floor(self):
+        interval = AdaptiveInterval(10, 50)
+        interval.update(changed=False)
+        self.assertEqual(interval.update(changed=True), 10)
+
+    def test_closed_is_ceiling(self):
+        interval = AdaptiveInterval(10, 50)
+        self.assertEqual(interval.update(changed=True, opened=False), 50)
+
+
+class TestTerminalPoller(unittest.TestCase):
+    def create_poller(self, poll):
+        scheduler = MagicMock()
+        terminal = Terminal(1, "", "", "", poll_interval_min=10, poll_interval_max=40)
+        constants = MagicMock(opening_time=None, closing_time=None)
+        return TerminalPoller(scheduler, terminal, constants, poll), scheduler
+
+    def test_start_adds_job(self):
+        poller, scheduler = self.create_poller(AsyncMock(return_value=True))
+        poller.start()
+        kwargs = scheduler.add_job.call_args.kwargs
+        self.assertEqual(kwargs["seconds"], 10)
+        self.assertEqual(kwargs["id"], "poll_terminal_1")
+
+    def test_reschedule_only_on_change(self):
+        poller, scheduler = self.create_poller(AsyncMock(return_value=True))
+        asyncio.run(poller.poll())
+        scheduler.reschedule_job.assert_not_called()
+
+        poller._poll.return_value = False
+        asyncio.run(poller.poll())
+        scheduler.reschedule_job.assert_called_once_with(
+            "poll_terminal_1", trigger="interval", seconds=20
+        )
+
+    def test_failed_poll_backs_off(self):
+        poller, scheduler = self.create_poller(AsyncMock(side_effect=OSError()))
+        with self.assertRaises(OSError):
+            asyncio.run(poller.poll())
+        self.assertEqual(poller.interval.interval, 20)
+
+    def test_closed_terminal_is_polled_rarely(self):
+        poller, scheduler = self.create_poller(AsyncMock(return_value=True))
+        with patch(
+            "app.services.scheduler.washings_handling.polling.is_open",
+            return_value=False,
+        ):
+            asyncio.run(poller.poll())
+        self.assertEqual(poller.interval.interval, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
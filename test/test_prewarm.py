@@ -0,0 +1,67 @@
+import asyncio
+import datetime
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.cameras.camera_stream import Snapshot
+from app.services.cameras.single_flight import SingleFlight
+from app.services.scheduler.cameras.prewarm import SnapshotsPrewarmer
+
+
+class TestSnapshotsPrewarmer(unittest.TestCase):
+    def setUp(self):
+        self.camera = MagicMock()
+        self.camera.description = "Camera"
+        self.camera.snapshot_flight = SingleFlight()
+        self.registry = MagicMock()
+        self.registry.by_tag.return_value = [self.camera]
+        self.config = MagicMock()
+        self.config.constants.opening_time = None
+        self.config.constants.closing_time = None
+        self.config.constants.queue_mosaic = False
+        self.config.constants.snapshot_timeout = 5
+        self.config.constants.snapshot_upload_chat_id = 100
+        self.bot = MagicMock()
+        message = MagicMock()
+        message.photo[-1].file_id = "file_id"
+        self.bot.send_photo = AsyncMock(return_value=message)
+        self.bot.delete_message = AsyncMock()
+        self.prewarmer = SnapshotsPrewarmer(self.bot, self.config, self.registry)
+
+    @patch('app.services.cameras.camera_stream.get_snapshot')
+    def test_prewarm_and_upload(self, mock_get_snapshot):
+        snapshot = Snapshot(generation=1, data=b"jpeg")
+        mock_get_snapshot.return_value = snapshot
+        asyncio.run(self.prewarmer.prewarm())
+        mock_get_snapshot.assert_called_once_with(self.camera, self.config, True)
+        self.assertEqual(snapshot.file_id, "file_id")
+        self.bot.delete_message.assert_awaited_once()
+
+        asyncio.run(self.prewarmer.prewarm())
+        self.bot.send_photo.assert_awaited_once()
+
+    @patch('app.services.cameras.camera_stream.get_snapshot')
+    def test_only_mosaic_is_prewarmed(self, mock_get_snapshot):
+        self.config.constants.queue_mosaic = True
+        mosaic = self.registry.mosaic.return_value
+        mosaic.get_snapshot_async = AsyncMock(
+            return_value=Snapshot(generation=1, data=b"mosaic")
+        )
+        mosaic.get_caption.return_value = "Mosaic"
+        asyncio.run(self.prewarmer.prewarm())
+
+        mock_get_snapshot.assert_not_called()
+        self.registry.mosaic.assert_called_once_with("queue")
+        self.bot.send_photo.assert_awaited_once()
+        self.assertEqual(self.bot.send_photo.await_args.kwargs["caption"], "Mosaic")
+
+    @patch('app.services.cameras.camera_stream.get_snapshot')
+    def test_closed(self, mock_get_snapshot):
+        now = datetime.datetime.now()
+        self.config.constants.opening_time = (now + datetime.timedelta(hours=1)).time()
+        self.config.constants.closing_time = (now + datetime.timedelta(hours=2)).time()
+        asyncio.run(self.prewarmer.prewarm())
+        mock_get_snapshot.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
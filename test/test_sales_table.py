@@ -0,0 +1,94 @@
+import io
+import unittest
+import pandas as pd
+from app.services.parser.sales_table import (
+    BONUSES,
+    ID,
+    LAUNCH_TYPE,
+    PRICE,
+    get_rows_digest,
+    iter_sales_rows,
+    to_numbers,
+)
+
+HEADER = """
+<tr>
+  <th>Id</th>
+  <th>Тип запуска<br>
+    <span>БУМ</span></th>
+  <th>Бонусы<br>
+    <span>Бонусы</span></th>
+  <th>Сумма</th>
+  <th>Комментарий</th>
+</tr>
+"""
+
+
+def create_page(ids):
+    rows = "".join(
+        f"<tr><td>{id}</td><td>Автоматический</td><td>{id % 2 or ''}</td>"
+        f"<td>{id * 12500:,}</td><td>comment</td></tr>"
+        for id in ids
+    )
+    return (
+        f"<html><body><table><thead>{HEADER}</thead><tbody>{rows}</tbody></table>"
+        "<table><tr><td>other</td></tr></table></body></html>"
+    )
+
+
+class TestIterSalesRows(unittest.TestCase):
+    def test_same_as_read_html(self):
+        # Amounts are formatted with thousands separators, e.g. 37,500
+        page = create_page([3, 2, 1, 1234])
+        df = pd.read_html(io.StringIO(page))[0]
+        rows = list(iter_sales_rows(page, [ID, LAUNCH_TYPE, BONUSES, PRICE]))
+        self.assertEqual(len(rows), len(df))
+        self.assertEqual(
+            to_numbers(pd.Series([row[PRICE] for row in rows])).tolist(),
+            df[PRICE].tolist(),
+        )
+        for row, (_, expected) in zip(rows, df.iterrows()):
+            self.assertEqual(set(row), {ID, LAUNCH_TYPE, BONUSES, PRICE})
+            self.assertEqual(int(row[ID]), expected[ID])
+            self.assertEqual(row[LAUNCH_TYPE], expected[LAUNCH_TYPE])
+            if pd.isna(expected[BONUSES]):
+                self.assertIsNone(row[BONUSES])
+            else:
+                self.assertEqual(int(row[BONUSES]), expected[BONUSES])
+
+    def test_stop_at_watermark(self):
+        page = create_page(range(10, 0, -1))
+        ids = [int(row[ID]) for row in iter_sales_rows(page, stop_at=7)]
+        self.assertEqual(ids, [10, 9, 8])
+
+    def test_no_stop_in_ascending_order(self):
+        page = create_page(range(1, 11))
+        ids = [int(row[ID]) for row in iter_sales_rows(page, stop_at=7)]
+        self.assertEqual(ids, list(range(1, 11)))
+
+    def test_empty_table(self):
+        page = f"<html><body><table><thead>{HEADER}</thead></table></body></html>"
+        self.assertEqual(list(iter_sales_rows(page)), [])
+
+
+class TestRowsDigest(unittest.TestCase):
+    def rows(self, ids):
+        page = create_page(ids)
+        return pd.DataFrame(list(iter_sales_rows(page)))
+
+    def test_same_rows(self):
+        df = self.rows([3, 2, 1])
+        self.assertEqual(get_rows_digest(df), get_rows_digest(self.rows([3, 2, 1])))
+        # Index is ignored, so filtered rows have the same digest
+        self.assertEqual(get_rows_digest(df[df[ID] != "3"]), get_rows_digest(self.rows([2, 1])))
+
+    def test_changed_rows(self):
+        df = self.rows([3, 2, 1])
+        changed = df.copy()
+        changed.loc[1, PRICE] = "1"
+        self.assertNotEqual(get_rows_digest(df), get_rows_digest(changed))
+        self.assertNotEqual(get_rows_digest(df), get_rows_digest(self.rows([4, 3, 2, 1])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from app.services.cameras import camera_process
+from app.services.cameras.camera_process import ProcessVideoCapture
+from app.services.cameras.shared_frames import SharedFrameRing
+from app.services.cameras.video_capture import STALE_TIMEOUT, CameraState
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise TimeoutError()
+        time.sleep(0.05)
+
+
+class TestSharedFrameRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedFrameRing(slots=3, max_frame_size=4 * 4 * 3)
+
+    def test_read_empty(self):
+        generation, _, frame = self.ring.read()
+        self.assertEqual(generation, 0)
+        self.assertIsNone(frame)
+
+    def test_write_read(self):
+        frame = np.full((4, 4, 3), 7, dtype=np.uint8)
+        self.ring.write(frame, 100.5)
+        generation, timestamp, view = self.ring.read()
+        self.assertEqual(generation, 1)
+        self.assertEqual(timestamp, 100.5)
+        self.assertTrue((view == frame).all())
+        self.assertFalse(view.flags.writeable)
+
+    def test_reader_from_other_handle(self):
+        reader = SharedFrameRing(self.ring.name, slots=3, max_frame_size=4 * 4 * 3, create=False)
+        self.ring.write(np.ones((2, 2, 3), dtype=np.uint8), 0)
+        generation, _, view = reader.read()
+        self.assertEqual(generation, 1)
+        self.assertEqual(view.shape, (2, 2, 3))
+        del view
+        reader.close()
+
+    def test_view_validity(self):
+        generation = self.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), 0)
+        self.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), 0)
+        self.assertTrue(self.ring.is_valid(generation))
+        self.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), 0)
+        self.assertFalse(self.ring.is_valid(generation))
+
+    def test_read_copy_is_not_overwritten(self):
+        self.ring.write(np.full((4, 4, 3), 1, dtype=np.uint8), 0)
+        generation, _, copy = self.ring.read_copy()
+        for value in range(2, 6):
+            self.ring.write(np.full((4, 4, 3), value, dtype=np.uint8), 0)
+        self.assertEqual(generation, 1)
+        self.assertTrue((copy == 1).all())
+        self.assertFalse(self.ring.is_valid(generation))
+
+    def test_read_copy_empty(self):
+        self.assertIsNone(self.ring.read_copy()[2])
+
+    def test_too_big_frame(self):
+        with self.assertRaises(ValueError):
+            self.ring.write(np.zeros((8, 8, 3), dtype=np.uint8), 0)
+
+    def test_request_frame(self):
+        self.ring.request_frame()
+        self.assertEqual(self.ring.requests, 1)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+
+class TestProcessVideoCapture(unittest.TestCase):
+    def test_kept_frame_is_not_overwritten(self):
+        cam = ProcessVideoCapture("", "test", "group", slots=3, max_frame_size=48)
+        try:
+            cam.ring.write(np.full((4, 4, 3), 1, dtype=np.uint8), 0)
+            frame = cam.read_frame()
+            grabbed, image = cam.read()
+            for value in range(2, 6):
+                cam.ring.write(np.full((4, 4, 3), value, dtype=np.uint8), 0)
+            self.assertTrue(grabbed)
+            self.assertEqual(frame.generation, 1)
+            self.assertTrue((frame.image == 1).all())
+            self.assertTrue((image == 1).all())
+        finally:
+            cam.stop()
+            cam.ring.close()
+            cam.ring.unlink()
+
+    def test_stale_without_new_frames(self):
+        cam = ProcessVideoCapture("", "test", "group", slots=3, max_frame_size=48)
+        try:
+            cam.ring.state = list(CameraState).index(CameraState.LIVE)
+            cam.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), time.time() - STALE_TIMEOUT - 1)
+            self.assertEqual(cam.state, CameraState.STALE)
+            cam.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), time.time())
+            self.assertEqual(cam.state, CameraState.LIVE)
+        finally:
+            cam.ring.close()
+            cam.ring.unlink()
+
+    @patch.multiple(camera_process, WORKER_CHECK_INTERVAL=0.1, INITIAL_BACKOFF=0.1)
+    def test_killed_worker_is_down_and_respawned(self):
+        cam = ProcessVideoCapture("", "test", "kill-test", slots=3, max_frame_size=48)
+        cam.start()
+        worker = camera_process.get_camera_worker("kill-test")
+        try:
+            wait_for(lambda: cam.state != CameraState.LIVE)
+            process = worker.process
+            process.kill()
+            process.join()
+            # Worker can't overwrite state anymore, camera looks live from shared memory
+            cam.ring.state = list(CameraState).index(CameraState.LIVE)
+            cam.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), time.time())
+            self.assertEqual(cam.state, CameraState.DOWN)
+
+            wait_for(lambda: worker.process is not process and worker.is_alive())
+            # Respawned worker captures the camera again and publishes its state
+            wait_for(lambda: cam.ring.state != list(CameraState).index(CameraState.LIVE))
+        finally:
+            cam.stop()
+            camera_process.stop_camera_workers()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from app.services.cameras.camera_stream import Snapshot, get_snapshot_async
+from app.services.cameras.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_call(self):
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        async def main():
+            flight = SingleFlight()
+            results = await asyncio.gather(*(flight.run(work) for _ in range(10)))
+            self.assertEqual(results, [1] * 10)
+            self.assertEqual(await flight.run(work), 2)
+
+        asyncio.run(main())
+
+    def test_cancelled_caller_does_not_cancel_call(self):
+        async def work():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def main():
+            flight = SingleFlight()
+            first = asyncio.ensure_future(flight.run(work))
+            second = asyncio.ensure_future(flight.run(work))
+            await asyncio.sleep(0)
+            first.cancel()
+            self.assertEqual(await second, "result")
+
+        asyncio.run(main())
+
+    @patch('app.services.cameras.camera_stream.get_snapshot')
+    def test_camera_snapshot_coalesced(self, mock_get_snapshot):
+        def slow_snapshot(*args):
+            time.sleep(0.05)
+            return Snapshot(generation=1, data=b"jpeg")
+
+        mock_get_snapshot.side_effect = slow_snapshot
+        camera = MagicMock()
+        camera.snapshot_flight = SingleFlight()
+        config = MagicMock()
+        config.constants.snapshot_timeout = 5
+
+        async def main():
+            return await asyncio.gather(
+                *(get_snapshot_async(camera, config) for _ in range(10))
+            )
+
+        snapshots = asyncio.run(main())
+        self.assertEqual(mock_get_snapshot.call_count, 1)
+        self.assertTrue(all(snapshot is snapshots[0] for snapshot in snapshots))
+
+
+if __name__ == '__main__':
+    unittest.main()
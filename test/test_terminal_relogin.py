@@ -0,0 +1,76 @@
+import unittest
+from aiohttp import web
+from app.services.terminal.session import TerminalSession
+
+
+class TestTerminalSessionRelogin(unittest.IsolatedAsyncioTestCase):
+    """Terminal site which redirects to login page until session cookie is set"""
+
+    async def asyncSetUp(self):
+        self.logins = 0
+        self.pages = 0
+        self.token = "1"
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/Account/Login", self.login_page),
+                web.post("/Account/Login", self.login),
+                web.get("/Admin", self.admin),
+                web.get("/Admin/_TableSales", self.table_sales),
+            ]
+        )
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        url = f"http://localhost:{self.runner.addresses[0][1]}"
+        self.session = TerminalSession(1, url, "admin", "admin")
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.runner.cleanup()
+
+    async def login_page(self, request: web.Request) -> web.Response:
+        return web.Response(text="login")
+
+    async def login(self, request: web.Request) -> web.Response:
+        self.logins += 1
+        response = web.HTTPFound("/Admin")
+        response.set_cookie("session", self.token)
+        raise response
+
+    async def admin(self, request: web.Request) -> web.Response:
+        return web.Response(text="admin")
+
+    async def table_sales(self, request: web.Request) -> web.Response:
+        if request.cookies.get("session") != self.token:
+            raise web.HTTPFound("/Account/Login?ReturnUrl=%2FAdmin%2F_TableSales")
+        self.pages += 1
+        return web.Response(text="sales")
+
+    async def test_relogin_on_redirect(self):
+        async with self.session as session:
+            self.assertEqual(await session.get_table_sales_page(), "sales")
+            self.assertEqual(await session.get_table_sales_page(), "sales")
+            self.assertEqual(self.logins, 1)
+
+            # Terminal forgot session
+            self.token = "2"
+            self.assertEqual(await session.get_table_sales_page(), "sales")
+
+        self.assertEqual(self.logins, 2)
+        self.assertEqual(self.pages, 3)
+
+    async def test_close_waits_for_last_user(self):
+        async with self.session as first:
+            async with self.session as second:
+                await second.get_table_sales_page()
+                await self.session.close()
+                self.assertFalse(self.session._session.closed)
+            await first.get_table_sales_page()
+            self.assertFalse(self.session._session.closed)
+
+        self.assertTrue(self.session._session.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import timedelta
+import unittest
+from app.services.parser.sales_table import iter_sales_rows
+from app.services.terminal.session import NoClientError, TerminalSession
+from test.fake_terminal import LOGIN, PASSWORD, FakeTerminal
+
+PHONE = "+7(900)123-45-67"
+
+
+class TestTerminalSession(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.terminal = FakeTerminal(rows=10, partners={PHONE: 7})
+        url = await self.terminal.start()
+        self.session = TerminalSession(1, url, LOGIN, PASSWORD)
+
+    async def login(self):
+        await self.session.get_table_sales_page()
+        self.terminal.requests.clear()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.terminal.stop()
+
+    async def test_concurrent_requests_login_once(self):
+        self.terminal.latency = 0.01
+        async with self.session as session:
+            pages = await asyncio.gather(
+                *(session.get_table_sales_page() for _ in range(5))
+            )
+            self.terminal.expire_sessions()
+            await asyncio.gather(*(session.get_table_sales_page() for _ in range(5)))
+
+        self.assertTrue(all(pages))
+        self.assertEqual(self.terminal.logins, 2)
+
+    async def test_wrong_password(self):
+        session = TerminalSession(2, self.terminal.url, LOGIN, "wrong")
+        with self.assertRaises(Exception):
+            await session.get_table_sales_page()
+        await session.close()
+
+    async def test_sales_date_param(self):
+        self.terminal.sales_date_param = "Date"
+        self.session.sales_date_param = "Date"
+        since = self.terminal.get_last_sale_date() + timedelta(days=1)
+
+        page = await self.session.get_table_sales_page(since)
+
+        self.assertEqual(list(iter_sales_rows(page)), [])
+
+    async def test_add_bonuses_by_phone(self):
+        await self.login()
+        async with self.session as session:
+            await session.add_bonuses_by_phone("89001234567", 100, "Test")
+            await session.add_bonuses_by_phone("+79001234567", 50, "Test")
+
+        self.assertEqual(
+            [(b["IdPartnerCore"], b["BonusCount"]) for b in self.terminal.bonuses],
+            [("7", "100"), ("7", "50")],
+        )
+        self.assertEqual(
+            self.terminal.requests["/Modules/GetPartnersByPhoneContains"], 1
+        )
+
+    async def test_no_client_is_cached(self):
+        await self.login()
+        for _ in range(2):
+            with self.assertRaises(NoClientError):
+                await self.session.get_partner_id("89000000000")
+
+        self.assertEqual(
+            self.terminal.requests["/Modules/GetPartnersByPhoneContains"], 1
+        )
+
+    async def test_concurrent_lookups_share_request(self):
+        await self.login()
+        self.terminal.latency = 0.01
+        ids = await asyncio.gather(*(self.session.get_partner_id(PHONE) for _ in range(3)))
+
+        self.assertEqual(ids, [7, 7, 7])
+        self.assertEqual(
+            self.terminal.requests["/Modules/GetPartnersByPhoneContains"], 1
+        )
+
+    async def test_registered_client_is_found_after_invalidate(self):
+        await self.login()
+        with self.assertRaises(NoClientError):
+            await self.session.get_partner_id("89000000000")
+        self.terminal.partners["+7(900)000-00-00"] = 8
+
+        self.session.invalidate_partner_id("89000000000")
+
+        self.assertEqual(await self.session.get_partner_id("89000000000"), 8)
+
+    async def test_failed_bonus_post_invalidates_partner_id(self):
+        await self.login()
+        await self.session.get_partner_id(PHONE)
+        self.terminal.failure_rate = 1
+        with self.assertRaises(Exception):
+            await self.session.add_bonuses_by_phone(PHONE, 100, "Test")
+
+        self.assertIsNone(self.session.partner_ids.get(PHONE))
+
+    async def test_warm_up_partner_ids(self):
+        await self.login()
+        await self.session.warm_up_partner_ids([PHONE, "89000000000", "wrong"])
+        self.assertEqual(await self.session.get_partner_id(PHONE), 7)
+        self.assertEqual(
+            self.terminal.requests["/Modules/GetPartnersByPhoneContains"], 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
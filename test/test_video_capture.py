@@ -1,20 +1,39 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 import cv2
-from app.services.cameras.video_capture import VideoCaptureThreaded
+import numpy as np
+from app.services.cameras import video_capture
+from app.services.cameras.video_capture import CameraState, VideoCaptureThreaded
+from app.settings.camera import CaptureMode
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
 
 
 class TestVideoCaptureThreaded(unittest.TestCase):
-    @patch('cv2.VideoCapture')
-    def setUp(self, mock_VideoCapture):
+    def setUp(self):
+        patcher = patch('cv2.VideoCapture')
+        self.mock_VideoCapture = patcher.start()
+        self.addCleanup(patcher.stop)
         self.mock_cap = MagicMock()
-        mock_VideoCapture.return_value = self.mock_cap
+        self.mock_cap.read.return_value = (True, np.full((4, 4, 3), 128, dtype=np.uint8))
+        self.mock_VideoCapture.return_value = self.mock_cap
         self.video_capture = VideoCaptureThreaded("test_src")
 
     def test_initialization(self):
+        self.mock_VideoCapture.assert_not_called()
+        self.assertTrue(self.video_capture.is_warming_up)
+        self.video_capture.start()
+        self.assertTrue(wait_for(lambda: self.video_capture.frame is not None))
         self.mock_cap.set.assert_any_call(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.mock_cap.set.assert_any_call(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.assertTrue(self.video_capture.cap is not None)
+        self.assertFalse(self.video_capture.is_warming_up)
+        self.assertEqual(self.video_capture.state, CameraState.LIVE)
 
     def test_start(self):
         self.video_capture.start()
@@ -22,26 +41,71 @@ class TestVideoCaptureThreaded(unittest.TestCase):
         self.assertTrue(self.video_capture.thread.is_alive())
 
     def test_read(self):
-        self.mock_cap.read.return_value = (True, "frame")
-        grabbed, frame = self.video_capture.read()
+        frame = np.ones((4, 4, 3), dtype=np.uint8)
+        self.video_capture.frame = frame
+        grabbed, read_frame = self.video_capture.read()
         self.assertTrue(grabbed)
-        self.assertEqual(frame, "frame")
+        self.assertTrue((read_frame == frame).all())
 
     def test_stop(self):
         self.video_capture.start()
         self.video_capture.stop()
         self.assertFalse(self.video_capture.started)
 
-    @patch('cv2.VideoCapture')
-    def test_read_no_frame(self, mock_VideoCapture):
+    def test_read_no_frame(self):
         self.video_capture.frame = None
-        self.video_capture.read()
+        self.assertEqual(self.video_capture.read(), (False, None))
+        self.mock_VideoCapture.assert_not_called()
+
+    def test_read_frame_timestamp(self):
+        self.video_capture.start()
+        self.assertTrue(wait_for(lambda: self.video_capture.frame is not None))
+        frame = self.video_capture.read_frame()
+        self.assertEqual(frame.timestamp, self.video_capture.frame_time)
+
+    @patch.object(video_capture, 'INITIAL_BACKOFF', 0.01)
+    def test_reconnect_after_failed_grabs(self):
+        good_frame = np.full((4, 4, 3), 128, dtype=np.uint8)
+        self.mock_cap.read.side_effect = [(True, good_frame)] + [(False, None)] * 100
+        new_cap = MagicMock()
+        new_cap.read.return_value = (True, np.full((4, 4, 3), 64, dtype=np.uint8))
+        self.mock_VideoCapture.side_effect = [self.mock_cap, new_cap]
+        self.video_capture.backoff = 0.01
+        self.video_capture.start()
+
+        self.assertTrue(wait_for(lambda: self.video_capture.frame is not None))
+        self.assertTrue(np.shares_memory(self.video_capture.read_frame().image, good_frame))
+        self.assertTrue(wait_for(lambda: new_cap.read.called))
         self.mock_cap.release.assert_called()
-        mock_VideoCapture.assert_called_with("test_src")
+        self.assertTrue(wait_for(lambda: self.video_capture.state == CameraState.LIVE))
+
+    def test_black_frames_are_skipped(self):
+        last_frame = np.full((4, 4, 3), 128, dtype=np.uint8)
+        self.video_capture._state = CameraState.LIVE
+        self.video_capture._set_frame(last_frame)
+        self.video_capture._set_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+        self.assertIs(self.video_capture.frame, last_frame)
+        self.assertEqual(self.video_capture.state, CameraState.STALE)
+
+    def test_grab_mode_decodes_on_demand(self):
+        frame = np.full((4, 4, 3), 200, dtype=np.uint8)
+        self.mock_cap.grab.return_value = True
+        self.mock_cap.retrieve.return_value = (True, frame)
+        self.video_capture.capture_mode = CaptureMode.GRAB
+        self.video_capture.refresh_interval = 3600
+        self.video_capture.start()
+
+        self.assertTrue(wait_for(lambda: self.video_capture.frame is not None))
+        grabbed, read_frame = self.video_capture.read()
+        self.assertTrue(grabbed)
+        self.assertTrue((read_frame == frame).all())
+        self.mock_cap.read.assert_not_called()
+        self.assertLess(self.mock_cap.retrieve.call_count, self.mock_cap.grab.call_count)
 
     def tearDown(self):
-        self.video_capture.stop()
+        if self.video_capture.started:
+            self.video_capture.stop()
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
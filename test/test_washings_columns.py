@@ -0,0 +1,70 @@
+from datetime import datetime
+import unittest
+import pandas as pd
+from app.services.parser.sales_table import WASHING_COLUMNS
+from app.services.parser.washings_columns import convert_washings_columns
+from app.utils.phone import phone_to_text
+
+
+def sales(rows):
+    return pd.DataFrame(rows, columns=list(WASHING_COLUMNS))
+
+
+class TestConvertWashingsColumns(unittest.TestCase):
+    def test_convert(self):
+        df = sales(
+            [
+                [
+                    "12",
+                    "01.10.2023 11:50:00",
+                    "Автоматический",
+                    "Завершено",
+                    "01.10.2023 11:51:00",
+                    "Не определено",
+                    "Режим 3",
+                    "8(999)123-45-67",
+                    "15",
+                    "Промокод №42",
+                    "250,00",
+                ],
+                [
+                    "11",
+                    "01.10.2023 11:40:00",
+                    "Автоматический",
+                    "Завершено",
+                    None,
+                    "01.10.2023 11:48:00",
+                    "Режим 1",
+                    None,
+                    None,
+                    None,
+                    "199,50",
+                ],
+            ]
+        )
+        columns = convert_washings_columns(df)
+        self.assertEqual(columns["id"], ["12", "11"])
+        self.assertEqual(
+            columns["date"], [datetime(2023, 10, 1, 11, 50), datetime(2023, 10, 1, 11, 40)]
+        )
+        self.assertEqual(columns["start_date"], [datetime(2023, 10, 1, 11, 51), None])
+        self.assertEqual(columns["end_date"], [None, datetime(2023, 10, 1, 11, 48)])
+        self.assertEqual(columns["state"], ["Завершено", "Завершено"])
+        self.assertEqual(columns["mode"], [3, 1])
+        self.assertEqual(columns["phone"], [phone_to_text("8(999)123-45-67"), None])
+        self.assertEqual(columns["bonuses"], [15, None])
+        self.assertEqual(columns["promocode"], [42, None])
+        self.assertEqual(columns["price"], [250, 199])
+        self.assertIs(type(columns["price"][0]), int)
+        self.assertIs(type(columns["bonuses"][0]), int)
+
+    def test_phones_same_as_phone_to_text(self):
+        phones = ["8(999)123-45-67", "7 999 123 45 67", "+7(999)123-45-67", "89991234567"]
+        df = sales([[str(i), None, None, None, None, None, "Режим 1", phone, None, None, "0"] for i, phone in enumerate(phones)])
+        self.assertEqual(
+            convert_washings_columns(df)["phone"], [phone_to_text(p) for p in phones]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime
+import sys
+from types import ModuleType, SimpleNamespace
+import unittest
+from unittest.mock import AsyncMock
+
+try:
+    from app.services.client_database.models.washing import Washing
+except ImportError:
+    # Database models are not needed to parse washings, only their fields are checked
+    class Washing(SimpleNamespace):
+        pass
+
+    for name in ("client_database", "client_database.models"):
+        sys.modules[f"app.services.{name}"] = ModuleType(f"app.services.{name}")
+    washing_module = ModuleType("app.services.client_database.models.washing")
+    washing_module.Washing = Washing  # pyright: ignore
+    sys.modules[washing_module.__name__] = washing_module
+
+from app.services.parser.sales_table import WASHING_COLUMNS
+from app.services.parser.washings_parser import WashingsParser
+from app.services.parser.watermark import Watermark
+
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def header_cell(column):
+    # Two spaces in column name are line break of terminal header
+    return "<th>" + column.replace("  ", "<br>\n ") + "</th>"
+
+
+def create_page(ids, now=None):
+    """Finished automatic washings, the newest first, Id is not a number for ids < 0"""
+    now = now or datetime.now().replace(microsecond=0)
+    rows = []
+    for id in ids:
+        date = now.strftime(DATE_FORMAT)
+        values = [
+            str(id) if id >= 0 else "x",
+            date,
+            "Автоматический",
+            "Завершено",
+            date,
+            date,
+            "Режим 1",
+            "+7(900)123-45-67",
+            "",
+            "",
+            "250,00",
+        ]
+        rows.append("<tr>" + "".join(f"<td>{value}</td>" for value in values) + "</tr>")
+    header = "".join(header_cell(column) for column in WASHING_COLUMNS)
+    return f"<html><body><table><tr>{header}</tr>{''.join(rows)}</table></body></html>"
+
+
+class FakeSession:
+    terminal_id = 1
+
+    def __init__(self, page):
+        self.page = page
+        self.get_table_sales_page = AsyncMock(side_effect=lambda since=None: self.page)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class TestWashingsParser(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession(create_page([12, 11, 10]))
+        self.parser = WashingsParser([self.session])
+
+    def poll(self):
+        return [washing.id for washing in asyncio.run(self.parser.get_washings())]
+
+    def test_washing_fields(self):
+        washing = asyncio.run(self.parser.get_washings())[0]
+        self.assertEqual(washing.terminal, 1)
+        self.assertEqual(washing.id, "12")
+        self.assertEqual(washing.price, 250)
+        self.assertEqual(washing.phone, "+79001234567")
+
+    def test_unchanged_page(self):
+        self.assertEqual(self.poll(), ["12", "11", "10"])
+        asyncio.run(self.parser.commit())
+        self.assertEqual(self.poll(), [])
+
+        stats = self.parser.stats[1]
+        self.assertEqual((stats.polls, stats.unchanged), (2, 1))
+
+    def test_changed_page(self):
+        self.poll()
+        asyncio.run(self.parser.commit())
+        self.session.page = create_page([13, 12, 11, 10])
+        self.assertEqual(self.poll(), ["13", "12", "11", "10"])
+        self.assertEqual(self.parser.stats[1].unchanged, 0)
+
+    def test_rows_are_given_again_without_commit(self):
+        self.assertEqual(self.poll(), ["12", "11", "10"])
+        self.assertEqual(self.poll(), ["12", "11", "10"])
+        self.assertEqual(self.parser.stats[1].unchanged, 0)
+
+
+class TestWashingsParserWatermark(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime.now().replace(microsecond=0)
+        self.storage = AsyncMock()
+        self.storage.get_all.return_value = {1: Watermark(10, self.now)}
+        # Row after watermark has no Id, it would stop filtering if it was parsed
+        self.session = FakeSession(create_page([12, 11, 10, -1], self.now))
+        self.parser = WashingsParser([self.session], self.storage)
+
+    def poll(self):
+        return [washing.id for washing in asyncio.run(self.parser.get_washings())]
+
+    def test_rows_after_watermark(self):
+        self.assertEqual(self.poll(), ["12", "11"])
+        self.session.get_table_sales_page.assert_awaited_with(self.now)
+
+    def test_watermark_is_saved_on_commit(self):
+        self.poll()
+        self.storage.save.assert_not_awaited()
+        self.assertEqual(self.parser.watermarks[1].id, 10)
+
+        asyncio.run(self.parser.commit())
+
+        self.storage.save.assert_awaited_once_with({1: Watermark(12, self.now)})
+        self.assertEqual(self.parser.watermarks[1].id, 12)
+        self.assertEqual(self.poll(), [])
+
+    def test_watermark_is_not_moved_without_commit(self):
+        self.assertEqual(self.poll(), ["12", "11"])
+        self.assertEqual(self.poll(), ["12", "11"])
+        self.storage.save.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
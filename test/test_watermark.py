@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import pandas as pd
+from app.services.parser.watermark import (
+    Watermark,
+    WatermarkStorage,
+    filter_after_watermark,
+)
+
+NOW = datetime(2023, 10, 1, 12, 0, 0)
+
+
+def sales(rows):
+    return pd.DataFrame(
+        [
+            {"Id": id, "Дата": date, "Дата завершения  БУМ": end_date}
+            for id, date, end_date in rows
+        ]
+    )
+
+
+class TestFilterAfterWatermark(unittest.TestCase):
+    def test_first_poll(self):
+        df = sales(
+            [
+                (12, "01.10.2023 11:50:00", "01.10.2023 11:58:00"),
+                (11, "01.10.2023 11:40:00", "01.10.2023 11:48:00"),
+            ]
+        )
+        rows, watermark = filter_after_watermark(df, None, NOW)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(watermark, Watermark(12, datetime(2023, 10, 1, 11, 50)))
+
+    def test_rows_after_watermark(self):
+        df = sales(
+            [
+                (13, "01.10.2023 11:55:00", "01.10.2023 11:59:00"),
+                (12, "01.10.2023 11:50:00", "01.10.2023 11:58:00"),
+            ]
+        )
+        rows, watermark = filter_after_watermark(df, Watermark(12), NOW)
+        self.assertEqual(rows["Id"].tolist(), [13])
+        self.assertEqual(watermark.id, 13)
+
+    def test_unfinished_washing_holds_watermark(self):
+        df = sales(
+            [
+                (14, "01.10.2023 11:58:00", "01.10.2023 11:59:00"),
+                (13, "01.10.2023 11:55:00", "Не определено"),
+                (12, "01.10.2023 11:50:00", "01.10.2023 11:58:00"),
+            ]
+        )
+        rows, watermark = filter_after_watermark(df, Watermark(11), NOW)
+        self.assertEqual(rows["Id"].tolist(), [14, 13, 12])
+        self.assertEqual(watermark.id, 12)
+
+        rows, watermark = filter_after_watermark(df, Watermark(12), NOW)
+        self.assertEqual(watermark, Watermark(12))
+
+    def test_old_unfinished_washing_is_not_waited(self):
+        df = sales([(13, "01.10.2023 06:00:00", "Не определено")])
+        _, watermark = filter_after_watermark(df, Watermark(12), NOW)
+        self.assertEqual(watermark.id, 13)
+
+    def test_nothing_new(self):
+        df = sales([(12, "01.10.2023 11:50:00", "01.10.2023 11:58:00")])
+        rows, watermark = filter_after_watermark(df, Watermark(12), NOW)
+        self.assertTrue(rows.empty)
+        self.assertEqual(watermark, Watermark(12))
+
+
+class TestWatermarkStorage(unittest.TestCase):
+    def test_round_trip(self):
+        data = {}
+        redis = MagicMock()
+
+        async def hset(key, mapping):
+            data.update({k.encode(): v.encode() for k, v in mapping.items()})
+
+        redis.hset = AsyncMock(side_effect=hset)
+        redis.hgetall = AsyncMock(side_effect=lambda key: data)
+        storage = WatermarkStorage(redis)
+        watermark = Watermark(12, datetime(2023, 10, 1, 11, 50))
+        asyncio.run(storage.save({1: watermark}))
+        self.assertEqual(asyncio.run(storage.get_all()), {1: watermark})
+
+
+if __name__ == '__main__':
+    unittest.main()